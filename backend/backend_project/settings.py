@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 import os
 from pathlib import Path
 import logging
+import tempfile
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -41,6 +42,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'corsheaders',
     # 'bots', # Commenting out as it seems to be a typo or unused
@@ -175,8 +177,10 @@ WEB3_SETTINGS = {
 }
 
 # IPFS 设置
-IPFS_NODE_URL = 'http://localhost:5001'  # IPFS节点地址
-IPFS_GATEWAY_URL = 'https://ipfs.io'  # IPFS网关地址
+IPFS_BACKEND = os.getenv('IPFS_BACKEND', 'pinata')  # 上传器: pinata / kubo / memory，或上传器类的导入路径
+IPFS_NODE_URL = os.getenv('IPFS_NODE_URL', 'http://localhost:5001')  # IPFS节点地址（kubo 上传器使用）
+IPFS_GATEWAY_URL = os.getenv('IPFS_GATEWAY_URL', 'https://ipfs.io')  # IPFS网关地址
+IPFS_MEMORY_LATENCY = 0  # memory 上传器模拟的每次上传耗时（秒）
 
 # Web3 配置
 WEB3_PROVIDER_URL = 'https://optimism-sepolia.infura.io/v3/161ab53b248d4a039e6e6d31908a988b'  # OP Sepolia RPC URL
@@ -184,6 +188,63 @@ BOT_REGISTRY_CONTRACT_ADDRESS = '0x25418e6f247161681D7a94912B0BA0D9e34c11ED'
 BOT_SUBSCRIPTION_CONTRACT_ADDRESS = '0xCc54d4B377B9feACa48011436193B4DF0588B6e6'
 BOT_PAYMENT_CONTRACT_ADDRESS = '0x59eE55A565680aAb89F3cbEb4a35ce5Aeef9D427'
 USDT_CONTRACT_ADDRESS = '0x325105c248bC4683b0c1CA24a8774cFA142Cc0e0'
+MULTICALL3_ADDRESS = '0xcA11bde05977b3631167028862bE2a173976CA11'  # Multicall3 在各链上的统一部署地址
+
+# 合约 ABI 配置
+CONTRACT_ARTIFACTS_DIR = BASE_DIR.parent / 'blockchain' / 'artifacts' / 'contracts'  # Hardhat 编译产物目录
+CONTRACT_ABI_CACHE_PATH = BASE_DIR / 'botmanagement' / 'abi_cache.json'  # 只包含 abi 的紧凑缓存文件
+WEB3_WARM_ON_STARTUP = os.getenv('WEB3_WARM_ON_STARTUP', '') == '1'  # 启动时预加载合约
+
+# JSON-RPC 连接池配置
+WEB3_RPC = {
+    'POOL_SIZE': int(os.getenv('WEB3_RPC_POOL_SIZE', '20')),  # 每个进程的最大连接数
+    'CONNECT_TIMEOUT': 3,  # 建立连接超时（秒）
+    'TIMEOUT': 10,  # 默认读取超时（秒）
+    'METHOD_TIMEOUTS': {  # 按方法覆盖读取超时
+        'eth_getLogs': 30,
+    },
+    'KEEP_ALIVE': True,  # 复用 TCP/TLS 连接
+    'RETRIES': 2,  # 连接失败时的重试次数
+}
+
+# 发布交易确认配置
+PUBLISH_REQUIRED_CONFIRMATIONS = int(os.getenv('PUBLISH_REQUIRED_CONFIRMATIONS', '0' if DEBUG else '1'))  # 开发环境允许0个确认数
+PUBLISH_VERIFICATION_TIMEOUT = 3600  # 超过该时间（秒）仍未找到收据则判定失败
+PUBLISH_VERIFICATION_BATCH_SIZE = 50  # 后台任务每批校验的交易数
+PUBLISH_VERIFICATION_INTERVAL = 3  # 后台任务轮询间隔（秒）
+PUBLISH_VERIFICATION_LEASE = None  # 交易被取出后在该时间（秒）内不会被其他进程重复校验，None 时按 WEB3_RPC 的超时和重试估算
+PUBLISH_VERIFICATION_LEASE_MARGIN = 30  # 估算租约时额外预留的时间（秒），包括解码日志和读写数据库
+
+# 交易收据缓存配置
+RECEIPT_CACHE = {
+    'MAX_ENTRIES': 10000,  # 每个进程最多缓存的收据数
+    'FINALITY_DEPTH': 64,  # 确认数达到该深度后永久缓存
+    'PENDING_TTL': 15,  # 未最终确认的收据缓存时间（秒）
+}
+
+# 链上事件同步配置
+CHAIN_INDEXER_START_BLOCK = int(os.getenv('CHAIN_INDEXER_START_BLOCK', '0'))  # 合约部署所在区块
+CHAIN_INDEXER_CHUNK_SIZE = 2000  # 每次 eth_getLogs 查询的区块数
+CHAIN_INDEXER_CONFIRMATIONS = 5  # 只同步到 最新区块 - 确认数，避免链重组
+CHAIN_INDEXER_INTERVAL = 5  # 跟随模式下的轮询间隔（秒）
+
+# 缓存配置，shared 为同一节点上所有进程共享的缓存
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('SHARED_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'botmanagement_cache')),
+    },
+}
+
+# 最新区块跟踪配置（由 follow_chain_head 命令写入共享缓存）
+CHAIN_HEAD = {
+    'CACHE_ALIAS': 'shared',
+    'MAX_STALENESS': 4,  # 超过该时间（秒）未更新时回退到 RPC 查询
+    'POLL_INTERVAL': 1,  # 跟随进程的轮询间隔（秒）
+}
 
 # 确保设置了 Web3 提供者
 if not WEB3_PROVIDER_URL or WEB3_PROVIDER_URL == 'https://sepolia.infura.io/v3/your-infura-key':
@@ -222,6 +283,55 @@ if not PINATA_JWT:
 else:
     logger.info("Pinata JWT 已成功加载")
 
+# IPFS 上传队列配置
+IPFS_UPLOAD_TIMEOUT = (5, 30)  # 上传请求的连接/读取超时（秒）
+IPFS_UPLOAD_MAX_ATTEMPTS = 5  # 超过该次数仍失败则标记为上传失败
+IPFS_UPLOAD_RETRY_BACKOFF = 5  # 首次重试的等待时间（秒），之后按指数增长
+IPFS_UPLOAD_LEASE = None  # 任务被取出后在该时间（秒）内不会被其他进程重复处理，None 时按批量大小、并发数和超时估算
+IPFS_UPLOAD_LEASE_MARGIN = 60  # 估算租约时额外预留的时间（秒），包括计算 CID 和读写数据库
+IPFS_UPLOAD_BATCH_SIZE = 20  # 后台任务每批处理的上传数
+IPFS_UPLOAD_WORKERS = 4  # 并发上传的线程数
+IPFS_UPLOAD_INTERVAL = 2  # 后台任务轮询间隔（秒）
+IPFS_BULK_UPLOAD_MAX_BOTS = 100  # 批量上传接口单次最多处理的机器人数
+IPFS_BULK_UPLOAD_WORKERS = 8  # 批量上传接口的并发数
+IPFS_STREAM_CHUNK_SIZE = 64 * 1024  # 流式上传图片时每次读取的字节数
+
+# 目录接口（published / get_published_bot）响应缓存，机器人变化时按版本整体失效
+CATALOG_CACHE = {
+    'CACHE_ALIAS': 'shared',
+    'TIMEOUT': 300,  # 旧版本的缓存在该时间（秒）后过期
+}
+
+# 已发布机器人列表分页
+PUBLISHED_PAGE_SIZE = 20  # 默认每页数量
+PUBLISHED_MAX_PAGE_SIZE = 100  # ?page_size= 的上限
+
+# 订阅统计，rollover_subscription_stats 命令必须常驻运行，按该间隔重算有订阅到期或试用结束的机器人
+SUBSCRIPTION_STATS_INTERVAL = 60  # 轮询间隔（秒），统计中的有效订阅和试用数最多滞后这么久
+
+# 流式 JSON 响应（published?all=1、订阅状态）
+STREAMING_CHUNK_SIZE = 2000  # 服务端游标每次读取的行数
+STREAMING_BUFFER_SIZE = 64 * 1024  # 累积到该字节数后输出一块
+
+# 图片缩略图配置
+IMAGE_VARIANTS = {
+    'thumb': (160, 160),  # 列表页缩略图
+    'medium': (640, 640),  # 详情页
+}
+IMAGE_VARIANT_QUALITY = 80  # WebP 质量
+IMAGE_VARIANT_WORKERS = 2  # 生成缩略图的进程数
+IMAGE_VARIANT_DIR = 'bot_images/variants'  # 缩略图存储目录（相对 MEDIA_ROOT）
+
+# IPFS 内容读穿透缓存配置
+IPFS_CACHE = {
+    'DIRECTORY': os.getenv('IPFS_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'botmanagement_ipfs')),  # 磁盘缓存目录
+    'MAX_DISK_BYTES': 512 * 1024 * 1024,  # 磁盘缓存总大小上限
+    'MEMORY_ENTRIES': 1024,  # 每个进程内存中缓存的条目数
+    'MAX_ITEM_BYTES': 5 * 1024 * 1024,  # 超过该大小的内容不缓存
+    'GATEWAY_URL': 'https://gateway.pinata.cloud',  # 缓存未命中时访问的网关
+    'TIMEOUT': (3, 15),  # 网关请求的连接/读取超时（秒）
+}
+
 # SIWE 配置
 ALLOWED_DOMAINS = ['localhost', '127.0.0.1', 'localhost:5173', '127.0.0.1:5173']  # 开发环境域名
 ALLOWED_CHAIN_ID = 11155111  # Sepolia 测试网
@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class BotmanagementConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'botmanagement'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        if settings.WEB3_WARM_ON_STARTUP:
+            from .utils.contracts import warm
+            warm()
@@ -0,0 +1,80 @@
+import re
+from datetime import datetime, time
+from decimal import Decimal
+
+from django.db.models.functions import Lower
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+ADDRESS_RE = re.compile(r'^0x[0-9a-fA-F]{40}$')
+
+
+def _decimal(value):
+    value = Decimal(value)
+    if not value.is_finite():
+        raise ValueError(value)
+    return value
+
+
+def _datetime(value):
+    """ISO 8601 时间或日期（按当前时区的零点），不带时区的时间按当前时区处理"""
+    parsed = parse_datetime(value)
+    if parsed is None:
+        date = parse_date(value)
+        if date is None:
+            raise ValueError(value)
+        parsed = datetime.combine(date, time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+# 查询参数 -> (查询条件, 解析函数)
+RANGE_FILTERS = {
+    'price_min': ('price__gte', _decimal),
+    'price_max': ('price__lte', _decimal),
+    # trial_time 以天为单位（与表单和列表一致，发布上链时才换算为小时）
+    'trial_days_min': ('trial_time__gte', int),
+    'trial_days_max': ('trial_time__lte', int),
+    'published_after': ('published_at__gte', _datetime),
+    'published_before': ('published_at__lt', _datetime),
+}
+
+
+class PublishedFilterBackend(BaseFilterBackend):
+    """
+    已发布目录的筛选，条件可以任意组合：
+
+    ?price_min= / ?price_max= 价格区间，?trial_days_min= / ?trial_days_max= 试用天数区间，
+    ?developer= 开发者钱包地址（不区分大小写），?published_after= / ?published_before= 发布时间区间（不含结束时间）
+
+    每种条件都有以 status 开头的复合索引（见 BotManagement.Meta.indexes），任何组合都不会全表扫描
+    """
+    developer_query_param = 'developer'
+
+    def filter_queryset(self, request, queryset, view):
+        errors = {}
+        for param, (lookup, parse) in RANGE_FILTERS.items():
+            value = request.query_params.get(param)
+            if not value:
+                continue
+            try:
+                queryset = queryset.filter(**{lookup: parse(value)})
+            except (ValueError, ArithmeticError):
+                errors[param] = [f"无效的值: {value}"]
+
+        developer = request.query_params.get(self.developer_query_param)
+        if developer:
+            if ADDRESS_RE.match(developer):
+                # 与 bot_published_developer_idx 的 LOWER(developer_address) 表达式一致
+                queryset = queryset.alias(developer_lower=Lower('developer_address')).filter(
+                    developer_lower=developer.lower()
+                )
+            else:
+                errors[self.developer_query_param] = [f"无效的钱包地址: {developer}"]
+
+        if errors:
+            raise ValidationError(errors)
+        return queryset
@@ -0,0 +1,86 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from botmanagement.models import BotManagement
+from botmanagement.serializers import BotManagementSerializer
+from botmanagement.utils.catalog import CatalogRenderer
+
+
+class Command(BaseCommand):
+    help = (
+        '比较 BotManagementSerializer 与 values() 投影两种方式序列化已发布目录的耗时（查询 + 序列化 + 渲染 JSON）。'
+        '测试数据在事务中创建，结束后全部回滚'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000], help='测试的行数，可指定多个')
+        parser.add_argument('--repeat', type=int, default=3, help='每种方式重复次数，取最快的一次')
+
+    def handle(self, *args, **options):
+        request = Request(APIRequestFactory().get('/api/bots/published/'))
+        with transaction.atomic():
+            results = self._run(sorted(options['rows']), options['repeat'], request)
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"{'行数':>8}{'序列化器(ms)':>16}{'投影(ms)':>12}{'加速':>8}{'响应大小(KB)':>16}")
+        for rows, serializer_time, projection_time, size in results:
+            self.stdout.write(
+                f"{rows:>8}{serializer_time * 1000:>16.1f}{projection_time * 1000:>12.1f}"
+                f"{serializer_time / projection_time:>8.1f}x{size / 1024:>16.1f}"
+            )
+
+    def _seed(self, user, start, end):
+        now = timezone.now()
+        BotManagement.objects.bulk_create(
+            [
+                BotManagement(
+                    user=user, name=f'bench{i}', description=f'bench bot {i} ' * 8, price='9.99', trial_time=24,
+                    status='published', published_at=now, ipfs_status='uploaded', ipfs_hash=f'QmBench{i}',
+                    is_ipfs_locked=True, contract_bot_id=i,
+                    image1='bot_images/bench.png' if i % 2 else None,
+                    image_variants={'image1': {'thumb': 'bot_images/variants/bench_thumb.webp'}} if i % 2 else {},
+                )
+                for i in range(start, end)
+            ],
+            batch_size=2000
+        )
+
+    def _best(self, func, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            content = func()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, content
+
+    def _run(self, sizes, repeat, request):
+        user = User.objects.create_user(username=f'bench-{int(time.time() * 1000)}', password=None)
+        results = []
+        seeded = 0
+        for rows in sizes:
+            self._seed(user, seeded, rows)
+            seeded = max(seeded, rows)
+            bots = BotManagement.objects.filter(user=user, status='published').order_by('-published_at', '-id')[:rows]
+
+            def serializer():
+                # 每次使用新的查询集，否则之后的重复会直接读 _result_cache，不包含查询时间
+                data = BotManagementSerializer(bots.all(), many=True, context={'request': request}).data
+                return JSONRenderer().render(data)
+
+            def projection():
+                renderer = CatalogRenderer(request)
+                return CatalogRenderer.render(renderer.rows(renderer.queryset(bots)))
+
+            serializer_time, _ = self._best(serializer, repeat)
+            projection_time, content = self._best(projection, repeat)
+            results.append((rows, serializer_time, projection_time, len(content)))
+            self.stdout.write(f"已完成 {rows} 行")
+        return results
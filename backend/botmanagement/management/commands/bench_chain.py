@@ -0,0 +1,189 @@
+import math
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from botmanagement.models import BotManagement, PublishVerification
+from botmanagement.utils import chain_head, contracts
+from botmanagement.utils.fake_chain import FakeChain, FakeRPCServer
+from botmanagement.utils.multicall import bot_details_cache
+from botmanagement.utils.publish import process_pending, request_verification
+from botmanagement.utils.receipts import receipt_cache
+from botmanagement.utils.rpc import rpc_stats
+
+ENDPOINTS = ['confirm_publish', 'publish_status', 'verify_publications', 'published_onchain']
+
+# 压测使用进程内的共享缓存，清空或写入最新区块、目录版本时不影响同一主机上运行的服务
+BENCH_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'bench-chain'},
+}
+
+
+def percentile(samples, p):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[max(math.ceil(p / 100 * len(ordered)) - 1, 0)]
+
+
+def _rpc_count():
+    return sum(entry['count'] for entry in rpc_stats.snapshot().values())
+
+
+def _clear_caches():
+    receipt_cache.clear()
+    bot_details_cache.clear()
+    chain_head.clear()
+
+
+class Command(BaseCommand):
+    help = (
+        '启动本地假 JSON-RPC 节点，压测链上相关的接口和后台任务，输出吞吐量与 p50/p99 延迟。'
+        '测试数据在事务中创建，结束后全部回滚'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='每个接口的请求次数')
+        parser.add_argument('--bots', type=int, default=50, help='已发布的机器人数量')
+        parser.add_argument('--latency', type=float, default=50, help='假节点每个 HTTP 请求的延迟（毫秒）')
+        parser.add_argument('--jitter', type=float, default=0, help='在延迟上叠加的随机抖动上限（毫秒）')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='假节点返回 429 的概率')
+        parser.add_argument('--batch-size', type=int, default=settings.PUBLISH_VERIFICATION_BATCH_SIZE)
+        parser.add_argument('--cold', action='store_true', help='每次请求前清空收据、区块和链上状态缓存')
+        parser.add_argument('--endpoint', action='append', choices=ENDPOINTS, help='只压测指定接口，可重复')
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        try:
+            contracts.get_abi('NewRegistry')
+        except KeyError as e:
+            raise CommandError(f"{str(e)}，请先编译合约或运行 build_abi_cache")
+
+        chain = FakeChain(settings.BOT_REGISTRY_CONTRACT_ADDRESS, settings.MULTICALL3_ADDRESS)
+        server = FakeRPCServer(
+            chain,
+            latency=options['latency'] / 1000,
+            jitter=options['jitter'] / 1000,
+            error_rate=options['error_rate'],
+            seed=options['seed'],
+        )
+        endpoints = [name for name in ENDPOINTS if name in (options['endpoint'] or ENDPOINTS)]
+
+        with server, override_settings(
+            WEB3_PROVIDER_URL=server.url, PUBLISH_REQUIRED_CONFIRMATIONS=1, CACHES=BENCH_CACHES
+        ):
+            contracts.reset()
+            _clear_caches()
+            try:
+                with transaction.atomic():
+                    results = self._run(chain, endpoints, options)
+                    transaction.set_rollback(True)
+            finally:
+                contracts.reset()
+                _clear_caches()
+
+        self.stdout.write(
+            f"假节点: 延迟 {options['latency']}ms，抖动 {options['jitter']}ms，错误率 {options['error_rate']}，"
+            f"共收到 {server.requests} 个 HTTP 请求，注入错误 {server.errors} 次"
+        )
+        self.stdout.write(
+            f"{'接口':<22}{'次数':>8}{'错误':>8}{'吞吐(次/秒)':>14}{'p50(ms)':>12}{'p99(ms)':>12}{'RPC/次':>10}"
+        )
+        for name, result in results.items():
+            samples = result['samples']
+            throughput = len(samples) / result['elapsed'] if result['elapsed'] else 0.0
+            self.stdout.write(
+                f"{name:<22}{len(samples):>8}{result['errors']:>8}{throughput:>14.1f}"
+                f"{percentile(samples, 50) * 1000:>12.2f}{percentile(samples, 99) * 1000:>12.2f}"
+                f"{result['rpc'] / max(len(samples), 1):>10.2f}"
+            )
+
+    def _measure(self, func, iterations, cold):
+        samples = []
+        errors = 0
+        elapsed = 0.0
+        rpc = 0
+        for i in range(iterations):
+            if cold:
+                _clear_caches()
+            rpc_before = _rpc_count()
+            started = time.perf_counter()
+            ok = func(i)
+            duration = time.perf_counter() - started
+            rpc += _rpc_count() - rpc_before
+            elapsed += duration
+            samples.append(duration)
+            if not ok:
+                errors += 1
+        return {'samples': samples, 'errors': errors, 'elapsed': elapsed, 'rpc': rpc}
+
+    def _run(self, chain, endpoints, options):
+        user = User.objects.create_user(username=f'bench-{int(time.time() * 1000)}', password=None)
+        client = APIClient()
+        client.force_authenticate(user=user)
+        developer = '0x' + '11' * 20
+        iterations = options['requests']
+
+        # 已发布的机器人，供 published?onchain=1 使用
+        for i in range(options['bots']):
+            bot_id, transaction_hash = chain.register_bot(f'QmPublished{i}', developer, name=f'bench{i}')
+            BotManagement.objects.create(
+                user=user, name=f'bench{i}', description='bench', price='1.00',
+                status='published', contract_bot_id=bot_id, transaction_hash=transaction_hash,
+                published_at=timezone.now()
+            )
+
+        # 待确认的发布交易
+        pending = []
+        for i in range(iterations):
+            _, transaction_hash = chain.register_bot(f'QmPending{i}', developer, name=f'pending{i}')
+            bot = BotManagement.objects.create(
+                user=user, name=f'pending{i}', description='bench', price='1.00',
+                ipfs_status='uploaded', ipfs_hash=f'QmPending{i}'
+            )
+            pending.append((bot, transaction_hash))
+        chain.mine(settings.PUBLISH_REQUIRED_CONFIRMATIONS + 1)
+        if 'confirm_publish' not in endpoints:
+            for bot, transaction_hash in pending:
+                request_verification(bot, transaction_hash)
+
+        def confirm_publish(i):
+            bot, transaction_hash = pending[i]
+            url = reverse('bot-confirm-publish', kwargs={'pk': bot.pk})
+            return client.post(url, {'transactionHash': transaction_hash}, format='json').status_code < 400
+
+        def publish_status(i):
+            url = reverse('bot-publish-status', kwargs={'pk': pending[i][0].pk})
+            return client.get(url).status_code < 400
+
+        def verify_publications(i):
+            verifications = process_pending(options['batch_size'])
+            return all(v.status == 'confirmed' for v in verifications)
+
+        def published_onchain(i):
+            response = client.get(reverse('bot-published') + f"?onchain=1&page_size={settings.PUBLISHED_MAX_PAGE_SIZE}")
+            return response.status_code < 400 and all(item.get('onchain') for item in response.data['results'])
+
+        funcs = {
+            'confirm_publish': confirm_publish,
+            'publish_status': publish_status,
+            'verify_publications': verify_publications,
+            'published_onchain': published_onchain,
+        }
+        results = {}
+        for name in endpoints:
+            runs = iterations
+            if name == 'verify_publications':
+                # 每次取一批，直到队列清空
+                queued = PublishVerification.objects.filter(status='pending').count()
+                runs = math.ceil(queued / options['batch_size'])
+            results[name] = self._measure(funcs[name], runs, options['cold'])
+        return results
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from botmanagement.utils.contracts import CONTRACTS, extract_abis, write_abi_cache
+
+
+class Command(BaseCommand):
+    help = '从 Hardhat 编译产物中提取合约 ABI，生成紧凑的 ABI 缓存文件'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=None, help='缓存文件路径，默认使用 CONTRACT_ABI_CACHE_PATH')
+
+    def handle(self, *args, **options):
+        abis = extract_abis()
+        missing = [name for name in CONTRACTS if name not in abis]
+        if missing:
+            raise CommandError(
+                f"缺少编译产物: {', '.join(missing)}，请先在 blockchain 目录执行 npx hardhat compile"
+            )
+        path = write_abi_cache(abis, options['output'] or settings.CONTRACT_ABI_CACHE_PATH)
+        self.stdout.write(self.style.SUCCESS(f"ABI 缓存已写入: {path}"))
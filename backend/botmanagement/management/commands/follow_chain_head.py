@@ -0,0 +1,35 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from botmanagement.utils.chain_head import fetch_head
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = '持续跟踪最新区块并写入共享缓存，每个节点运行一个即可'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='只更新一次后退出')
+        parser.add_argument('--interval', type=float, default=settings.CHAIN_HEAD['POLL_INTERVAL'])
+
+    def handle(self, *args, **options):
+        last_number = None
+        while True:
+            try:
+                head = fetch_head()
+                if head.number != last_number:
+                    logger.debug(f"最新区块 {head.number}，出块时间 {head.timestamp}")
+                    last_number = head.number
+            except Exception as e:
+                if options['once']:
+                    raise
+                logger.error(f"读取最新区块失败: {str(e)}", exc_info=True)
+
+            if options['once']:
+                self.stdout.write(f"最新区块 {last_number}")
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,37 @@
+import logging
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from botmanagement.models import BotManagement
+from botmanagement.utils.images import generate_variants, shutdown
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = '为已有机器人的图片生成 WebP 缩略图'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='重新生成所有机器人的缩略图，默认只处理还没有缩略图的')
+
+    def handle(self, *args, **options):
+        bots = BotManagement.objects.exclude(
+            Q(image1='') | Q(image1__isnull=True),
+            Q(image2='') | Q(image2__isnull=True),
+            Q(image3='') | Q(image3__isnull=True),
+        )
+        if not options['all']:
+            bots = bots.filter(image_variants={})
+
+        count = 0
+        try:
+            for bot in bots.order_by('id').iterator(chunk_size=100):
+                try:
+                    generate_variants(bot)
+                    count += 1
+                except Exception as e:
+                    logger.error(f"Bot {bot.id} 生成缩略图失败: {str(e)}")
+        finally:
+            shutdown()
+        self.stdout.write(f"已为 {count} 个机器人生成缩略图")
@@ -0,0 +1,38 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from botmanagement.utils.indexer import EventIndexer
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = '同步 NewRegistry、NewSubscription、NewBotPayment 的链上事件到本地数据库'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from-block', type=int, default=None, help='起始区块，默认从上次同步进度继续')
+        parser.add_argument('--to-block', type=int, default=None, help='结束区块，默认同步到安全区块高度')
+        parser.add_argument('--chunk-size', type=int, default=settings.CHAIN_INDEXER_CHUNK_SIZE)
+        parser.add_argument('--follow', action='store_true', help='持续跟随新区块')
+        parser.add_argument('--interval', type=float, default=settings.CHAIN_INDEXER_INTERVAL)
+
+    def handle(self, *args, **options):
+        indexer = EventIndexer(chunk_size=options['chunk_size'])
+        from_block = options['from_block']
+
+        while True:
+            try:
+                count, block_number = indexer.run_once(from_block=from_block, to_block=options['to_block'])
+                self.stdout.write(f"同步完成，写入事件 {count} 条，当前区块 {block_number}")
+                from_block = None
+            except Exception as e:
+                if not options['follow']:
+                    raise
+                logger.error(f"同步链上事件失败: {str(e)}", exc_info=True)
+
+            if not options['follow']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,38 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from botmanagement.utils.ipfs_upload import process_pending_uploads
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = '后台处理 IPFS 上传队列，失败时按指数退避重试'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='只处理一批后退出')
+        parser.add_argument('--batch-size', type=int, default=settings.IPFS_UPLOAD_BATCH_SIZE)
+        parser.add_argument('--workers', type=int, default=settings.IPFS_UPLOAD_WORKERS, help='并发上传的线程数')
+        parser.add_argument('--interval', type=float, default=settings.IPFS_UPLOAD_INTERVAL)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        while True:
+            try:
+                bots = process_pending_uploads(batch_size, options['workers'])
+                if bots:
+                    uploaded = sum(1 for bot in bots if bot.ipfs_status == 'uploaded')
+                    failed = sum(1 for bot in bots if bot.ipfs_status == 'failed')
+                    logger.info(f"本批上传 {len(bots)} 个机器人，成功 {uploaded} 个，失败 {failed} 个")
+            except Exception as e:
+                logger.error(f"处理IPFS上传队列失败: {str(e)}", exc_info=True)
+                bots = []
+
+            if options['once']:
+                break
+            # 队列未清空时立即处理下一批
+            if len(bots) < batch_size:
+                time.sleep(options['interval'])
@@ -0,0 +1,39 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from botmanagement.utils.publish import process_pending
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = '后台批量校验待确认的发布交易，达到确认数后将机器人状态更新为已发布'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='只处理一批后退出')
+        parser.add_argument('--batch-size', type=int, default=settings.PUBLISH_VERIFICATION_BATCH_SIZE)
+        parser.add_argument('--interval', type=float, default=settings.PUBLISH_VERIFICATION_INTERVAL)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        while True:
+            changed = 0
+            try:
+                verifications = process_pending(batch_size)
+                if verifications:
+                    confirmed = sum(1 for v in verifications if v.status == 'confirmed')
+                    failed = sum(1 for v in verifications if v.status == 'failed')
+                    changed = confirmed + failed
+                    logger.info(f"本批校验 {len(verifications)} 笔交易，确认 {confirmed} 笔，失败 {failed} 笔")
+            except Exception as e:
+                logger.error(f"校验发布交易失败: {str(e)}", exc_info=True)
+                verifications = []
+
+            if options['once']:
+                break
+            # 整批都有进展时立即处理下一批；交易都还在等待确认时，立即重查只会重复请求数据库和节点
+            if len(verifications) < batch_size or not changed:
+                time.sleep(options['interval'])
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.6 on 2026-10-18 08:58
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('botmanagement', '0008_botmanagement_contract_bot_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PublishVerification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transaction_hash', models.CharField(max_length=66)),
+                ('status', models.CharField(choices=[('pending', '确认中'), ('confirmed', '已确认'), ('failed', '确认失败')], default='pending', max_length=20)),
+                ('required_confirmations', models.IntegerField(default=1)),
+                ('confirmations', models.IntegerField(default=0)),
+                ('contract_bot_id', models.IntegerField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, default='')),
+                ('attempts', models.IntegerField(default=0)),
+                ('last_checked_at', models.DateTimeField(blank=True, null=True)),
+                ('queued_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('bot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='publish_verifications', to='botmanagement.botmanagement')),
+            ],
+            options={
+                'ordering': ['-queued_at'],
+                'indexes': [models.Index(fields=['status', 'last_checked_at'], name='publish_verif_queue_idx')],
+                'constraints': [models.UniqueConstraint(fields=('bot', 'transaction_hash'), name='unique_bot_publish_tx')],
+            },
+        ),
+    ]
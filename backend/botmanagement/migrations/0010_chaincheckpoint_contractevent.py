@@ -0,0 +1,42 @@
+# Generated by Django 5.1.6 on 2026-10-18 08:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('botmanagement', '0009_publishverification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChainCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('block_number', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ContractEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('contract', models.CharField(max_length=50)),
+                ('event', models.CharField(max_length=50)),
+                ('block_number', models.BigIntegerField()),
+                ('transaction_hash', models.CharField(max_length=66)),
+                ('log_index', models.IntegerField()),
+                ('contract_bot_id', models.BigIntegerField(blank=True, null=True)),
+                ('account', models.CharField(blank=True, max_length=42, null=True)),
+                ('args', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['block_number', 'log_index'],
+                'indexes': [models.Index(fields=['contract_bot_id', 'event', 'block_number'], name='contract_event_bot_idx'), models.Index(fields=['account', 'event', 'block_number'], name='contract_event_account_idx'), models.Index(fields=['block_number'], name='contract_event_block_idx')],
+                'constraints': [models.UniqueConstraint(fields=('transaction_hash', 'log_index'), name='unique_contract_event_log')],
+            },
+        ),
+    ]
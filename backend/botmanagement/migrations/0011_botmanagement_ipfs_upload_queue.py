@@ -0,0 +1,39 @@
+# Generated by Django 5.1.6 on 2026-10-18 09:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('botmanagement', '0010_chaincheckpoint_contractevent'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='botmanagement',
+            name='ipfs_attempts',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='botmanagement',
+            name='ipfs_error',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='botmanagement',
+            name='ipfs_next_attempt_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='botmanagement',
+            name='ipfs_queued_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='botmanagement',
+            index=models.Index(fields=['ipfs_status', 'ipfs_next_attempt_at'], name='bot_ipfs_queue_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.6 on 2026-10-18 09:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('botmanagement', '0011_botmanagement_ipfs_upload_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IPFSContent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cid', models.CharField(max_length=100, unique=True)),
+                ('size', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
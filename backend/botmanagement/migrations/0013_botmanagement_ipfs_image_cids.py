@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 09:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('botmanagement', '0012_ipfscontent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='botmanagement',
+            name='ipfs_image_cids',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 09:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('botmanagement', '0013_botmanagement_ipfs_image_cids'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='botmanagement',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.6 on 2026-10-18 09:21
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_published_at(apps, schema_editor):
+    """早期发布的机器人没有记录发布时间，用最后更新时间代替"""
+    BotManagement = apps.get_model('botmanagement', 'BotManagement')
+    BotManagement.objects.filter(status='published', published_at__isnull=True).update(published_at=F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('botmanagement', '0014_botmanagement_image_variants'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_published_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='botmanagement',
+            index=models.Index(fields=['status', '-published_at', '-id'], name='bot_published_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.6 on 2026-10-18 09:23
+
+from django.db import migrations, models
+
+from botmanagement.utils.wallets import developer_address
+
+
+def backfill_developer_address(apps, schema_editor):
+    """按用户资料中的钱包计算已有机器人的 developer_address，每个用户一次 UPDATE"""
+    BotManagement = apps.get_model('botmanagement', 'BotManagement')
+    UserProfile = apps.get_model('user', 'UserProfile')
+    user_ids = BotManagement.objects.values_list('user_id', flat=True).distinct()
+    profiles = UserProfile.objects.filter(user_id__in=user_ids).values_list('user_id', 'wallets')
+    for user_id, wallets in profiles.iterator():
+        BotManagement.objects.filter(user_id=user_id).update(developer_address=developer_address(wallets))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('botmanagement', '0015_published_keyset'),
+        ('user', '0004_userprofile_verification_code_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='botmanagement',
+            name='developer_address',
+            field=models.CharField(default='0x0000000000000000000000000000000000000000', max_length=42),
+        ),
+        migrations.RunPython(backfill_developer_address, migrations.RunPython.noop),
+    ]
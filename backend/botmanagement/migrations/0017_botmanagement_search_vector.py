@@ -0,0 +1,72 @@
+# Generated by Django 5.1.6 on 2026-10-18 09:27
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+SEARCH_INDEX = django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='bot_search_vector_idx')
+
+# 与 botmanagement.utils.search.SEARCH_CONFIG 一致
+CREATE_TRIGGER = """
+CREATE OR REPLACE FUNCTION botmanagement_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('simple', coalesce(NEW.name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(NEW.description, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER botmanagement_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, description, search_vector ON botmanagement_botmanagement
+    FOR EACH ROW EXECUTE FUNCTION botmanagement_search_vector_update();
+
+UPDATE botmanagement_botmanagement SET search_vector =
+    setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(description, '')), 'B');
+"""
+
+DROP_TRIGGER = """
+DROP TRIGGER IF EXISTS botmanagement_search_vector_trigger ON botmanagement_botmanagement;
+DROP FUNCTION IF EXISTS botmanagement_search_vector_update();
+"""
+
+
+def create_search_index(apps, schema_editor):
+    """GIN 索引和触发器只在 PostgreSQL 上创建，其他数据库只保留空列"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(CREATE_TRIGGER)
+    schema_editor.add_index(apps.get_model('botmanagement', 'BotManagement'), SEARCH_INDEX)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.remove_index(apps.get_model('botmanagement', 'BotManagement'), SEARCH_INDEX)
+    schema_editor.execute(DROP_TRIGGER)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('botmanagement', '0016_botmanagement_developer_address'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='botmanagement',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(model_name='botmanagement', index=SEARCH_INDEX),
+            ],
+            database_operations=[
+                migrations.RunPython(create_search_index, drop_search_index),
+            ],
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.6 on 2026-10-18 09:39
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('botmanagement', '0017_botmanagement_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='botmanagement',
+            index=models.Index(fields=['status', 'price'], name='bot_published_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='botmanagement',
+            index=models.Index(fields=['status', 'trial_time'], name='bot_published_trial_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='botmanagement',
+            index=models.Index(models.F('status'), django.db.models.functions.text.Lower('developer_address'), models.OrderBy(models.F('published_at'), descending=True), models.OrderBy(models.F('id'), descending=True), name='bot_published_developer_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 09:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('botmanagement', '0018_published_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='botmanagement',
+            name='ipfs_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=100, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 10:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('botmanagement', '0019_ipfs_hash_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='publishverification',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,8 +1,14 @@
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Lower
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth.models import User
 from django.core.validators import URLValidator
 from django.utils import timezone
 
+from .utils.wallets import ZERO_ADDRESS
+
 class BotManagement(models.Model):
     STATUS_CHOICES = (
         ('draft', '草稿'),
@@ -27,19 +33,130 @@ class BotManagement(models.Model):
     external_link = models.URLField(null=True, blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft')
     ipfs_status = models.CharField(max_length=20, choices=IPFS_STATUS_CHOICES, default='pending')
-    ipfs_hash = models.CharField(max_length=100, null=True, blank=True)
+    ipfs_hash = models.CharField(max_length=100, null=True, blank=True, db_index=True)
     ipfs_url = models.URLField(null=True, blank=True)
     ipfs_uploaded_at = models.DateTimeField(null=True, blank=True)
+    ipfs_queued_at = models.DateTimeField(null=True, blank=True)  # 进入上传队列的时间
+    ipfs_attempts = models.IntegerField(default=0)
+    ipfs_next_attempt_at = models.DateTimeField(null=True, blank=True)  # 重试或租约到期的时间
+    ipfs_error = models.TextField(blank=True, default='')
+    ipfs_image_cids = models.JSONField(default=dict, blank=True)  # 图片字段名 -> 已固定的 CID
+    image_variants = models.JSONField(default=dict, blank=True)  # 图片字段名 -> {缩略图名: 存储路径}
     is_ipfs_locked = models.BooleanField(default=False)
     contract_address = models.CharField(max_length=42, null=True, blank=True)
     contract_bot_id = models.IntegerField(null=True, blank=True)
     transaction_hash = models.CharField(max_length=66, null=True, blank=True)
     published_at = models.DateTimeField(null=True, blank=True)
+    # 开发者钱包地址，由 UserProfile.wallets 派生，见 signals.py
+    developer_address = models.CharField(max_length=42, default=ZERO_ADDRESS)
+    # 名称（权重 A）和描述（权重 B）的全文检索向量，由 PostgreSQL 触发器维护，见 0017 迁移
+    search_vector = SearchVectorField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['ipfs_status', 'ipfs_next_attempt_at'], name='bot_ipfs_queue_idx'),
+            # 已发布列表的游标分页
+            models.Index(fields=['status', '-published_at', '-id'], name='bot_published_keyset_idx'),
+            GinIndex(fields=['search_vector'], name='bot_search_vector_idx'),
+            # 已发布目录的筛选（见 filters.py），均以 status 开头
+            models.Index(fields=['status', 'price'], name='bot_published_price_idx'),
+            models.Index(fields=['status', 'trial_time'], name='bot_published_trial_idx'),
+            models.Index(
+                F('status'), Lower('developer_address'), F('published_at').desc(), F('id').desc(),
+                name='bot_published_developer_idx'
+            ),
+        ]
         
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
+
+class IPFSContent(models.Model):
+    """
+    已固定到 IPFS 的内容，按本地计算的 CID 去重
+    """
+    cid = models.CharField(max_length=100, unique=True)
+    size = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.cid
+
+class PublishVerification(models.Model):
+    """
+    待确认的发布交易，由后台任务批量校验
+    """
+    STATUS_CHOICES = (
+        ('pending', '确认中'),
+        ('confirmed', '已确认'),
+        ('failed', '确认失败'),
+    )
+
+    bot = models.ForeignKey(BotManagement, on_delete=models.CASCADE, related_name='publish_verifications')
+    transaction_hash = models.CharField(max_length=66)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    required_confirmations = models.IntegerField(default=1)
+    confirmations = models.IntegerField(default=0)
+    contract_bot_id = models.IntegerField(null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+    attempts = models.IntegerField(default=0)
+    last_checked_at = models.DateTimeField(null=True, blank=True)
+    lease_expires_at = models.DateTimeField(null=True, blank=True)  # 被后台任务取出后，在此之前不会被其他进程重复处理
+    queued_at = models.DateTimeField(default=timezone.now)  # 进入队列（或重新排队）的时间
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-queued_at']
+        constraints = [
+            models.UniqueConstraint(fields=['bot', 'transaction_hash'], name='unique_bot_publish_tx'),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'last_checked_at'], name='publish_verif_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.bot_id} - {self.transaction_hash} ({self.status})"
+
+
+class ChainCheckpoint(models.Model):
+    """
+    链上数据同步进度，记录已处理到的区块高度
+    """
+    name = models.CharField(max_length=50, unique=True)
+    block_number = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.block_number}"
+
+
+class ContractEvent(models.Model):
+    """
+    从链上同步的合约事件
+    """
+    contract = models.CharField(max_length=50)
+    event = models.CharField(max_length=50)
+    block_number = models.BigIntegerField()
+    transaction_hash = models.CharField(max_length=66)
+    log_index = models.IntegerField()
+    contract_bot_id = models.BigIntegerField(null=True, blank=True)
+    account = models.CharField(max_length=42, null=True, blank=True)  # subscriber 或 developer 地址（小写）
+    args = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['block_number', 'log_index']
+        constraints = [
+            models.UniqueConstraint(fields=['transaction_hash', 'log_index'], name='unique_contract_event_log'),
+        ]
+        indexes = [
+            models.Index(fields=['contract_bot_id', 'event', 'block_number'], name='contract_event_bot_idx'),
+            models.Index(fields=['account', 'event', 'block_number'], name='contract_event_account_idx'),
+            models.Index(fields=['block_number'], name='contract_event_block_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.event} @ {self.block_number}"
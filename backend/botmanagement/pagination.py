@@ -0,0 +1,167 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def _value(item, name):
+    # 查询集可以是模型实例，也可以是 values() 返回的 dict
+    return item[name] if isinstance(item, dict) else getattr(item, name)
+
+
+class KeysetPagination(BasePagination):
+    """
+    游标（keyset）分页基类
+
+    游标记录上一页最后一条的排序键，下一页直接从该位置继续，翻页代价与页码无关。
+    子类实现 order、cursor_values、parse_cursor 和 after_cursor
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def get_page_size(self, request):
+        page_size = settings.PUBLISHED_PAGE_SIZE
+        value = request.query_params.get(self.page_size_query_param)
+        if value:
+            try:
+                page_size = int(value)
+            except ValueError:
+                pass
+        return max(1, min(page_size, settings.PUBLISHED_MAX_PAGE_SIZE))
+
+    def order(self, queryset):
+        raise NotImplementedError
+
+    def cursor_values(self, item):
+        """游标中保存的排序键，需可以 JSON 序列化"""
+        raise NotImplementedError
+
+    def parse_cursor(self, values):
+        """还原 cursor_values，格式错误时抛出 ValueError/TypeError"""
+        raise NotImplementedError
+
+    def after_cursor(self, queryset, values):
+        """
+        排在游标之后的记录，返回按顺序依次读取的查询集列表
+
+        每个查询集的条件都应能作为索引的范围条件（不要只用 OR 组合），否则数据库会从头扫描到游标位置，
+        翻页代价又随页码增长
+        """
+        raise NotImplementedError
+
+    def encode_cursor(self, item):
+        data = json.dumps(self.cursor_values(item), separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            return self.parse_cursor(json.loads(data))
+        except (TypeError, ValueError):
+            raise NotFound('无效的分页游标')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        queryset = self.order(queryset)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        segments = self.after_cursor(queryset, self.decode_cursor(cursor)) if cursor else [queryset]
+
+        # 多取一条判断是否还有下一页
+        page = []
+        for segment in segments:
+            page += list(segment[:self.page_size + 1 - len(page)])
+            if len(page) > self.page_size:
+                break
+        self.has_next = len(page) > self.page_size
+        page = page[:self.page_size]
+        self.next_cursor = self.encode_cursor(page[-1]) if self.has_next else None
+        return page
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class PublishedKeysetPagination(KeysetPagination):
+    """
+    已发布机器人的游标分页
+
+    按 (published_at, id) 倒序，新发布的机器人只会出现在第一页之前，不会让后面的页重复或漏掉数据。
+    published_at 为空的历史数据排在最前（与 PostgreSQL 倒序索引的 NULLS FIRST 一致）
+    """
+
+    def order(self, queryset):
+        return queryset.order_by(F('published_at').desc(nulls_first=True), '-id')
+
+    def cursor_values(self, item):
+        published_at = _value(item, 'published_at')
+        return [published_at.isoformat() if published_at else None, _value(item, 'id')]
+
+    def parse_cursor(self, values):
+        published_at, pk = values
+        if published_at is not None:
+            published_at = parse_datetime(published_at)
+            if published_at is None:
+                raise ValueError(values)
+        return published_at, int(pk)
+
+    def after_cursor(self, queryset, values):
+        published_at, pk = values
+        if published_at is None:
+            # 先读完剩下的 published_at 为空的记录，再从第一条有发布时间的记录开始，两段都是索引上的范围
+            return [
+                queryset.filter(published_at__isnull=True, id__lt=pk),
+                queryset.filter(published_at__isnull=False),
+            ]
+        # published_at <= X 是索引上的范围起点，OR 只用来排除与游标同一时间且已经返回过的记录
+        return [
+            queryset.filter(published_at__lte=published_at).filter(
+                Q(published_at__lt=published_at) | Q(id__lt=pk)
+            )
+        ]
+
+
+class RankedKeysetPagination(KeysetPagination):
+    """按查询集上的 rank 注解倒序分页，相同 rank 按 id 倒序"""
+
+    def order(self, queryset):
+        return queryset.order_by('-rank', '-id')
+
+    def cursor_values(self, item):
+        return [_value(item, 'rank'), _value(item, 'id')]
+
+    def parse_cursor(self, values):
+        rank, pk = values
+        return float(rank), int(pk)
+
+    def after_cursor(self, queryset, values):
+        rank, pk = values
+        # rank <= R 先排除游标之前的记录，剩下需要排序的只有游标之后的
+        return [queryset.filter(rank__lte=rank).filter(Q(rank__lt=rank) | Q(id__lt=pk))]
@@ -1,8 +1,11 @@
 from rest_framework import serializers
-from .models import BotManagement
+from .models import BotManagement, ContractEvent, PublishVerification
+from .utils.images import variant_urls
 
 class BotManagementSerializer(serializers.ModelSerializer):
-    developer = serializers.SerializerMethodField()
+    # 主钱包地址，没有主钱包时为第一个钱包地址，没有钱包时为零地址
+    developer = serializers.CharField(source='developer_address', read_only=True)
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = BotManagement
@@ -16,10 +19,13 @@ class BotManagementSerializer(serializers.ModelSerializer):
             'image1',
             'image2',
             'image3',
+            'image_variants',
             'external_link',
             'created_at',
             'ipfs_hash',
             'ipfs_status',
+            'ipfs_error',
+            'ipfs_image_cids',
             'is_ipfs_locked',
             'developer',
             'contract_bot_id'
@@ -29,48 +35,15 @@ class BotManagementSerializer(serializers.ModelSerializer):
             'created_at',
             'ipfs_hash',
             'ipfs_status',
+            'ipfs_error',
+            'ipfs_image_cids',
             'is_ipfs_locked',
             'contract_bot_id'
         ]
 
-    def get_developer(self, obj):
-        """
-        获取开发者钱包地址
-        优先返回主钱包地址，如果没有主钱包则返回第一个钱包地址
-        如果没有任何钱包地址，返回零地址
-        """
-        if not hasattr(obj.user, 'profile'):
-            return '0x0000000000000000000000000000000000000000'
-        
-        try:
-            # 处理 wallets 为 None 的情况
-            if not obj.user.profile.wallets:
-                return '0x0000000000000000000000000000000000000000'
-                
-            import json
-            wallets = json.loads(obj.user.profile.wallets)
-            
-            # 如果没有钱包数据，返回零地址
-            if not wallets:
-                return '0x0000000000000000000000000000000000000000'
-            
-            # 优先查找主钱包地址
-            primary_wallet = None
-            for address, info in wallets.items():
-                if info.get('is_primary', False):
-                    primary_wallet = address
-                    break
-            
-            # 如果有主钱包，返回主钱包地址
-            if primary_wallet:
-                return primary_wallet if primary_wallet.startswith('0x') else f'0x{primary_wallet}'
-            
-            # 如果没有主钱包，返回第一个钱包地址
-            first_wallet = next(iter(wallets.keys()))
-            return first_wallet if first_wallet.startswith('0x') else f'0x{first_wallet}'
-            
-        except (json.JSONDecodeError, AttributeError, TypeError):
-            return '0x0000000000000000000000000000000000000000'
+    def get_image_variants(self, obj):
+        """各图片的 WebP 缩略图地址，列表页应优先使用 thumb"""
+        return variant_urls(obj, self.context.get('request'))
 
     def validate(self, data):
         """
@@ -129,4 +102,36 @@ class BotSerializer(serializers.ModelSerializer):
         if self.instance and self.instance.is_ipfs_locked:
             raise serializers.ValidationError("机器人信息已上传到IPFS，无法修改")
         
-        return data
\ No newline at end of file
+        return data
+
+class PublishVerificationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PublishVerification
+        fields = [
+            'transaction_hash',
+            'status',
+            'confirmations',
+            'required_confirmations',
+            'contract_bot_id',
+            'error',
+            'attempts',
+            'queued_at',
+            'last_checked_at'
+        ]
+        read_only_fields = fields
+
+
+class ContractEventSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ContractEvent
+        fields = [
+            'contract',
+            'event',
+            'block_number',
+            'transaction_hash',
+            'log_index',
+            'contract_bot_id',
+            'account',
+            'args'
+        ]
+        read_only_fields = fields
@@ -0,0 +1,47 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from user.models import UserProfile
+
+from .models import BotManagement
+from .utils import catalog_cache
+from .utils.wallets import ZERO_ADDRESS, developer_address
+
+
+@receiver(pre_save, sender=BotManagement)
+def fill_developer_address(sender, instance, raw=False, **kwargs):
+    """新建机器人时从开发者资料中取钱包地址"""
+    if raw or not instance._state.adding or instance.developer_address != ZERO_ADDRESS:
+        return
+    wallets = UserProfile.objects.filter(user_id=instance.user_id).values_list('wallets', flat=True).first()
+    instance.developer_address = developer_address(wallets)
+
+
+@receiver(post_save, sender=UserProfile)
+def sync_developer_address(sender, instance, raw=False, **kwargs):
+    """钱包变化时同步该用户所有机器人的 developer_address"""
+    if raw:
+        return
+    address = developer_address(instance.wallets)
+    updated = BotManagement.objects.filter(user_id=instance.user_id).exclude(developer_address=address).update(
+        developer_address=address
+    )
+    if updated:
+        catalog_cache.bump_on_commit()
+
+
+@receiver(post_delete, sender=UserProfile)
+def clear_developer_address(sender, instance, **kwargs):
+    updated = BotManagement.objects.filter(user_id=instance.user_id).exclude(developer_address=ZERO_ADDRESS).update(
+        developer_address=ZERO_ADDRESS
+    )
+    if updated:
+        catalog_cache.bump_on_commit()
+
+
+@receiver(post_save, sender=BotManagement)
+@receiver(post_delete, sender=BotManagement)
+def invalidate_catalog(sender, instance, raw=False, **kwargs):
+    """已发布机器人的变化会影响目录接口，未发布的机器人不在目录中"""
+    if not raw and instance.status == 'published':
+        catalog_cache.bump_on_commit()
@@ -1,13 +1,196 @@
 from django.test import TestCase
 from django.urls import reverse
 from rest_framework import status
-from rest_framework.test import APITestCase, APIClient
+from rest_framework.test import APIClient, APIRequestFactory, APITestCase
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
 from django.contrib.auth.models import User
 from user.models import UserProfile
-from .models import BotManagement
-from .utils.ipfs_utils import IPFSUploader
+from .models import BotManagement, PublishVerification
+from .utils.ipfs import (
+    InMemoryUploader, KuboUploader, MultipartStream, PinataUploader, canonical_json, compute_cid, get_uploader,
+    record_pinned,
+)
 from unittest.mock import patch, MagicMock
+from django.test import override_settings
+from .utils import catalog_cache, chain_head, contracts
+from .utils.search import search_published
+from .utils.catalog import CatalogRenderer
+from .pagination import PublishedKeysetPagination
+from .views import BotViewSet
+from .serializers import BotManagementSerializer
+from .utils.rpc import DEFAULT_RPC_SETTINGS, PooledHTTPProvider, RPCBatch, RPCBatchError, RPCStats
+from .utils.publish import (
+    claim_verifications, find_registered_bot_id, process_pending, request_verification,
+)
+from .utils.events import EventDecoder
+from .utils.fake_chain import FakeChain, FakeRPCServer
+from .utils.ipfs_cache import IPFSContentCache, IPFSFetchError, reset as reset_ipfs_cache
+from .utils.images import generate_variants, shutdown as shutdown_image_executor
+from .utils.ipfs_upload import lease_seconds, process_pending_uploads, upload_bots, upload_metrics
+from eth_utils import keccak
+from .utils.indexer import EventIndexer
+from .utils.receipts import ReceiptCache, receipt_cache
+from .utils.multicall import bot_details_cache
+from eth_abi import decode as abi_decode
+from .models import ChainCheckpoint, ContractEvent
+from eth_abi import encode as abi_encode
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import MemoryFileUploadHandler
+from django.http.multipartparser import MultiPartParser
+from hexbytes import HexBytes
+from web3 import Web3
+from web3.datastructures import AttributeDict
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from PIL import Image
+from datetime import timedelta
+from django.utils import timezone
+from django.apps import apps as django_apps
+from django.db import connection
+from unittest import skipUnless
+import importlib
 import io
+import json
+import os
+import tempfile
+
+# 测试用的 NewRegistry ABI 片段
+REGISTRY_ABI = [
+    {
+        'type': 'function',
+        'name': 'getBotDetails',
+        'stateMutability': 'view',
+        'inputs': [{'name': '_botId', 'type': 'uint256'}],
+        'outputs': [
+            {'name': 'ipfsHash', 'type': 'string'},
+            {'name': 'price', 'type': 'uint96'},
+            {'name': 'trialTime', 'type': 'uint32'},
+            {'name': 'name', 'type': 'string'},
+            {'name': 'developer', 'type': 'address'},
+            {'name': 'isActive', 'type': 'bool'},
+            {'name': 'exists', 'type': 'bool'},
+        ],
+    },
+    {
+        'type': 'event',
+        'name': 'BotRegistered',
+        'anonymous': False,
+        'inputs': [
+            {'name': 'botId', 'type': 'uint256', 'indexed': True},
+            {'name': 'developer', 'type': 'address', 'indexed': True},
+            {'name': 'ipfsHash', 'type': 'string', 'indexed': False},
+        ],
+    },
+    {
+        'type': 'event',
+        'name': 'BotStatusChanged',
+        'anonymous': False,
+        'inputs': [
+            {'name': 'botId', 'type': 'uint256', 'indexed': True},
+            {'name': 'isActive', 'type': 'bool', 'indexed': False},
+        ],
+    },
+]
+
+# 测试用的 NewSubscription / NewBotPayment 事件 ABI
+SUBSCRIPTION_ABI = [
+    {
+        'type': 'event',
+        'name': 'SubscriptionCreated',
+        'anonymous': False,
+        'inputs': [
+            {'name': 'botId', 'type': 'uint256', 'indexed': True},
+            {'name': 'subscriber', 'type': 'address', 'indexed': True},
+            {'name': 'startTime', 'type': 'uint32', 'indexed': False},
+            {'name': 'endTime', 'type': 'uint32', 'indexed': False},
+            {'name': 'trialEndTime', 'type': 'uint32', 'indexed': False},
+            {'name': 'currency', 'type': 'string', 'indexed': False},
+            {'name': 'status', 'type': 'uint8', 'indexed': False},
+        ],
+    },
+    {
+        'type': 'event',
+        'name': 'SubscriptionCancelled',
+        'anonymous': False,
+        'inputs': [
+            {'name': 'botId', 'type': 'uint256', 'indexed': True},
+            {'name': 'subscriber', 'type': 'address', 'indexed': True},
+        ],
+    },
+    {
+        'type': 'event',
+        'name': 'SubscriptionStatusChanged',
+        'anonymous': False,
+        'inputs': [
+            {'name': 'botId', 'type': 'uint256', 'indexed': True},
+            {'name': 'subscriber', 'type': 'address', 'indexed': True},
+            {'name': 'oldStatus', 'type': 'uint8', 'indexed': False},
+            {'name': 'newStatus', 'type': 'uint8', 'indexed': False},
+        ],
+    },
+]
+
+PAYMENT_ABI = [
+    {
+        'type': 'event',
+        'name': 'PaymentProcessed',
+        'anonymous': False,
+        'inputs': [
+            {'name': 'botId', 'type': 'uint256', 'indexed': True},
+            {'name': 'subscriber', 'type': 'address', 'indexed': True},
+            {'name': 'developer', 'type': 'address', 'indexed': True},
+            {'name': 'token', 'type': 'address', 'indexed': False},
+            {'name': 'amount', 'type': 'uint96', 'indexed': False},
+            {'name': 'platformFee', 'type': 'uint96', 'indexed': False},
+        ],
+    },
+]
+
+
+BOT_REGISTERED_TOPIC = keccak(text='BotRegistered(uint256,address,string)')
+
+
+def use_test_abis(test_case):
+    """为测试写入 ABI 缓存文件并重置合约注册表"""
+    tmpdir = tempfile.TemporaryDirectory()
+    test_case.addCleanup(tmpdir.cleanup)
+    cache_path = os.path.join(tmpdir.name, 'abi_cache.json')
+    with open(cache_path, 'w') as f:
+        json.dump({'NewRegistry': REGISTRY_ABI, 'NewSubscription': SUBSCRIPTION_ABI, 'NewBotPayment': PAYMENT_ABI}, f)
+    overrides = override_settings(CONTRACT_ABI_CACHE_PATH=cache_path)
+    overrides.enable()
+    test_case.addCleanup(overrides.disable)
+    contracts.reset()
+    test_case.addCleanup(contracts.reset)
+
+# 测试使用进程内缓存，不读写运行中的服务共用的缓存目录（最新区块、目录版本）
+TEST_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'botmanagement-tests'},
+}
+
+
+def isolated_caches(cls):
+    """类装饰器：替换 shared 缓存，IPFS 内容缓存写入临时目录，测试结束后清理"""
+    setup_class = cls.setUpClass.__func__
+
+    @classmethod
+    def setUpClass(klass):
+        tmpdir = tempfile.TemporaryDirectory()
+        overrides = override_settings(CACHES=TEST_CACHES, IPFS_CACHE={**settings.IPFS_CACHE, 'DIRECTORY': tmpdir.name})
+        overrides.enable()
+        reset_ipfs_cache()
+        klass.addClassCleanup(tmpdir.cleanup)
+        klass.addClassCleanup(overrides.disable)
+        klass.addClassCleanup(reset_ipfs_cache)
+        setup_class(klass)
+
+    cls.setUpClass = setUpClass
+    return cls
+
 
 class BotViewSetTest(APITestCase):
     def setUp(self):
@@ -157,3 +340,1257 @@ class BotViewSetTest(APITestCase):
         # 尝试访问API
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ContractRegistryTest(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.artifacts_dir = os.path.join(self.tmpdir.name, 'artifacts')
+        self.cache_path = os.path.join(self.tmpdir.name, 'abi_cache.json')
+        os.makedirs(os.path.join(self.artifacts_dir, 'NewRegistry.sol'))
+        with open(os.path.join(self.artifacts_dir, 'NewRegistry.sol', 'NewRegistry.json'), 'w') as f:
+            json.dump({'contractName': 'NewRegistry', 'abi': REGISTRY_ABI, 'bytecode': '0x6080'}, f)
+
+        overrides = override_settings(
+            CONTRACT_ARTIFACTS_DIR=self.artifacts_dir,
+            CONTRACT_ABI_CACHE_PATH=self.cache_path,
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        contracts.reset()
+        self.addCleanup(contracts.reset)
+
+    def test_abi_loaded_on_first_use_and_cached(self):
+        self.assertFalse(os.path.exists(self.cache_path))
+
+        self.assertEqual(contracts.get_abi('NewRegistry'), REGISTRY_ABI)
+
+        # 缓存文件只保留 abi 字段
+        with open(self.cache_path) as f:
+            self.assertEqual(json.load(f), {'NewRegistry': REGISTRY_ABI})
+
+    def test_contract_memoized_per_address(self):
+        first = contracts.get_contract('NewRegistry')
+        self.assertIs(contracts.get_contract('NewRegistry'), first)
+
+        other = contracts.get_contract('NewRegistry', '0x0000000000000000000000000000000000000001')
+        self.assertIsNot(other, first)
+
+
+class PooledHTTPProviderTest(TestCase):
+    def test_shared_session_timeouts_and_stats(self):
+        session = MagicMock()
+        session.post.return_value.content = b'{"jsonrpc": "2.0", "id": 0, "result": "0x10"}'
+        stats = RPCStats()
+        config = dict(DEFAULT_RPC_SETTINGS, METHOD_TIMEOUTS={'eth_getLogs': 30})
+        w3 = Web3(PooledHTTPProvider('http://rpc.test', config=config, session=session, stats=stats))
+
+        self.assertEqual(w3.eth.block_number, 16)
+        self.assertEqual(w3.eth.block_number, 16)
+
+        self.assertEqual(session.post.call_count, 2)
+        self.assertEqual(session.post.call_args.kwargs['timeout'], (3, 10))
+        self.assertEqual(w3.provider.get_timeout('eth_getLogs'), (3, 30))
+        self.assertEqual(stats.snapshot()['eth_blockNumber']['count'], 2)
+        self.assertEqual(stats.snapshot()['eth_blockNumber']['errors'], 0)
+
+
+class RPCBatchTest(TestCase):
+    def setUp(self):
+        self.session = MagicMock()
+        self.w3 = Web3(PooledHTTPProvider('http://rpc.test', session=self.session, stats=RPCStats()))
+
+    def test_reads_sent_as_one_batch_with_typed_results(self):
+        self.session.post.return_value.content = json.dumps([
+            {'jsonrpc': '2.0', 'id': 1, 'result': '0x20'},
+            {'jsonrpc': '2.0', 'id': 0, 'result': {
+                'transactionHash': '0x' + 'aa' * 32,
+                'transactionIndex': '0x0',
+                'blockHash': '0x' + 'bb' * 32,
+                'blockNumber': '0x1e',
+                'status': '0x1',
+                'logs': [],
+            }},
+            {'jsonrpc': '2.0', 'id': 2, 'result': None},
+        ]).encode()
+
+        batch = RPCBatch(self.w3)
+        batch.get_transaction_receipt('0x' + 'aa' * 32)
+        batch.block_number()
+        batch.get_transaction_receipt('0x' + 'cc' * 32)
+        receipt, block_number, pending = batch.execute()
+
+        self.assertEqual(self.session.post.call_count, 1)
+        self.assertEqual(len(json.loads(self.session.post.call_args.kwargs['data'])), 3)
+        self.assertEqual(receipt.blockNumber, 30)
+        self.assertEqual(receipt.status, 1)
+        self.assertEqual(block_number, 32)
+        self.assertIsNone(pending)
+
+    def test_item_errors(self):
+        self.session.post.return_value.content = json.dumps([
+            {'jsonrpc': '2.0', 'id': 0, 'error': {'code': -32000, 'message': 'boom'}},
+        ]).encode()
+
+        batch = RPCBatch(self.w3)
+        batch.block_number()
+        self.assertIsInstance(batch.execute(raise_on_error=False)[0], RPCBatchError)
+
+    def test_missing_results_fail_the_batch(self):
+        self.session.post.return_value.content = json.dumps([
+            {'jsonrpc': '2.0', 'id': 0, 'result': '0x20'},
+        ]).encode()
+
+        batch = RPCBatch(self.w3)
+        batch.block_number()
+        batch.block_number()
+        results = batch.execute(raise_on_error=False)
+        self.assertEqual(len(results), 2)
+        self.assertTrue(all(isinstance(result, RPCBatchError) for result in results))
+
+        batch.block_number()
+        batch.block_number()
+        with self.assertRaises(RPCBatchError):
+            batch.execute()
+
+
+    def test_null_id_errors_fail_the_batch(self):
+        self.session.post.return_value.content = json.dumps([
+            {'jsonrpc': '2.0', 'id': 1, 'result': '0x20'},
+            {'jsonrpc': '2.0', 'id': None, 'error': {'code': -32600, 'message': 'Invalid Request'}},
+        ]).encode()
+
+        batch = RPCBatch(self.w3)
+        batch.block_number()
+        batch.block_number()
+        results = batch.execute(raise_on_error=False)
+        self.assertTrue(all(isinstance(result, RPCBatchError) for result in results))
+        self.assertIn('Invalid Request', str(results[0]))
+
+
+@isolated_caches
+class PublishVerificationTest(APITestCase):
+    def setUp(self):
+        use_test_abis(self)
+        self.user = User.objects.create_user(username='dev', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.bot = BotManagement.objects.create(
+            user=self.user,
+            name='机器人',
+            description='描述',
+            price='1.00',
+            trial_time=1,
+            ipfs_status='uploaded',
+            ipfs_hash='QmTestHash'
+        )
+        self.tx_hash = '0x' + 'ab' * 32
+        receipt_cache.clear()
+        chain_head.clear()
+
+    def _receipt(self, block_number, bot_id):
+        return AttributeDict({
+            'status': 1,
+            'blockNumber': block_number,
+            'logs': [AttributeDict({
+                'address': settings.BOT_REGISTRY_CONTRACT_ADDRESS,
+                'topics': [
+                    HexBytes(BOT_REGISTERED_TOPIC),
+                    HexBytes(bot_id.to_bytes(32, 'big')),
+                    HexBytes(b'\x00' * 32),
+                ],
+                'data': HexBytes(abi_encode(['string'], ['QmTestHash'])),
+            })],
+        })
+
+    def test_confirm_publish_queues_verification(self):
+        url = reverse('bot-confirm-publish', kwargs={'pk': self.bot.pk})
+        response = self.client.post(url, {'transactionHash': self.tx_hash}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], 'pending')
+        self.assertTrue(PublishVerification.objects.filter(bot=self.bot, status='pending').exists())
+
+        response = self.client.get(reverse('bot-publish-status', kwargs={'pk': self.bot.pk}))
+        self.assertEqual(response.data['status'], 'pending')
+
+    @override_settings(PUBLISH_REQUIRED_CONFIRMATIONS=1)
+    @patch('botmanagement.utils.publish.get_contract')
+    def test_worker_publishes_after_required_confirmations(self, mock_get_contract):
+        self.client.post(
+            reverse('bot-confirm-publish', kwargs={'pk': self.bot.pk}),
+            {'transactionHash': self.tx_hash},
+            format='json'
+        )
+        mock_batch = MagicMock()
+        mock_batch.return_value.execute.side_effect = [
+            [self._receipt(10, 7)],
+            # 第二次收据命中缓存，区块号来自共享缓存，不发起请求
+            [],
+            [('QmTestHash', 1000000, 24, '机器人', '0x' + '11' * 20, True, True)],
+        ]
+        for target in ('botmanagement.utils.publish.RPCBatch', 'botmanagement.utils.receipts.RPCBatch'):
+            patcher = patch(target, mock_batch)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        # 确认数不足时保持 pending
+        chain_head.publish_head(10)
+        process_pending()
+        self.bot.refresh_from_db()
+        self.assertEqual(self.bot.status, 'draft')
+
+        chain_head.publish_head(11)
+        process_pending()
+        self.bot.refresh_from_db()
+        self.assertEqual(self.bot.status, 'published')
+        self.assertEqual(self.bot.contract_bot_id, 7)
+        self.assertEqual(self.bot.transaction_hash, self.tx_hash)
+
+        response = self.client.get(reverse('bot-publish-status', kwargs={'pk': self.bot.pk}))
+        self.assertEqual(response.data['status'], 'success')
+
+    @patch('botmanagement.utils.publish.fetch_receipts', return_value=([None], 10))
+    def test_claimed_verifications_are_leased(self, mock_fetch):
+        request_verification(self.bot, self.tx_hash)
+        claimed = claim_verifications(10)
+        self.assertEqual(len(claimed), 1)
+        # 租约期间（RPC 请求在事务之外进行）其他进程不会重复取出
+        self.assertEqual(claim_verifications(10), [])
+        self.assertIsNotNone(PublishVerification.objects.get(pk=claimed[0].pk).lease_expires_at)
+
+        self.assertEqual(process_pending(), [])
+
+        # 租约过期（取出它的进程已退出）后重新校验，写回结果时释放租约
+        PublishVerification.objects.update(lease_expires_at=timezone.now())
+        self.assertEqual(len(process_pending()), 1)
+        verification = PublishVerification.objects.get(pk=claimed[0].pk)
+        self.assertEqual((verification.status, verification.attempts), ('pending', 1))
+        self.assertIsNone(verification.lease_expires_at)
+        self.assertEqual(len(claim_verifications(10)), 1)
+
+
+@isolated_caches
+class EventIndexerTest(TestCase):
+    def setUp(self):
+        use_test_abis(self)
+        self.w3 = MagicMock()
+        self.developer = '0x' + '11' * 20
+        chain_head.clear()
+
+    def _bot_registered_log(self, block_number, bot_id):
+        return {
+            'address': settings.BOT_REGISTRY_CONTRACT_ADDRESS,
+            'topics': [
+                HexBytes(BOT_REGISTERED_TOPIC),
+                HexBytes(bot_id.to_bytes(32, 'big')),
+                HexBytes(bytes(12) + bytes.fromhex(self.developer[2:])),
+            ],
+            'data': HexBytes(abi_encode(['string'], ['QmHash'])),
+            'blockNumber': block_number,
+            'blockHash': HexBytes(b'\x01' * 32),
+            'transactionHash': HexBytes(bot_id.to_bytes(32, 'big')),
+            'transactionIndex': 0,
+            'logIndex': 0,
+        }
+
+    @override_settings(CHAIN_INDEXER_START_BLOCK=100)
+    def test_indexes_in_chunks_and_saves_checkpoint(self):
+        self.w3.eth.get_block.return_value = AttributeDict({'number': 130, 'timestamp': 1700000000})
+        self.w3.eth.get_logs.side_effect = lambda params: [
+            self._bot_registered_log(block, block)
+            for block in (105, 112)
+            if params['fromBlock'] <= block <= params['toBlock']
+        ]
+
+        indexer = EventIndexer(w3=self.w3, chunk_size=10, confirmations=5)
+        count, block_number = indexer.run_once()
+
+        self.assertEqual((count, block_number), (2, 125))
+        self.assertEqual(self.w3.eth.get_logs.call_count, 3)
+        self.assertEqual(ChainCheckpoint.objects.get(name='contract_events').block_number, 125)
+        event = ContractEvent.objects.get(contract_bot_id=105)
+        self.assertEqual(event.event, 'BotRegistered')
+        self.assertEqual(event.account, self.developer)
+        self.assertEqual(event.args['ipfsHash'], 'QmHash')
+
+        # 再次运行时从进度继续，不会重复写入；最新区块由跟随进程写入共享缓存
+        chain_head.publish_head(131)
+        self.assertEqual(indexer.run_once(), (0, 126))
+        self.assertEqual(ContractEvent.objects.count(), 2)
+
+        # 补录较早的区间不会让进度后退；与进度不相连的区间不推进进度
+        self.assertEqual(indexer.run_once(from_block=100, to_block=110), (1, 110))
+        self.assertEqual(indexer.run_once(from_block=200, to_block=205), (0, 205))
+        self.assertEqual(ChainCheckpoint.objects.get(name='contract_events').block_number, 126)
+
+
+class ReceiptCacheTest(TestCase):
+    def _receipt(self, block_number):
+        return AttributeDict({'blockNumber': block_number, 'status': 1, 'logs': []})
+
+    @patch('botmanagement.utils.receipts.time.monotonic')
+    def test_final_receipts_never_expire_and_pending_ones_do(self, mock_monotonic):
+        mock_monotonic.return_value = 100.0
+        cache = ReceiptCache(max_entries=10, finality_depth=10, pending_ttl=5)
+        cache.put('0xAA', self._receipt(100), head=120)
+        cache.put('0xbb', self._receipt(115), head=120)
+
+        mock_monotonic.return_value = 1000.0
+        self.assertIsNotNone(cache.get('0xaa'))
+        self.assertIsNone(cache.get('0xbb'))
+        self.assertEqual(cache.stats(), {'size': 1, 'final': 1, 'hits': 1, 'misses': 1, 'evictions': 1})
+
+    def test_lru_eviction_and_promotion(self):
+        cache = ReceiptCache(max_entries=2, finality_depth=10, pending_ttl=60)
+        cache.put('0x01', self._receipt(1), head=100)
+        cache.put('0x02', self._receipt(95), head=100)
+        cache.promote('0x02', head=105)
+        cache.get('0x01')
+        cache.put('0x03', self._receipt(2), head=100)
+
+        self.assertIsNone(cache.get('0x02'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+        self.assertEqual(cache.stats()['final'], 2)
+
+
+@isolated_caches
+class ChainHeadTest(TestCase):
+    def setUp(self):
+        chain_head.clear()
+        self.w3 = MagicMock()
+        self.w3.eth.get_block.return_value = AttributeDict({'number': 200, 'timestamp': 1700000000})
+
+    def test_reads_shared_head_without_rpc(self):
+        chain_head.publish_head(150, 1690000000)
+        head = chain_head.get_chain_head(w3=self.w3)
+        self.assertEqual((head.number, head.timestamp), (150, 1690000000))
+        self.w3.eth.get_block.assert_not_called()
+
+    @patch('botmanagement.utils.chain_head.time.time')
+    def test_stale_head_falls_back_to_rpc(self, mock_time):
+        mock_time.return_value = 1000.0
+        chain_head.publish_head(150)
+        mock_time.return_value = 1010.0
+
+        self.assertIsNone(chain_head.read_head(max_staleness=5))
+        self.assertEqual(chain_head.get_block_number(max_staleness=5, w3=self.w3), 200)
+        self.w3.eth.get_block.assert_called_once_with('latest')
+        # 回退查询的结果会写回共享缓存
+        self.assertEqual(chain_head.read_head(max_staleness=5).number, 200)
+
+
+class FakeRPCSession:
+    """按 JSON-RPC 方法返回预设结果的假 requests.Session"""
+
+    def __init__(self, handlers):
+        self.handlers = handlers
+        self.requests = []
+
+    def post(self, url, data=None, **kwargs):
+        payload = json.loads(data)
+        self.requests.append(payload)
+        items = payload if isinstance(payload, list) else [payload]
+        results = [
+            {'jsonrpc': '2.0', 'id': item['id'], 'result': self.handlers[item['method']](item['params'])}
+            for item in items
+        ]
+        response = MagicMock()
+        response.content = json.dumps(results if isinstance(payload, list) else results[0]).encode()
+        return response
+
+    def close(self):
+        pass
+
+
+@isolated_caches
+class OnchainCatalogTest(APITestCase):
+    def setUp(self):
+        use_test_abis(self)
+        bot_details_cache.clear()
+        chain_head.clear()
+        user = User.objects.create_user(username='dev', password='testpass123')
+        for bot_id in (3, 4):
+            BotManagement.objects.create(
+                user=user, name=f'bot{bot_id}', description='描述', price='1.00',
+                status='published', contract_bot_id=bot_id
+            )
+        BotManagement.objects.create(user=user, name='legacy', description='描述', price='1.00', status='published')
+
+        self.session = FakeRPCSession({
+            'eth_getBlockByNumber': lambda params: {
+                'number': '0x64', 'hash': '0x' + '01' * 32, 'parentHash': '0x' + '02' * 32, 'timestamp': '0x6553f100',
+            },
+            'eth_call': self._aggregate3,
+        })
+        patcher = patch('botmanagement.utils.rpc.build_session', return_value=self.session)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _aggregate3(self, params):
+        call_data = bytes.fromhex(params[0]['data'][10:])
+        (calls,) = abi_decode(['(address,bool,bytes)[]'], call_data)
+        results = []
+        for _, _, inner in calls:
+            (bot_id,) = abi_decode(['uint256'], inner[4:])
+            details = abi_encode(
+                ['string', 'uint96', 'uint32', 'string', 'address', 'bool', 'bool'],
+                ['Qm', 1000000, 24, f'bot{bot_id}', '0x' + '11' * 20, bot_id == 3, True]
+            )
+            results.append((True, details))
+        return '0x' + abi_encode(['(bool,bytes)[]'], [results]).hex()
+
+    def test_onchain_status_fetched_in_one_call_and_cached_per_block(self):
+        url = reverse('bot-published') + '?onchain=1'
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        onchain = {item['name']: item['onchain'] for item in response.data['results']}
+        self.assertTrue(onchain['bot3']['is_active'])
+        self.assertFalse(onchain['bot4']['is_active'])
+        self.assertEqual(onchain['bot3']['block_number'], 100)
+        self.assertIsNone(onchain['legacy'])
+        eth_calls = [item for payload in self.session.requests for item in (payload if isinstance(payload, list) else [payload]) if item['method'] == 'eth_call']
+        self.assertEqual(len(eth_calls), 1)
+
+        # 同一区块内再次请求不会重复 eth_call，区块号直接读取共享缓存
+        self.client.get(url)
+        methods = [payload['method'] for payload in self.session.requests if isinstance(payload, dict)]
+        self.assertEqual(methods, ['eth_getBlockByNumber'])
+        self.assertEqual(len([p for p in self.session.requests if isinstance(p, list)]), 1)
+
+
+@isolated_caches
+class PublishedPaginationTest(APITestCase):
+    def setUp(self):
+        catalog_cache.bump_version()
+        self.user = User.objects.create_user(username='dev', password='testpass123')
+        self.url = reverse('bot-published')
+        now = timezone.now()
+        # 两个机器人发布时间相同，按 id 区分先后
+        times = [now - timedelta(minutes=m) for m in (5, 4, 3, 3, 1)]
+        self.bots = [self._publish(f'bot{i}', published_at) for i, published_at in enumerate(times)]
+        self.legacy = self._publish('legacy', None)
+        BotManagement.objects.create(user=self.user, name='draft', description='描述', price='1.00')
+
+    def _publish(self, name, published_at):
+        return BotManagement.objects.create(
+            user=self.user, name=name, description='描述', price='1.00', status='published', published_at=published_at
+        )
+
+    def _names(self, response):
+        return [item['name'] for item in response.json()['results']]
+
+    def test_pages_follow_publish_order_without_gaps(self):
+        names = []
+        url = self.url + '?page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.json()['results']), 2)
+            names += self._names(response)
+            url = response.json()['next']
+            if len(names) == 2:
+                # 翻页期间新发布的机器人不影响后续页
+                with self.captureOnCommitCallbacks(execute=True):
+                    self._publish('new', timezone.now())
+
+        self.assertEqual(names, ['legacy', 'bot4', 'bot3', 'bot2', 'bot1', 'bot0'])
+        self.assertEqual(self._names(self.client.get(self.url))[:2], ['legacy', 'new'])
+
+    @override_settings(PUBLISHED_PAGE_SIZE=3, PUBLISHED_MAX_PAGE_SIZE=4)
+    def test_page_size_is_configurable_and_capped(self):
+        self.assertEqual(len(self.client.get(self.url).json()['results']), 3)
+        self.assertEqual(len(self.client.get(self.url + '?page_size=50').json()['results']), 4)
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(self.url + '?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_is_an_index_range(self):
+        paginator = PublishedKeysetPagination()
+        bots = paginator.order(BotManagement.objects.filter(status='published'))
+        segments = paginator.after_cursor(bots, (timezone.now(), 5)) + paginator.after_cursor(bots, (None, 5))
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            # 游标条件必须是索引上的范围，而不是扫描到游标位置后再过滤
+            for segment in segments:
+                plan = segment[:21].explain()
+                if connection.vendor == 'postgresql':
+                    self.assertRegex(plan, r'Index Cond: .*published_at')
+                else:
+                    self.assertRegex(plan, r'USING INDEX bot_published_keyset_idx \(status=\? AND published_at')
+
+    @override_settings(STREAMING_BUFFER_SIZE=64)
+    def test_all_streams_every_published_bot(self):
+        response = self.client.get(self.url + '?all=1')
+
+        self.assertTrue(response.streaming)
+        chunks = list(response.streaming_content)
+        # 缓冲区很小时分多块输出，拼接后仍是完整的 JSON 数组
+        self.assertGreater(len(chunks), 1)
+        names = [item['name'] for item in json.loads(b''.join(chunks))]
+        self.assertEqual(names, ['legacy', 'bot4', 'bot3', 'bot2', 'bot1', 'bot0'])
+
+        etag = response['ETag']
+        self.assertEqual(self.client.get(self.url + '?all=1', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+@isolated_caches
+class PublishedFilterTest(APITestCase):
+    def setUp(self):
+        catalog_cache.bump_version()
+        self.url = reverse('bot-published')
+        self.address = '0x' + 'Ab' * 20
+        developer = User.objects.create_user(username='dev')
+        UserProfile.objects.create(user=developer, role='developer', wallets=json.dumps({self.address: True}))
+        other = User.objects.create_user(username='other')
+        now = timezone.now()
+        for name, user, price, trial_time, days in [
+            ('cheap', developer, '1.00', 0, 1),
+            ('trial', developer, '5.00', 1, 10),
+            ('pricey', other, '20.00', 7, 3),
+        ]:
+            BotManagement.objects.create(
+                user=user, name=name, description='描述', price=price, trial_time=trial_time, status='published',
+                published_at=now - timedelta(days=days)
+            )
+        BotManagement.objects.create(user=developer, name='draft', description='描述', price='1.00')
+
+    def _names(self, params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['name'] for item in response.json()['results']]
+
+    def test_filters_combine(self):
+        since = (timezone.now() - timedelta(days=5)).isoformat()
+        self.assertEqual(self._names({'price_min': '2', 'price_max': '20'}), ['pricey', 'trial'])
+        self.assertEqual(self._names({'trial_days_min': '1'}), ['pricey', 'trial'])
+        self.assertEqual(self._names({'trial_days_min': '1', 'trial_days_max': '3'}), ['trial'])
+        self.assertEqual(self._names({'developer': self.address.lower()}), ['cheap', 'trial'])
+        self.assertEqual(self._names({'developer': self.address, 'trial_days_min': '1'}), ['trial'])
+        self.assertEqual(self._names({'published_after': since}), ['cheap', 'pricey'])
+        self.assertEqual(self._names({'published_before': since, 'price_max': '10'}), ['trial'])
+
+    def test_invalid_values_are_rejected(self):
+        response = self.client.get(self.url, {'price_min': 'abc', 'developer': '0x123', 'published_after': 'x'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(response.json()), {'price_min', 'developer', 'published_after'})
+
+    @skipUnless(connection.vendor == 'postgresql', '执行计划检查需要 PostgreSQL')
+    def test_filter_combinations_use_indexes(self):
+        # 每种条件约命中 1% 的行，收集统计信息后由规划器按真实代价选择执行计划
+        owner = User.objects.get(username='other')
+        now = timezone.now()
+        BotManagement.objects.bulk_create([
+            BotManagement(
+                user=owner, name=f'bot{i}', description='描述', price=i % 1000, trial_time=i % 100,
+                status='published', developer_address=f'0x{i % 100:040x}', published_at=now - timedelta(hours=i),
+            )
+            for i in range(10000)
+        ], batch_size=1000)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE botmanagement_botmanagement')
+        params = {
+            'price_min': '100', 'price_max': '109', 'trial_days_min': '99', 'developer': f'0x{42:040x}',
+            'published_after': (now - timedelta(hours=5100)).isoformat(),
+            'published_before': (now - timedelta(hours=5000)).isoformat(),
+        }
+        # 筛选条件 -> 预期使用的索引
+        facets = [
+            (['price_min', 'price_max'], 'bot_published_price_idx'),
+            (['trial_days_min'], 'bot_published_trial_idx'),
+            (['developer'], 'bot_published_developer_idx'),
+            (['published_after', 'published_before'], 'bot_published_keyset_idx'),
+        ]
+        view = BotViewSet()
+        for mask in range(1 << len(facets)):
+            selected = [facet for i, facet in enumerate(facets) if mask & (1 << i)]
+            names = [name for facet_names, _ in selected for name in facet_names]
+            request = Request(APIRequestFactory().get(self.url, {name: params[name] for name in names}))
+            plan = PublishedKeysetPagination().order(view._published_bots(request))[:21].explain()
+            # 不筛选时按游标索引顺序读取；组合条件时至少使用其中一个条件的索引
+            indexes = [index for _, index in selected] or ['bot_published_keyset_idx']
+            with self.subTest(filters=names):
+                self.assertNotIn('Seq Scan on botmanagement_botmanagement', plan)
+                self.assertTrue(any(index in plan for index in indexes), plan)
+
+
+@isolated_caches
+class DeveloperAddressTest(APITestCase):
+    def setUp(self):
+        catalog_cache.bump_version()
+        self.user = User.objects.create_user(username='dev', password='testpass123')
+        self.wallet = '0x' + 'ab' * 20
+        self.profile = UserProfile.objects.create(user=self.user, role='developer', wallets=json.dumps({self.wallet: True}))
+
+    def _bot(self, name='bot'):
+        return BotManagement.objects.create(
+            user=self.user, name=name, description='描述', price='1.00', status='published', published_at=timezone.now()
+        )
+
+    def test_address_follows_profile_wallets(self):
+        bot = self._bot()
+        self.assertEqual(bot.developer_address, self.wallet)
+
+        primary = 'cd' * 20
+        self.profile.wallets = json.dumps({self.wallet: {}, primary: {'is_primary': True}})
+        self.profile.save()
+        bot.refresh_from_db()
+        self.assertEqual(bot.developer_address, f'0x{primary}')
+
+        self.profile.delete()
+        bot.refresh_from_db()
+        self.assertEqual(bot.developer_address, '0x' + '00' * 20)
+
+    def test_catalog_serializes_without_profile_queries(self):
+        for i in range(3):
+            self._bot(f'bot{i}')
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('bot-published'))
+        self.assertEqual({item['developer'] for item in response.json()['results']}, {self.wallet})
+
+    def test_migration_backfills_existing_bots(self):
+        bot = self._bot()
+        BotManagement.objects.filter(pk=bot.pk).update(developer_address='0x' + '00' * 20)
+        migration = importlib.import_module('botmanagement.migrations.0016_botmanagement_developer_address')
+
+        migration.backfill_developer_address(django_apps, None)
+
+        bot.refresh_from_db()
+        self.assertEqual(bot.developer_address, self.wallet)
+
+
+@isolated_caches
+class CatalogCacheTest(APITestCase):
+    def setUp(self):
+        catalog_cache.bump_version()
+        self.user = User.objects.create_user(username='dev', password='testpass123')
+        self.bot = BotManagement.objects.create(
+            user=self.user, name='机器人', description='描述', price='1.00', status='published', published_at=timezone.now()
+        )
+        self.urls = [reverse('bot-published'), reverse('bot-get-published-bot', kwargs={'pk': self.bot.pk})]
+
+    def test_repeat_requests_skip_database(self):
+        for url in self.urls:
+            first = self.client.get(url)
+            self.assertEqual(first.status_code, status.HTTP_200_OK)
+            etag = first['ETag']
+
+            with self.assertNumQueries(0):
+                cached = self.client.get(url)
+                not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(cached.content, first.content)
+            self.assertEqual(cached['ETag'], etag)
+            self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(not_modified.content, b'')
+
+    def test_saving_published_bot_invalidates(self):
+        etags = [self.client.get(url)['ETag'] for url in self.urls]
+
+        # 未发布的机器人不影响目录
+        with self.captureOnCommitCallbacks(execute=True):
+            BotManagement.objects.create(user=self.user, name='draft', description='描述', price='1.00')
+        self.assertEqual([self.client.get(url)['ETag'] for url in self.urls], etags)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bot.name = '新名字'
+            self.bot.save()
+        for url, etag in zip(self.urls, etags):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotEqual(response['ETag'], etag)
+            self.assertIn('新名字', response.content.decode())
+
+    def test_cache_key_ignores_param_order_and_skips_unknown_params(self):
+        url = self.urls[0]
+        etag = self.client.get(url, {'page_size': '5', 'price_min': '1'})['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(f'{url}?price_min=1&page_size=5&price_max=')
+        self.assertEqual(response['ETag'], etag)
+
+        # 未知参数不产生新的缓存条目，也不返回 ETag
+        with patch('botmanagement.views.catalog_cache.set_content') as mock_set_content:
+            for i in range(3):
+                response = self.client.get(url, {'x': i})
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertFalse(response.has_header('ETag'))
+            response = self.client.get(f'{url}?page_size=5&page_size=6')
+            self.assertFalse(response.has_header('ETag'))
+        mock_set_content.assert_not_called()
+
+    def test_missing_bot_is_not_cached(self):
+        url = reverse('bot-get-published-bot', kwargs={'pk': self.bot.pk + 100})
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(self.client.get(url).has_header('ETag'))
+
+
+@isolated_caches
+class SearchTest(APITestCase):
+    def setUp(self):
+        catalog_cache.bump_version()
+        self.user = User.objects.create_user(username='dev', password='testpass123')
+        self.url = reverse('bot-search')
+        self.bots = {
+            name: BotManagement.objects.create(
+                user=self.user, name=name, description=description, price='1.00',
+                status='published', published_at=timezone.now()
+            )
+            for name, description in (
+                ('Alpha trader', 'momentum strategy'),
+                ('Grid bot', 'works well with alpha signals'),
+                ('Arbitrage', 'cross exchange'),
+            )
+        }
+        BotManagement.objects.create(user=self.user, name='Alpha draft', description='草稿', price='1.00')
+
+    def _names(self, response):
+        return [item['name'] for item in response.json()['results']]
+
+    def test_search_matches_published_name_and_description(self):
+        response = self.client.get(self.url, {'q': 'alpha'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(self._names(response)), {'Alpha trader', 'Grid bot'})
+        self.assertEqual(self.client.get(self.url, {'q': 'nothing'}).json()['results'], [])
+
+    def test_query_is_required(self):
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {'q': 'x' * 201}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    @skipUnless(connection.vendor == 'postgresql', '全文检索需要 PostgreSQL')
+    def test_ranked_pages_use_gin_index(self):
+        # 名称命中（权重 A）排在描述命中（权重 B）之前
+        names = []
+        url = self.url + '?q=alpha&page_size=1'
+        while url:
+            response = self.client.get(url)
+            names += self._names(response)
+            url = response.json()['next']
+        self.assertEqual(names, ['Alpha trader', 'Grid bot'])
+
+        # 触发器在更新名称时重建检索向量
+        bot = self.bots['Arbitrage']
+        bot.name = 'Alpha arbitrage'
+        bot.save()
+        self.assertIn(bot, search_published('alpha'))
+
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            plan = search_published('alpha').explain()
+        self.assertIn('bot_search_vector_idx', plan)
+
+
+class CatalogRendererTest(APITestCase):
+    def test_projection_matches_serializer(self):
+        user = User.objects.create_user(username='dev')
+        UserProfile.objects.create(user=user, role='developer', wallets=json.dumps({'0x' + 'ab' * 20: True}))
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            BotManagement.objects.create(
+                user=user, name='图片 机器人', description='描述', price='12.5', trial_time=3, status='published',
+                image1=SimpleUploadedFile('a b.png', b'png', content_type='image/png'),
+                image_variants={'image1': {'thumb': 'bot_images/variants/x_thumb.webp'}},
+                ipfs_image_cids={'image1': 'QmImage'}, external_link='https://example.com', contract_bot_id=7,
+            )
+            BotManagement.objects.create(user=user, name='空', description='', price='0.10', status='published')
+            request = Request(APIRequestFactory().get('/api/bots/published/', {'page_size': 5}))
+            bots = BotManagement.objects.order_by('id')
+
+            expected = BotManagementSerializer(bots, many=True, context={'request': request}).data
+            renderer = CatalogRenderer(request)
+            rows = renderer.rows(renderer.queryset(bots))
+
+        self.assertEqual(json.loads(CatalogRenderer.render(rows)), json.loads(JSONRenderer().render(expected)))
+        self.assertEqual(list(rows[0]), list(expected[0]))
+
+
+class EventDecoderTest(TestCase):
+    def setUp(self):
+        self.registry = '0x' + 'aa' * 20
+        self.payment = '0x' + 'bb' * 20
+        self.decoder = EventDecoder(
+            {'NewRegistry': REGISTRY_ABI, 'NewBotPayment': PAYMENT_ABI},
+            {'NewRegistry': self.registry, 'NewBotPayment': self.payment},
+        )
+
+    def _log(self, address, topics, data=b''):
+        return {'address': address, 'topics': [HexBytes(topic) for topic in topics], 'data': HexBytes(data)}
+
+    def test_decodes_indexed_and_data_fields(self):
+        subscriber, developer, token = '0x' + '01' * 20, '0x' + '02' * 20, '0x' + '03' * 20
+        log = self._log(
+            Web3.to_checksum_address(self.payment),
+            [
+                keccak(text='PaymentProcessed(uint256,address,address,address,uint96,uint96)'),
+                (9).to_bytes(32, 'big'),
+                bytes(12) + bytes.fromhex(subscriber[2:]),
+                bytes(12) + bytes.fromhex(developer[2:]),
+            ],
+            abi_encode(['address', 'uint96', 'uint96'], [token, 5000000, 100]),
+        )
+
+        event = self.decoder.decode_log(log)
+
+        self.assertEqual((event.contract, event.event), ('NewBotPayment', 'PaymentProcessed'))
+        self.assertEqual(event.args['botId'], 9)
+        self.assertEqual(event.args['subscriber'], Web3.to_checksum_address(subscriber))
+        self.assertEqual(event.args['token'], Web3.to_checksum_address(token))
+        self.assertEqual(event.args['amount'], 5000000)
+
+    def test_find_skips_unknown_logs_and_foreign_addresses(self):
+        registered = [BOT_REGISTERED_TOPIC, (42).to_bytes(32, 'big'), bytes(32)]
+        data = abi_encode(['string'], ['QmHash'])
+        logs = [self._log(self.registry, [keccak(text='Transfer(address,address,uint256)')]) for _ in range(300)]
+        # 其他地址发出的同名事件不会被匹配
+        logs.append(self._log('0x' + 'cc' * 20, registered, data))
+        logs.append(self._log(self.registry, registered, data))
+
+        event = self.decoder.find({'logs': logs}, 'BotRegistered', contract='NewRegistry')
+
+        self.assertEqual(event.args['botId'], 42)
+        self.assertEqual(event.args['ipfsHash'], 'QmHash')
+        self.assertIsNone(self.decoder.find({'logs': logs[:-1]}, 'BotRegistered'))
+
+
+class FakeChainTest(TestCase):
+    def setUp(self):
+        use_test_abis(self)
+        self.chain = FakeChain(settings.BOT_REGISTRY_CONTRACT_ADDRESS, settings.MULTICALL3_ADDRESS, head=500)
+        self.bot_id, self.tx_hash = self.chain.register_bot('QmFake', '0x' + '22' * 20, name='fake')
+
+    def test_serves_receipts_and_bot_details_over_http(self):
+        with FakeRPCServer(self.chain) as server:
+            w3 = Web3(PooledHTTPProvider(server.url, stats=RPCStats()))
+            batch = RPCBatch(w3)
+            batch.get_transaction_receipt(self.tx_hash)
+            batch.block_number()
+            batch.call(contracts.get_contract('NewRegistry'), 'getBotDetails', [self.bot_id])
+            receipt, head, details = batch.execute()
+
+        self.assertEqual(head, 500)
+        self.assertEqual(find_registered_bot_id(receipt), self.bot_id)
+        self.assertEqual(details[0], 'QmFake')
+        self.assertTrue(details[6])
+        # 一次批量请求只算一个 HTTP 请求
+        self.assertEqual(server.requests, 1)
+
+    def test_injected_errors(self):
+        with FakeRPCServer(self.chain, error_rate=1.0) as server:
+            w3 = Web3(PooledHTTPProvider(server.url, stats=RPCStats()))
+            with self.assertRaises(Exception):
+                w3.eth.block_number
+        self.assertEqual(server.errors, 1)
+
+
+@isolated_caches
+class IPFSUploadQueueTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='dev', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.bot = BotManagement.objects.create(
+            user=self.user, name='机器人', description='描述', price='1.50', trial_time=1
+        )
+        self.url = reverse('bot-upload-to-ipfs', kwargs={'pk': self.bot.pk})
+
+    @patch('botmanagement.utils.ipfs_upload.get_uploader')
+    def test_upload_is_queued_and_processed_by_worker(self, mock_uploader):
+        response = self.client.post(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.bot.refresh_from_db()
+        self.assertEqual(self.bot.ipfs_status, 'uploading')
+        mock_uploader.assert_not_called()
+        self.assertEqual(upload_metrics()['queue_depth'], 1)
+
+        mock_uploader.return_value.pin_content.return_value = {
+            'success': True, 'cid': 'QmQueued', 'url': 'https://gateway.pinata.cloud/ipfs/QmQueued'
+        }
+        process_pending_uploads()
+
+        self.bot.refresh_from_db()
+        self.assertEqual(self.bot.ipfs_status, 'uploaded')
+        self.assertEqual(self.bot.ipfs_hash, 'QmQueued')
+        self.assertTrue(self.bot.is_ipfs_locked)
+        self.assertIsNotNone(self.bot.ipfs_uploaded_at)
+        content = mock_uploader.return_value.pin_content.call_args[0][0]
+        self.assertEqual(json.loads(content), {
+            'name': '机器人', 'description': '描述', 'price': '1500000', 'trial_time': 1, 'created_by': self.user.id
+        })
+        metrics = upload_metrics()
+        self.assertEqual((metrics['queue_depth'], metrics['uploaded'], metrics['failure_rate']), (0, 1, 0.0))
+
+    @override_settings(IPFS_UPLOAD_MAX_ATTEMPTS=2, IPFS_UPLOAD_RETRY_BACKOFF=0)
+    @patch('botmanagement.utils.ipfs_upload.get_uploader')
+    def test_failed_uploads_are_retried_then_marked_failed(self, mock_uploader):
+        mock_uploader.return_value.pin_content.return_value = {'success': False, 'error': 'Pinata API错误: 503'}
+        self.client.post(self.url)
+
+        process_pending_uploads()
+        self.bot.refresh_from_db()
+        self.assertEqual((self.bot.ipfs_status, self.bot.ipfs_attempts), ('uploading', 1))
+
+        process_pending_uploads()
+        self.bot.refresh_from_db()
+        self.assertEqual((self.bot.ipfs_status, self.bot.ipfs_attempts), ('failed', 2))
+        self.assertIn('503', self.bot.ipfs_error)
+        self.assertEqual(upload_metrics()['failure_rate'], 1.0)
+
+        # 失败后可以重新排队
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.bot.refresh_from_db()
+        self.assertEqual((self.bot.ipfs_status, self.bot.ipfs_attempts), ('uploading', 0))
+
+    def test_bot_cannot_be_edited_while_uploading(self):
+        self.client.post(self.url)
+
+        response = self.client.patch(reverse('bot-detail', kwargs={'pk': self.bot.pk}), {'name': '新名称'})
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.bot.refresh_from_db()
+        self.assertEqual(self.bot.name, '机器人')
+
+    @override_settings(IPFS_UPLOAD_LEASE=None, IPFS_UPLOAD_TIMEOUT=(5, 30), IPFS_UPLOAD_LEASE_MARGIN=60)
+    def test_lease_covers_worst_case_batch(self):
+        # 20 个机器人各有元数据和 3 张图片，4 个线程分 20 轮，每轮最多 35 秒
+        self.assertEqual(lease_seconds(20, 4), 20 * 35 + 60)
+        with override_settings(IPFS_UPLOAD_LEASE=30):
+            self.assertEqual(lease_seconds(20, 4), 30)
+
+    @patch('botmanagement.utils.ipfs_upload.get_uploader')
+    def test_bulk_upload_pins_concurrently_and_reports_per_bot(self, mock_uploader):
+        bots = [self.bot] + [
+            BotManagement.objects.create(user=self.user, name=name, description='描述', price='1.00')
+            for name in ('bad', 'ok')
+        ]
+        locked = BotManagement.objects.create(
+            user=self.user, name='locked', description='描述', price='1.00', is_ipfs_locked=True, ipfs_status='uploaded'
+        )
+        other = BotManagement.objects.create(
+            user=User.objects.create_user(username='other'), name='other', description='描述', price='1.00'
+        )
+
+        def upload(content, cid):
+            name = json.loads(content)['name']
+            if name == 'bad':
+                return {'success': False, 'error': 'Pinata API错误: 500'}
+            return {'success': True, 'cid': cid, 'url': f"https://gateway.pinata.cloud/ipfs/{cid}"}
+        mock_uploader.return_value.pin_content.side_effect = upload
+
+        bot_ids = [bot.id for bot in bots] + [locked.id, other.id]
+        response = self.client.post(reverse('bot-bulk-upload-to-ipfs'), {'bot_ids': bot_ids}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['uploaded'], response.data['failed']), (2, 3))
+        results = {result['id']: result for result in response.data['results']}
+        self.assertEqual([result['id'] for result in response.data['results']], bot_ids)
+        self.assertTrue(results[bots[2].id]['success'])
+        self.assertFalse(results[bots[1].id]['success'])
+        self.assertIn('无法重复上传', results[locked.id]['error'])
+        self.assertEqual(results[other.id]['error'], '机器人不存在')
+        # 所有上传共享一个上传器和连接池
+        self.assertEqual(mock_uploader.call_count, 1)
+
+        statuses = dict(BotManagement.objects.filter(id__in=bot_ids).values_list('name', 'ipfs_status'))
+        self.assertEqual(statuses['ok'], 'uploaded')
+        # 失败的转入后台队列重试
+        self.assertEqual(statuses['bad'], 'uploading')
+        self.assertEqual(statuses['other'], 'pending')
+        self.assertTrue(BotManagement.objects.get(name='ok').is_ipfs_locked)
+
+    def test_bulk_upload_rejects_non_integer_ids(self):
+        url = reverse('bot-bulk-upload-to-ipfs')
+        for bot_id in (True, 1.9, ' 7 ', '1e3', None):
+            response = self.client.post(url, {'bot_ids': [self.bot.id, bot_id]}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, bot_id)
+        self.bot.refresh_from_db()
+        self.assertEqual(self.bot.ipfs_status, 'pending')
+
+
+@isolated_caches
+class IPFSContentTest(TestCase):
+    def _response(self, cid):
+        response = MagicMock(status_code=200)
+        response.json.return_value = {'IpfsHash': cid}
+        return response
+
+    def test_compute_cid_matches_ipfs_add(self):
+        # echo "hello world" | ipfs add
+        self.assertEqual(compute_cid(b'hello world\n'), 'QmT78zSuBmuS4z925WZfrqQ1qHaJ56DQaTfyMUF7F8ff5o')
+        self.assertEqual(canonical_json({'b': 1, 'a': '机器人'}), '{"a":"机器人","b":1}'.encode())
+
+    def test_repeat_upload_uses_local_cid_table(self):
+        bot_data = {'name': '机器人', 'price': '1000000'}
+        cid = compute_cid(canonical_json(bot_data))
+        session = MagicMock()
+        session.post.return_value = self._response(cid)
+        uploader = PinataUploader(session=session)
+
+        first = uploader.upload_bot_data(bot_data)
+        second = uploader.upload_bot_data({'price': '1000000', 'name': '机器人'})
+
+        self.assertEqual((first['cid'], first['cached']), (cid, False))
+        self.assertEqual((second['cid'], second['cached']), (cid, True))
+        self.assertEqual(session.post.call_count, 1)
+        body = session.post.call_args.kwargs['data'].read()
+        self.assertIn(b'\r\n\r\n' + canonical_json(bot_data) + b'\r\n--', body)
+
+    def test_mismatched_cid_is_rejected(self):
+        session = MagicMock()
+        session.post.return_value = self._response('QmSomethingElse')
+        result = PinataUploader(session=session).upload_bot_data({'name': 'x'})
+
+        self.assertFalse(result['success'])
+        self.assertIn('CID校验失败', result['error'])
+
+    def test_multipart_stream_reads_file_in_chunks(self):
+        fileobj = io.BytesIO(b'x' * 1000)
+        fileobj.read = MagicMock(side_effect=fileobj.read)
+        body = MultipartStream({'pinataOptions': '{"cidVersion":0}'}, 'a.png', fileobj, 1000, 'image/png', chunk_size=256)
+
+        data = b''
+        while True:
+            chunk = body.read(100)
+            if not chunk:
+                break
+            data += chunk
+
+        self.assertEqual(len(data), len(body))
+        self.assertEqual(fileobj.read.call_count, 5)
+        self.assertTrue(all(call.args == (256,) for call in fileobj.read.call_args_list))
+        post, files = MultiPartParser(
+            {'CONTENT_TYPE': body.content_type, 'CONTENT_LENGTH': len(data)}, io.BytesIO(data), [MemoryFileUploadHandler()]
+        ).parse()
+        self.assertEqual(post['pinataOptions'], '{"cidVersion":0}')
+        self.assertEqual(files['file'].read(), b'x' * 1000)
+
+    def test_image_cids_are_embedded_in_metadata(self):
+        user = User.objects.create_user(username='dev')
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            bot = BotManagement.objects.create(
+                user=user, name='图片机器人', description='描述', price='1.00',
+                image1=SimpleUploadedFile('a.png', b'png-data', content_type='image/png'),
+                image3=SimpleUploadedFile('c.png', b'other-png', content_type='image/png'),
+            )
+            uploader = MagicMock()
+            uploader.pin_file.side_effect = lambda field_file, cid: {'success': True, 'cid': cid, 'url': ''}
+            uploader.pin_content.side_effect = lambda content, cid: {'success': True, 'cid': cid, 'url': ''}
+
+            results = upload_bots([bot], uploader=uploader)
+
+        self.assertTrue(results[0]['success'])
+        self.assertEqual(uploader.pin_file.call_count, 2)
+        self.assertEqual(bot.ipfs_image_cids, {'image1': compute_cid(b'png-data'), 'image3': compute_cid(b'other-png')})
+        metadata = json.loads(uploader.pin_content.call_args[0][0])
+        self.assertEqual(metadata['images'], [f"ipfs://{compute_cid(b'png-data')}", f"ipfs://{compute_cid(b'other-png')}"])
+
+
+@isolated_caches
+class IPFSBackendTest(TestCase):
+    def setUp(self):
+        InMemoryUploader.clear()
+        self.addCleanup(InMemoryUploader.clear)
+
+    def test_backend_is_selected_by_setting(self):
+        for backend, uploader_class in (('pinata', PinataUploader), ('kubo', KuboUploader), ('memory', InMemoryUploader)):
+            with override_settings(IPFS_BACKEND=backend):
+                self.assertIsInstance(get_uploader(session=MagicMock()), uploader_class)
+        with override_settings(IPFS_BACKEND='botmanagement.utils.ipfs.InMemoryUploader'):
+            self.assertIsInstance(get_uploader(), InMemoryUploader)
+
+    @override_settings(IPFS_NODE_URL='http://ipfs-node:5001/', IPFS_GATEWAY_URL='http://ipfs-node:8080')
+    def test_kubo_adds_with_cidv0_and_verifies_hash(self):
+        content = canonical_json({'name': '机器人'})
+        cid = compute_cid(content)
+        session = MagicMock()
+        session.post.return_value = MagicMock(status_code=200)
+        session.post.return_value.json.return_value = {'Name': 'bot.json', 'Hash': cid, 'Size': '60'}
+
+        result = KuboUploader(session=session).pin_content(content, cid)
+
+        self.assertEqual(result, {'success': True, 'cid': cid, 'url': f'http://ipfs-node:8080/ipfs/{cid}'})
+        args, kwargs = session.post.call_args
+        self.assertEqual(args[0], 'http://ipfs-node:5001/api/v0/add')
+        self.assertEqual((kwargs['params']['pin'], kwargs['params']['cid-version']), ('true', '0'))
+        self.assertIn(content, kwargs['data'].read())
+
+        session.post.return_value.status_code = 500
+        session.post.return_value.text = '{"Message":"pin failed"}'
+        result = KuboUploader(session=session).pin_content(content, cid)
+        self.assertFalse(result['success'])
+        self.assertIn('Kubo API错误: 500', result['error'])
+
+    @override_settings(IPFS_BACKEND='memory')
+    def test_memory_backend_pins_images_and_metadata(self):
+        user = User.objects.create_user(username='dev')
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            bot = BotManagement.objects.create(
+                user=user, name='机器人', description='描述', price='1.00',
+                image1=SimpleUploadedFile('a.png', b'png-data', content_type='image/png'),
+            )
+            result = upload_bots([bot])[0]
+
+        self.assertTrue(result['success'])
+        self.assertEqual(InMemoryUploader.get(compute_cid(b'png-data')), b'png-data')
+        self.assertEqual(json.loads(InMemoryUploader.get(result['cid']))['name'], '机器人')
+        self.assertEqual(compute_cid(InMemoryUploader.get(result['cid'])), result['cid'])
+
+
+@isolated_caches
+class IPFSContentCacheTest(APITestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.content = canonical_json({'name': '机器人'})
+        self.cid = compute_cid(self.content)
+        self.session = MagicMock()
+        self.session.get.return_value.iter_content.return_value = [self.content]
+        self.cache = IPFSContentCache({'DIRECTORY': self.tmpdir.name, 'MEMORY_ENTRIES': 1}, session=self.session)
+
+    def test_read_through_memory_then_disk(self):
+        self.assertEqual(self.cache.get(self.cid), self.content)
+        self.assertEqual(self.cache.get(self.cid), self.content)
+        self.assertEqual(self.session.get.call_count, 1)
+
+        # 进程内缓存清空后从磁盘读取，仍不访问网关
+        other = IPFSContentCache({'DIRECTORY': self.tmpdir.name}, session=self.session)
+        self.assertEqual(other.get(self.cid), self.content)
+        self.assertEqual(self.session.get.call_count, 1)
+        self.assertEqual(other.stats()['disk_hits'], 1)
+
+    def test_rejects_content_not_matching_cid(self):
+        self.session.get.return_value.iter_content.return_value = [b'{"name":"tampered"}']
+        with self.assertRaises(IPFSFetchError):
+            self.cache.get(self.cid)
+        with self.assertRaises(ValueError):
+            self.cache.get('../etc/passwd')
+
+    def test_disk_store_is_size_bounded(self):
+        cache = IPFSContentCache({'DIRECTORY': self.tmpdir.name, 'MAX_DISK_BYTES': 100}, session=self.session)
+        for i in range(5):
+            content = canonical_json({'i': i, 'padding': 'x' * 20})
+            cache.put(compute_cid(content), content)
+        self.assertLessEqual(cache.stats()['disk_bytes'], 100)
+
+    def test_endpoint_serves_immutable_content(self):
+        record_pinned([(self.cid, len(self.content))])
+        with patch('botmanagement.views.get_ipfs_cache', return_value=self.cache):
+            url = reverse('ipfs-content', kwargs={'cid': self.cid})
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.content, self.content)
+            self.assertEqual(response['Content-Type'], 'application/json')
+            self.assertIn('immutable', response['Cache-Control'])
+
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(self.session.get.call_count, 1)
+
+    def test_unverifiable_content_is_not_cached(self):
+        # 超过一个分块的内容无法在本地计算 CID
+        content = b'x' * (300 * 1024)
+        cid = compute_cid(b'large')
+        record_pinned([(cid, len(content))])
+        self.session.get.return_value.iter_content.return_value = [content]
+        with patch('botmanagement.views.get_ipfs_cache', return_value=self.cache):
+            for _ in range(2):
+                response = self.client.get(reverse('ipfs-content', kwargs={'cid': cid}))
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response.content, content)
+                self.assertNotIn('immutable', response['Cache-Control'])
+                self.assertFalse(response.has_header('ETag'))
+        self.assertEqual(self.session.get.call_count, 2)
+        self.assertEqual(os.listdir(self.tmpdir.name), [])
+
+    def test_endpoint_only_serves_known_cids(self):
+        user = User.objects.create_user(username='dev')
+        image_cid = compute_cid(b'image')
+        BotManagement.objects.create(
+            user=user, name='bot', description='描述', price='1.00', ipfs_hash=self.cid,
+            ipfs_image_cids={'image2': image_cid}
+        )
+        unknown = compute_cid(b'unknown')
+        self.session.get.return_value.iter_content.side_effect = lambda *args, **kwargs: [
+            self.content if self.session.get.call_args[0][0].endswith(self.cid) else b'image'
+        ]
+        with patch('botmanagement.views.get_ipfs_cache', return_value=self.cache):
+            for cid in (self.cid, image_cid):
+                response = self.client.get(reverse('ipfs-content', kwargs={'cid': cid}))
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+            response = self.client.get(reverse('ipfs-content', kwargs={'cid': unknown}))
+        # 未知的 CID 不访问网关
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.session.get.call_count, 2)
+
+
+class ImageVariantTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='dev', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(shutdown_image_executor)
+
+    def _png(self, size):
+        out = io.BytesIO()
+        Image.new('RGB', size, (200, 30, 30)).save(out, 'PNG')
+        return SimpleUploadedFile('big.png', out.getvalue(), content_type='image/png')
+
+    def test_create_generates_webp_variants(self):
+        response = self.client.post(
+            reverse('bot-list'),
+            {'name': '机器人', 'description': '描述', 'price': '1.00', 'trial_time': 1, 'image': self._png((1200, 800))},
+            format='multipart'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        urls = response.data['image_variants']['image1']
+        self.assertTrue(urls['thumb'].startswith('http://testserver/'))
+        bot = BotManagement.objects.get(pk=response.data['id'])
+        sizes = {}
+        for name, path in bot.image_variants['image1'].items():
+            self.assertTrue(path.endswith(f'_{name}.webp'))
+            with default_storage.open(path) as f, Image.open(f) as image:
+                sizes[name] = (image.format, image.size)
+        self.assertEqual(sizes, {'thumb': ('WEBP', (160, 107)), 'medium': ('WEBP', (640, 427))})
+
+    @patch('botmanagement.utils.images.get_executor')
+    def test_variant_failures_do_not_fail_saved_bot(self, mock_get_executor):
+        mock_get_executor.return_value.submit.side_effect = BrokenProcessPool('进程池已损坏')
+        data = {'name': '机器人', 'description': '描述', 'price': '1.00', 'image': self._png((300, 300))}
+        with self.assertLogs('botmanagement.views', 'ERROR'):
+            response = self.client.post(reverse('bot-list'), data, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['image_variants'], {})
+
+        url = reverse('bot-detail', kwargs={'pk': response.data['id']})
+        with patch('django.core.files.storage.FileSystemStorage.open', side_effect=OSError('存储不可用')), \
+                self.assertLogs('botmanagement.views', 'ERROR'):
+            response = self.client.patch(url, {'image': self._png((200, 200))}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_identical_images_share_variants_and_bad_images_are_skipped(self):
+        bots = [
+            BotManagement.objects.create(
+                user=self.user, name=f'bot{i}', description='描述', price='1.00', image1=self._png((300, 300))
+            )
+            for i in range(2)
+        ]
+        bad = BotManagement.objects.create(
+            user=self.user, name='bad', description='描述', price='1.00',
+            image1=SimpleUploadedFile('bad.png', b'not an image', content_type='image/png')
+        )
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            variants = [generate_variants(bot, executor=executor) for bot in bots]
+            self.assertEqual(generate_variants(bad, executor=executor), {})
+
+        self.assertEqual(variants[0], variants[1])
+        bots[0].refresh_from_db()
+        self.assertEqual(bots[0].image_variants, variants[0])
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import BotViewSet
+from .views import BotViewSet, IPFSContentView, MetricsView
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,4 +14,6 @@ for url in router.urls:
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
+    path('ipfs/<str:cid>/', IPFSContentView.as_view(), name='ipfs-content'),
 ]
\ No newline at end of file
@@ -0,0 +1,59 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+CATALOG_VERSION_KEY = 'catalog:version'
+
+
+def _config():
+    return getattr(settings, 'CATALOG_CACHE', {})
+
+
+def _cache():
+    return caches[_config().get('CACHE_ALIAS', 'default')]
+
+
+def _new_version():
+    # 随机版本号：并发失效时不会像自增那样得到同一个值，版本键被淘汰后也不会与旧版本重复
+    return uuid.uuid4().hex[:12]
+
+
+def get_version():
+    """当前目录版本，所有进程共享"""
+    cache = _cache()
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        version = _new_version()
+        if not cache.add(CATALOG_VERSION_KEY, version, timeout=None):
+            version = cache.get(CATALOG_VERSION_KEY) or version
+    return version
+
+
+def bump_version():
+    """使所有已缓存的目录响应失效"""
+    _cache().set(CATALOG_VERSION_KEY, _new_version(), timeout=None)
+
+
+def bump_on_commit():
+    """在事务提交后失效，避免其他请求在提交前按新版本缓存旧数据"""
+    transaction.on_commit(bump_version)
+
+
+def _hash(key):
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+def make_etag(version, key):
+    """ETag 只由版本号和请求决定，校验 If-None-Match 不需要读取缓存内容或数据库"""
+    return f'"{version}-{_hash(key)}"'
+
+
+def get_content(version, key):
+    return _cache().get(f'catalog:{version}:{_hash(key)}')
+
+
+def set_content(version, key, content):
+    _cache().set(f'catalog:{version}:{_hash(key)}', content, timeout=_config().get('TIMEOUT', 300))
@@ -0,0 +1,71 @@
+import time
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .rpc import get_web3
+
+CHAIN_HEAD_CACHE_KEY = 'chain_head'
+
+
+class ChainHead(NamedTuple):
+    number: int
+    timestamp: Optional[int]
+    observed_at: float
+
+    @property
+    def age(self):
+        return time.time() - self.observed_at
+
+
+def _config():
+    return getattr(settings, 'CHAIN_HEAD', {})
+
+
+def _cache():
+    return caches[_config().get('CACHE_ALIAS', 'default')]
+
+
+def publish_head(number, timestamp=None):
+    """写入最新区块，同一节点上的所有进程共享"""
+    head = ChainHead(number, timestamp, time.time())
+    _cache().set(CHAIN_HEAD_CACHE_KEY, tuple(head), timeout=None)
+    return head
+
+
+def read_head(max_staleness=None):
+    """
+    读取共享的最新区块，不发起 RPC 请求
+
+    Returns:
+        ChainHead: 不存在或超过 max_staleness 秒未更新时返回 None
+    """
+    if max_staleness is None:
+        max_staleness = _config().get('MAX_STALENESS', 4)
+    value = _cache().get(CHAIN_HEAD_CACHE_KEY)
+    if value is None:
+        return None
+    head = ChainHead(*value)
+    if head.age > max_staleness:
+        return None
+    return head
+
+
+def fetch_head(w3=None):
+    """直接从节点读取最新区块并写入共享缓存"""
+    block = (w3 or get_web3()).eth.get_block('latest')
+    return publish_head(block['number'], block['timestamp'])
+
+
+def get_chain_head(max_staleness=None, w3=None):
+    """优先读取共享缓存，缓存缺失或过旧时回退到 RPC"""
+    return read_head(max_staleness) or fetch_head(w3)
+
+
+def get_block_number(max_staleness=None, w3=None):
+    return get_chain_head(max_staleness, w3).number
+
+
+def clear():
+    _cache().delete(CHAIN_HEAD_CACHE_KEY)
@@ -0,0 +1,162 @@
+import json
+import logging
+import os
+import threading
+
+from django.conf import settings
+from web3 import Web3
+
+from . import rpc
+from .rpc import get_web3
+
+logger = logging.getLogger(__name__)
+
+# 合约名称 -> settings 中的地址配置项
+CONTRACTS = {
+    'NewRegistry': 'BOT_REGISTRY_CONTRACT_ADDRESS',
+    'NewSubscription': 'BOT_SUBSCRIPTION_CONTRACT_ADDRESS',
+    'NewBotPayment': 'BOT_PAYMENT_CONTRACT_ADDRESS',
+}
+
+# 不随项目编译、ABI 内置的通用合约: 名称 -> (地址配置项, ABI)
+BUILTIN_CONTRACTS = {
+    'Multicall3': ('MULTICALL3_ADDRESS', [
+        {
+            'type': 'function',
+            'name': 'aggregate3',
+            'stateMutability': 'payable',
+            'inputs': [{
+                'name': 'calls',
+                'type': 'tuple[]',
+                'components': [
+                    {'name': 'target', 'type': 'address'},
+                    {'name': 'allowFailure', 'type': 'bool'},
+                    {'name': 'callData', 'type': 'bytes'},
+                ],
+            }],
+            'outputs': [{
+                'name': 'returnData',
+                'type': 'tuple[]',
+                'components': [
+                    {'name': 'success', 'type': 'bool'},
+                    {'name': 'returnData', 'type': 'bytes'},
+                ],
+            }],
+        },
+    ]),
+}
+
+_lock = threading.RLock()
+_abis = None
+_contracts = {}
+
+
+def artifact_path(name):
+    """Hardhat 编译产物路径"""
+    return os.path.join(settings.CONTRACT_ARTIFACTS_DIR, f'{name}.sol', f'{name}.json')
+
+
+def extract_abis(names=None):
+    """
+    从 Hardhat 编译产物中只提取 abi 字段
+
+    Returns:
+        dict: {合约名称: abi}，找不到产物的合约会被跳过
+    """
+    abis = {}
+    for name in names or CONTRACTS:
+        path = artifact_path(name)
+        if not os.path.exists(path):
+            logger.warning(f"未找到合约编译产物: {path}")
+            continue
+        with open(path) as f:
+            abis[name] = json.load(f)['abi']
+    return abis
+
+
+def write_abi_cache(abis, path=None):
+    """将 ABI 写入紧凑的缓存文件"""
+    path = path or settings.CONTRACT_ABI_CACHE_PATH
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(abis, f, separators=(',', ':'), sort_keys=True)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _load_abis():
+    abis = {}
+    cache_path = settings.CONTRACT_ABI_CACHE_PATH
+    if os.path.exists(cache_path):
+        with open(cache_path) as f:
+            abis = json.load(f)
+
+    missing = [name for name in CONTRACTS if name not in abis]
+    if missing:
+        # 缓存文件缺失或不完整时回退到编译产物，并尽量回写缓存
+        extracted = extract_abis(missing)
+        if extracted:
+            abis.update(extracted)
+            try:
+                write_abi_cache(abis, cache_path)
+            except OSError as e:
+                logger.warning(f"写入 ABI 缓存失败: {str(e)}")
+    return abis
+
+
+def get_abi(name):
+    """获取合约 ABI，首次调用时才读取文件"""
+    global _abis
+    if name in BUILTIN_CONTRACTS:
+        return BUILTIN_CONTRACTS[name][1]
+    if _abis is None:
+        with _lock:
+            if _abis is None:
+                _abis = _load_abis()
+    if name not in _abis:
+        raise KeyError(f"未找到合约 ABI: {name}")
+    return _abis[name]
+
+
+def get_contract(name, address=None):
+    """
+    获取合约实例，按 (合约名称, 地址) 缓存
+
+    Args:
+        name (str): 合约名称，例如 'NewRegistry'
+        address (str): 合约地址，默认使用 settings 中的配置
+    """
+    address_setting = CONTRACTS[name] if name in CONTRACTS else BUILTIN_CONTRACTS[name][0]
+    address = address or getattr(settings, address_setting)
+    key = (name, address.lower())
+    contract = _contracts.get(key)
+    if contract is None:
+        with _lock:
+            contract = _contracts.get(key)
+            if contract is None:
+                contract = get_web3().eth.contract(
+                    address=Web3.to_checksum_address(address),
+                    abi=get_abi(name)
+                )
+                _contracts[key] = contract
+    return contract
+
+
+def warm():
+    """预加载 ABI 和合约实例，供启动时调用"""
+    for name in CONTRACTS:
+        try:
+            get_contract(name)
+        except Exception as e:
+            logger.warning(f"预加载合约 {name} 失败: {str(e)}")
+
+
+def reset():
+    """清空进程内缓存（测试或切换配置时使用）"""
+    from .events import reset as reset_event_decoder
+    global _abis
+    with _lock:
+        _abis = None
+        _contracts.clear()
+    reset_event_decoder()
+    rpc.reset()
@@ -0,0 +1,181 @@
+import threading
+from typing import Any, Dict, NamedTuple, Optional
+
+from django.conf import settings
+from eth_abi import decode as abi_decode
+from eth_abi.exceptions import DecodingError
+from eth_abi.grammar import parse as parse_abi_type
+from eth_utils import event_abi_to_log_topic, to_checksum_address
+from hexbytes import HexBytes
+
+from .contracts import CONTRACTS, get_abi
+
+
+class DecodedEvent(NamedTuple):
+    contract: str
+    event: str
+    address: str
+    block_number: Optional[int]
+    transaction_hash: Optional[HexBytes]
+    log_index: Optional[int]
+    args: Dict[str, Any]
+
+
+def _topic_decoder(abi_type):
+    """为 indexed 参数生成 topic 解码函数，动态类型的 topic 只是哈希，原样返回"""
+    parsed = parse_abi_type(abi_type)
+    if parsed.is_dynamic:
+        return HexBytes
+    if abi_type == 'address':
+        return lambda topic: to_checksum_address(topic[12:])
+    if abi_type.startswith('uint'):
+        return lambda topic: int.from_bytes(topic, 'big')
+    if abi_type == 'bool':
+        return lambda topic: topic[-1] == 1
+    return lambda topic: abi_decode([abi_type], topic)[0]
+
+
+class _EventSpec:
+    __slots__ = ('contract', 'name', 'topic', 'indexed', 'data_names', 'data_types')
+
+    def __init__(self, contract, event_abi):
+        self.contract = contract
+        self.name = event_abi['name']
+        self.topic = bytes(event_abi_to_log_topic(event_abi))
+        self.indexed = [
+            (item['name'], _topic_decoder(item['type']))
+            for item in event_abi['inputs'] if item.get('indexed')
+        ]
+        data_inputs = [item for item in event_abi['inputs'] if not item.get('indexed')]
+        self.data_names = [item['name'] for item in data_inputs]
+        self.data_types = [_abi_type(item) for item in data_inputs]
+
+
+def _abi_type(item):
+    if item['type'].startswith('tuple'):
+        components = ','.join(_abi_type(component) for component in item['components'])
+        return f"({components}){item['type'][5:]}"
+    return item['type']
+
+
+class EventDecoder:
+    """
+    基于合约 ABI 预先编译的事件解码器
+
+    启动时计算 topic0 -> 事件 的映射表，匹配时直接比较 topic 字节，
+    只有命中的日志才做 ABI 解码
+    """
+
+    def __init__(self, abis, addresses=None, events=None):
+        """
+        Args:
+            abis (dict): {合约名称: abi}
+            addresses (dict): {合约名称: 地址}，提供时只解码这些地址发出的日志
+            events (iterable): 只编译这些事件名称，默认全部
+        """
+        self._specs = {}
+        for contract, abi in abis.items():
+            for item in abi:
+                if item.get('type') != 'event' or item.get('anonymous'):
+                    continue
+                if events is not None and item['name'] not in events:
+                    continue
+                spec = _EventSpec(contract, item)
+                self._specs.setdefault(spec.topic, {})[contract] = spec
+        self._contracts_by_address = {
+            address.lower(): contract for contract, address in (addresses or {}).items() if address
+        }
+
+    @property
+    def topics(self):
+        return [HexBytes(topic) for topic in self._specs]
+
+    @property
+    def addresses(self):
+        return [to_checksum_address(address) for address in self._contracts_by_address]
+
+    def _match(self, log, contract=None):
+        topics = log['topics']
+        if not topics:
+            return None
+        specs = self._specs.get(topics[0])
+        if specs is None:
+            return None
+        if self._contracts_by_address:
+            log_contract = self._contracts_by_address.get(log['address'].lower())
+            if log_contract is None or (contract is not None and log_contract != contract):
+                return None
+            return specs.get(log_contract)
+        if contract is not None:
+            return specs.get(contract)
+        return next(iter(specs.values()))
+
+    def _decode(self, spec, log):
+        topics = log['topics']
+        if len(topics) != len(spec.indexed) + 1:
+            return None
+        args = {name: decode(bytes(topic)) for (name, decode), topic in zip(spec.indexed, topics[1:])}
+        if spec.data_types:
+            try:
+                args.update(zip(spec.data_names, abi_decode(spec.data_types, bytes(log['data']))))
+            except DecodingError:
+                return None
+        return DecodedEvent(
+            contract=spec.contract,
+            event=spec.name,
+            address=log['address'],
+            block_number=log.get('blockNumber'),
+            transaction_hash=log.get('transactionHash'),
+            log_index=log.get('logIndex'),
+            args=args,
+        )
+
+    def decode_log(self, log):
+        """解码单条日志，无法识别时返回 None"""
+        spec = self._match(log)
+        return self._decode(spec, log) if spec else None
+
+    def decode_logs(self, logs, event=None, contract=None):
+        """解码多条日志，可以按事件名称和合约过滤"""
+        decoded = []
+        for log in logs:
+            spec = self._match(log, contract)
+            if spec is None or (event is not None and spec.name != event):
+                continue
+            result = self._decode(spec, log)
+            if result is not None:
+                decoded.append(result)
+        return decoded
+
+    def find(self, receipt, event, contract=None):
+        """返回收据中第一个指定事件，没有时返回 None"""
+        for log in receipt['logs']:
+            spec = self._match(log, contract)
+            if spec is not None and spec.name == event:
+                result = self._decode(spec, log)
+                if result is not None:
+                    return result
+        return None
+
+
+_lock = threading.Lock()
+_decoder = None
+
+
+def get_event_decoder():
+    """获取项目合约的共享事件解码器，只解码 settings 中配置的合约地址发出的日志"""
+    global _decoder
+    if _decoder is None:
+        with _lock:
+            if _decoder is None:
+                _decoder = EventDecoder(
+                    {name: get_abi(name) for name in CONTRACTS},
+                    {name: getattr(settings, setting) for name, setting in CONTRACTS.items()},
+                )
+    return _decoder
+
+
+def reset():
+    global _decoder
+    with _lock:
+        _decoder = None
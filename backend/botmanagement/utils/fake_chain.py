@@ -0,0 +1,268 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from eth_abi import decode as abi_decode
+from eth_abi import encode as abi_encode
+from eth_utils import keccak
+
+BOT_DETAILS_TYPES = ['string', 'uint96', 'uint32', 'string', 'address', 'bool', 'bool']
+GET_BOT_DETAILS_SELECTOR = keccak(text='getBotDetails(uint256)')[:4]
+AGGREGATE3_SELECTOR = keccak(text='aggregate3((address,bool,bytes)[])')[:4]
+BOT_REGISTERED_TOPIC = keccak(text='BotRegistered(uint256,address,string)')
+
+
+def _hex(value):
+    if isinstance(value, int):
+        return hex(value)
+    return '0x' + bytes(value).hex()
+
+
+class FakeRPCError(Exception):
+    def __init__(self, code, message):
+        self.code = code
+        super().__init__(message)
+
+
+class FakeChain:
+    """
+    内存中的假链，只实现后端用到的 JSON-RPC 方法
+
+    注册机器人时生成 BotRegistered 日志和交易收据，getBotDetails 与 Multicall3.aggregate3 直接返回预设结果
+    """
+
+    def __init__(self, registry_address, multicall_address, head=1000, block_time=2, chain_id=11155420):
+        self.registry_address = registry_address.lower()
+        self.multicall_address = multicall_address.lower()
+        self.chain_id = chain_id
+        self.block_time = block_time
+        self.head = head
+        self.genesis_timestamp = int(time.time()) - head * block_time
+        self.receipts = {}
+        self.logs = []
+        self.bots = {}
+        self._lock = threading.Lock()
+
+    def block_hash(self, number):
+        return keccak(number.to_bytes(32, 'big'))
+
+    def mine(self, count=1):
+        with self._lock:
+            self.head += count
+            return self.head
+
+    def register_bot(self, ipfs_hash, developer, name='bot', price=1000000, trial_time=24, is_active=True,
+                     block_number=None):
+        """
+        模拟一次 registerBot 交易
+
+        Returns:
+            tuple: (合约中的机器人ID, 交易哈希)
+        """
+        with self._lock:
+            bot_id = len(self.bots) + 1
+            block_number = self.head if block_number is None else block_number
+            self.bots[bot_id] = (ipfs_hash, price, trial_time, name, developer, is_active, True)
+            transaction_hash = _hex(keccak(f'register:{bot_id}'.encode()))
+            log = {
+                'address': self.registry_address,
+                'topics': [
+                    _hex(BOT_REGISTERED_TOPIC),
+                    _hex(bot_id.to_bytes(32, 'big')),
+                    _hex(bytes(12) + bytes.fromhex(developer[2:])),
+                ],
+                'data': _hex(abi_encode(['string'], [ipfs_hash])),
+                'blockNumber': hex(block_number),
+                'blockHash': _hex(self.block_hash(block_number)),
+                'transactionHash': transaction_hash,
+                'transactionIndex': '0x0',
+                'logIndex': '0x0',
+                'removed': False,
+            }
+            self.logs.append(log)
+            self.receipts[transaction_hash] = {
+                'transactionHash': transaction_hash,
+                'transactionIndex': '0x0',
+                'blockHash': log['blockHash'],
+                'blockNumber': log['blockNumber'],
+                'from': developer,
+                'to': self.registry_address,
+                'contractAddress': None,
+                'status': '0x1',
+                'gasUsed': hex(150000),
+                'cumulativeGasUsed': hex(150000),
+                'effectiveGasPrice': hex(1000000),
+                'type': '0x2',
+                'logsBloom': _hex(bytes(256)),
+                'logs': [log],
+            }
+            return bot_id, transaction_hash
+
+    def _block_number(self, identifier):
+        if identifier in ('latest', 'safe', 'finalized', 'pending', None):
+            return self.head
+        if identifier == 'earliest':
+            return 0
+        return int(identifier, 16)
+
+    def _block(self, identifier):
+        number = self._block_number(identifier)
+        if number > self.head:
+            return None
+        return {
+            'number': hex(number),
+            'hash': _hex(self.block_hash(number)),
+            'parentHash': _hex(self.block_hash(number - 1)) if number else _hex(bytes(32)),
+            'timestamp': hex(self.genesis_timestamp + number * self.block_time),
+            'gasLimit': hex(30000000),
+            'gasUsed': '0x0',
+            'baseFeePerGas': hex(1000000),
+            'miner': _hex(bytes(20)),
+            'extraData': '0x',
+            'logsBloom': _hex(bytes(256)),
+            'transactions': [],
+        }
+
+    def _get_logs(self, params):
+        from_block = self._block_number(params.get('fromBlock', 'latest'))
+        to_block = self._block_number(params.get('toBlock', 'latest'))
+        addresses = params.get('address')
+        if isinstance(addresses, str):
+            addresses = [addresses]
+        addresses = {address.lower() for address in addresses} if addresses else None
+        topics = (params.get('topics') or [None])[0]
+        if isinstance(topics, str):
+            topics = [topics]
+        topics = {topic.lower() for topic in topics} if topics else None
+        return [
+            log for log in self.logs
+            if from_block <= int(log['blockNumber'], 16) <= to_block
+            and (addresses is None or log['address'] in addresses)
+            and (topics is None or log['topics'][0] in topics)
+        ]
+
+    def _call(self, to, data):
+        selector, args = data[:4], data[4:]
+        if to == self.registry_address and selector == GET_BOT_DETAILS_SELECTOR:
+            (bot_id,) = abi_decode(['uint256'], args)
+            details = self.bots.get(bot_id)
+            if details is None:
+                raise FakeRPCError(3, 'execution reverted: Bot does not exist')
+            return abi_encode(BOT_DETAILS_TYPES, details)
+        if to == self.multicall_address and selector == AGGREGATE3_SELECTOR:
+            (calls,) = abi_decode(['(address,bool,bytes)[]'], args)
+            results = []
+            for target, allow_failure, call_data in calls:
+                try:
+                    results.append((True, self._call(target.lower(), call_data)))
+                except FakeRPCError:
+                    if not allow_failure:
+                        raise
+                    results.append((False, b''))
+            return abi_encode(['(bool,bytes)[]'], [results])
+        raise FakeRPCError(3, 'execution reverted')
+
+    def handle(self, method, params):
+        """执行单个 JSON-RPC 请求，返回 result 字段"""
+        with self._lock:
+            if method == 'eth_chainId':
+                return hex(self.chain_id)
+            if method == 'net_version':
+                return str(self.chain_id)
+            if method == 'eth_blockNumber':
+                return hex(self.head)
+            if method == 'eth_getBlockByNumber':
+                return self._block(params[0])
+            if method == 'eth_getTransactionReceipt':
+                return self.receipts.get(params[0].lower())
+            if method == 'eth_getLogs':
+                return self._get_logs(params[0])
+            if method == 'eth_call':
+                call = params[0]
+                return _hex(self._call(call['to'].lower(), bytes.fromhex(call['data'][2:])))
+        raise FakeRPCError(-32601, f'the method {method} does not exist/is not available')
+
+
+class _RPCRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body):
+        content = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _respond(self, item):
+        response = {'jsonrpc': '2.0', 'id': item.get('id')}
+        try:
+            response['result'] = self.server.chain.handle(item.get('method'), item.get('params') or [])
+        except FakeRPCError as e:
+            response['error'] = {'code': e.code, 'message': str(e)}
+        return response
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        fake_server = self.server.fake_server
+        fake_server.requests += 1
+        delay = fake_server.latency + fake_server.random.uniform(0, fake_server.jitter)
+        if delay:
+            time.sleep(delay)
+        if fake_server.random.random() < fake_server.error_rate:
+            fake_server.errors += 1
+            self._send(429, {'jsonrpc': '2.0', 'id': None, 'error': {'code': -32005, 'message': 'rate limited'}})
+            return
+        if isinstance(payload, list):
+            self._send(200, [self._respond(item) for item in payload])
+        else:
+            self._send(200, self._respond(payload))
+
+
+class FakeRPCServer:
+    """
+    在本地线程中运行的假 JSON-RPC 节点
+
+    每个 HTTP 请求（单个或批量）都会等待 latency + [0, jitter) 秒，并按 error_rate 的概率返回 429
+    """
+
+    def __init__(self, chain, latency=0.0, jitter=0.0, error_rate=0.0, host='127.0.0.1', port=0, seed=None):
+        self.chain = chain
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        self._httpd = ThreadingHTTPServer((host, port), _RPCRequestHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.chain = chain
+        self._httpd.fake_server = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,143 @@
+import hashlib
+import io
+import logging
+import multiprocessing
+import posixpath
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+
+logger = logging.getLogger(__name__)
+
+IMAGE_FIELDS = ['image1', 'image2', 'image3']
+
+DEFAULT_IMAGE_VARIANTS = {
+    'thumb': (160, 160),
+    'medium': (640, 640),
+}
+
+
+def variant_sizes():
+    return getattr(settings, 'IMAGE_VARIANTS', DEFAULT_IMAGE_VARIANTS)
+
+
+def render_variants(content, sizes, quality):
+    """
+    把原图缩放为各尺寸的 WebP（在子进程中执行，只依赖 Pillow）
+
+    图片按比例缩小到给定尺寸以内，不会放大
+
+    Returns:
+        dict: {变体名: WebP 字节}
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(content)) as image:
+        # 按 EXIF 方向旋转，避免手机照片缩略图方向错误
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+        variants = {}
+        for name, size in sizes.items():
+            variant = image.copy()
+            variant.thumbnail(tuple(size), Image.Resampling.LANCZOS)
+            out = io.BytesIO()
+            variant.save(out, 'WEBP', quality=quality, method=4)
+            variants[name] = out.getvalue()
+        return variants
+
+
+_lock = threading.Lock()
+_executor = None
+
+
+def get_executor():
+    """
+    进程内共享的进程池，图片缩放是 CPU 密集型操作，放在子进程中不占用请求线程的 GIL
+
+    进程池在多线程的 WSGI 进程中按需创建，不能用默认的 fork（子进程可能继承其他线程持有的锁而死锁），
+    改从单线程的 forkserver 创建子进程（不支持时用 spawn）
+    """
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+                _executor = ProcessPoolExecutor(
+                    max_workers=settings.IMAGE_VARIANT_WORKERS, mp_context=multiprocessing.get_context(method)
+                )
+    return _executor
+
+
+def shutdown():
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown()
+            _executor = None
+
+
+def variant_name(content, name):
+    """按内容哈希命名，相同的缩略图只存一份，并且可以被永久缓存"""
+    digest = hashlib.sha256(content).hexdigest()[:20]
+    return posixpath.join(settings.IMAGE_VARIANT_DIR, f'{digest}_{name}.webp')
+
+
+def generate_variants(bot, fields=None, executor=None):
+    """
+    为机器人的图片生成缩略图，结果写入 bot.image_variants 并保存
+
+    Args:
+        fields (list): 只处理这些图片字段，默认处理全部
+        executor: 执行 render_variants 的进程池，默认使用共享进程池
+
+    Returns:
+        dict: bot.image_variants
+    """
+    fields = fields or IMAGE_FIELDS
+    executor = executor or get_executor()
+    sizes = variant_sizes()
+    quality = settings.IMAGE_VARIANT_QUALITY
+
+    futures = {}
+    for field in fields:
+        field_file = getattr(bot, field)
+        if not field_file:
+            bot.image_variants.pop(field, None)
+            continue
+        with field_file.storage.open(field_file.name, 'rb') as f:
+            content = f.read()
+        futures[field] = (field_file.storage, executor.submit(render_variants, content, sizes, quality))
+
+    for field, (storage, future) in futures.items():
+        try:
+            rendered = future.result()
+        except Exception as e:
+            # 无法识别的图片仍保留原图，只是没有缩略图
+            logger.warning(f"Bot {bot.id} 图片 {field} 生成缩略图失败: {str(e)}")
+            bot.image_variants.pop(field, None)
+            continue
+        paths = {}
+        for name, content in rendered.items():
+            path = variant_name(content, name)
+            if not storage.exists(path):
+                path = storage.save(path, ContentFile(content))
+            paths[name] = path
+        bot.image_variants[field] = paths
+
+    bot.save(update_fields=['image_variants'])
+    return bot.image_variants
+
+
+def variant_urls(bot, request=None):
+    """{图片字段名: {变体名: URL}}，有 request 时返回绝对地址（与 DRF FileField 一致）"""
+    storage = bot.image1.storage
+    urls = {}
+    for field, paths in bot.image_variants.items():
+        urls[field] = {}
+        for name, path in paths.items():
+            url = storage.url(path)
+            urls[field][name] = request.build_absolute_uri(url) if request is not None else url
+    return urls
@@ -0,0 +1,138 @@
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from hexbytes import HexBytes
+
+from ..models import ChainCheckpoint, ContractEvent
+from .chain_head import get_block_number
+from .contracts import CONTRACTS, get_abi
+from .events import EventDecoder
+from .rpc import get_web3
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_NAME = 'contract_events'
+
+# 需要同步的合约事件
+INDEXED_EVENTS = {
+    'NewRegistry': ['BotRegistered', 'BotStatusChanged'],
+    'NewSubscription': ['SubscriptionCreated', 'SubscriptionCancelled', 'SubscriptionStatusChanged'],
+    'NewBotPayment': ['PaymentProcessed'],
+}
+
+
+def _jsonable(value):
+    if isinstance(value, (bytes, bytearray)):
+        return HexBytes(value).to_0x_hex()
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    return value
+
+
+class EventIndexer:
+    """
+    按区块区间分段调用 eth_getLogs，解码事件后批量写入 ContractEvent，并保存同步进度
+    """
+
+    def __init__(self, w3=None, chunk_size=None, confirmations=None):
+        self.w3 = w3 or get_web3()
+        self.chunk_size = chunk_size or settings.CHAIN_INDEXER_CHUNK_SIZE
+        self.confirmations = settings.CHAIN_INDEXER_CONFIRMATIONS if confirmations is None else confirmations
+        self.decoder = EventDecoder(
+            {name: get_abi(name) for name in INDEXED_EVENTS},
+            {name: getattr(settings, CONTRACTS[name]) for name in INDEXED_EVENTS},
+            events={event for events in INDEXED_EVENTS.values() for event in events},
+        )
+        self.addresses = sorted(self.decoder.addresses)
+        self.topics = sorted(topic.to_0x_hex() for topic in self.decoder.topics)
+
+    def get_checkpoint(self):
+        checkpoint, _ = ChainCheckpoint.objects.get_or_create(
+            name=CHECKPOINT_NAME,
+            defaults={'block_number': settings.CHAIN_INDEXER_START_BLOCK - 1}
+        )
+        return checkpoint.block_number
+
+    def safe_head(self):
+        return get_block_number(w3=self.w3) - self.confirmations
+
+    def fetch_logs(self, from_block, to_block):
+        return self.w3.eth.get_logs({
+            'address': self.addresses,
+            'fromBlock': from_block,
+            'toBlock': to_block,
+            'topics': [self.topics],
+        })
+
+    def decode(self, log):
+        """将日志解码为 ContractEvent，未知事件返回 None"""
+        decoded = self.decoder.decode_log(log)
+        if decoded is None:
+            return None
+        args = {name: _jsonable(value) for name, value in decoded.args.items()}
+        account = args.get('subscriber') or args.get('developer')
+        return ContractEvent(
+            contract=decoded.contract,
+            event=decoded.event,
+            block_number=decoded.block_number,
+            transaction_hash=HexBytes(decoded.transaction_hash).to_0x_hex(),
+            log_index=decoded.log_index,
+            contract_bot_id=args.get('botId'),
+            account=account.lower() if account else None,
+            args=args,
+        )
+
+    def advance_checkpoint(self, block_number):
+        """把同步进度推进到 block_number，进度只前进不后退"""
+        ChainCheckpoint.objects.filter(name=CHECKPOINT_NAME, block_number__lt=block_number).update(
+            block_number=block_number, updated_at=timezone.now()
+        )
+
+    def index_range(self, from_block, to_block, advance=True):
+        """
+        同步 [from_block, to_block] 区间的事件
+
+        每段写入和进度更新在同一个事务中完成；节点拒绝过大的区间时自动缩小分段。
+        advance=False 时只写入事件，不修改同步进度（与进度不相连的补录区间）
+        """
+        total = 0
+        chunk_size = self.chunk_size
+        start = from_block
+        while start <= to_block:
+            end = min(start + chunk_size - 1, to_block)
+            try:
+                logs = self.fetch_logs(start, end)
+            except Exception as e:
+                if chunk_size == 1:
+                    raise
+                chunk_size = max(chunk_size // 2, 1)
+                logger.warning(f"查询区块 {start}-{end} 的日志失败，缩小分段为 {chunk_size}: {str(e)}")
+                continue
+
+            events = [event for event in (self.decode(log) for log in logs) if event is not None]
+            with transaction.atomic():
+                ContractEvent.objects.bulk_create(events, ignore_conflicts=True, batch_size=1000)
+                if advance:
+                    self.advance_checkpoint(end)
+            total += len(events)
+            logger.info(f"已同步区块 {start}-{end}，事件 {len(events)} 条")
+
+            start = end + 1
+            # 成功后逐步恢复分段大小
+            chunk_size = min(chunk_size * 2, self.chunk_size)
+        return total
+
+    def run_once(self, from_block=None, to_block=None):
+        """
+        从上次进度同步到安全区块高度，返回 (写入事件数, 同步到的区块)
+
+        指定 from_block 时为补录：区间与已同步的部分相连时才推进进度，低于进度的部分不会让进度后退
+        """
+        checkpoint = self.get_checkpoint()
+        start = checkpoint + 1 if from_block is None else from_block
+        end = self.safe_head() if to_block is None else to_block
+        if start > end:
+            return 0, start - 1
+        return self.index_range(start, end, advance=start <= checkpoint + 1), end
@@ -1,71 +1,413 @@
+import hashlib
+import io
 import json
+import mimetypes
+import os
+import threading
+import time
+import uuid
 import requests
+import base58
 from django.conf import settings
+from django.utils.module_loading import import_string
+from requests.adapters import HTTPAdapter
 import logging
 
+from django.db.models import Q
+
+from ..models import BotManagement, IPFSContent
+from .images import IMAGE_FIELDS
+
 logger = logging.getLogger(__name__)
 
+# Kubo 默认的分块大小，不超过该大小的文件只有一个 dag-pb 节点
+IPFS_CHUNK_SIZE = 262144
+
+
+def canonical_json(data):
+    """规范化序列化：键排序、无多余空白、UTF-8，相同内容总是得到相同的字节"""
+    return json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def _varint(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7f
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _bytes_field(number, payload):
+    return _varint(number << 3 | 2) + _varint(len(payload)) + payload
+
+
+def _varint_field(number, value):
+    return _varint(number << 3) + _varint(value)
+
+
+def compute_cid(content):
+    """
+    在本地计算内容的 CIDv0（与 `ipfs add` 默认参数一致）
+
+    只处理单个分块的文件（unixfs File 节点，dag-pb 编码，sha2-256），
+    超过分块大小或为空时返回 None
+    """
+    if not content or len(content) > IPFS_CHUNK_SIZE:
+        return None
+    unixfs_data = _varint_field(1, 2) + _bytes_field(2, content) + _varint_field(3, len(content))
+    node = _bytes_field(1, unixfs_data)
+    return base58.b58encode(b'\x12\x20' + hashlib.sha256(node).digest()).decode()
+
+
+def compute_file_cid(field_file):
+    """计算已保存文件的 CID，只读取不超过一个分块的小文件，大文件返回 None"""
+    if field_file.size > IPFS_CHUNK_SIZE:
+        return None
+    with field_file.storage.open(field_file.name, 'rb') as f:
+        return compute_cid(f.read())
+
+
+class MultipartStream:
+    """
+    流式的 multipart/form-data 请求体
+
+    文件内容按块读取，不会整体载入内存；实现了 __len__，requests 会据此发送 Content-Length
+    """
+
+    def __init__(self, fields, file_name, fileobj, size, content_type='application/octet-stream', chunk_size=65536):
+        self.boundary = uuid.uuid4().hex
+        head = b''.join(
+            self._part_header(f'form-data; name="{name}"') + value.encode() + b'\r\n'
+            for name, value in fields.items()
+        )
+        head += self._part_header(
+            f'form-data; name="file"; filename="{file_name}"', content_type
+        )
+        self._head = head
+        self._tail = f'\r\n--{self.boundary}--\r\n'.encode()
+        self._fileobj = fileobj
+        self._chunk_size = chunk_size
+        self._length = len(head) + size + len(self._tail)
+        self._chunks = self._iter_chunks()
+        self._buffer = b''
+
+    def _part_header(self, disposition, content_type=None):
+        header = f'--{self.boundary}\r\nContent-Disposition: {disposition}\r\n'
+        if content_type:
+            header += f'Content-Type: {content_type}\r\n'
+        return (header + '\r\n').encode()
+
+    @property
+    def content_type(self):
+        return f'multipart/form-data; boundary={self.boundary}'
+
+    def _iter_chunks(self):
+        yield self._head
+        while True:
+            chunk = self._fileobj.read(self._chunk_size)
+            if not chunk:
+                break
+            yield chunk
+        yield self._tail
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        return self._chunks
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if size < 0:
+            data, self._buffer = self._buffer, b''
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+class IPFSPinError(Exception):
+    pass
+
+
+_session_lock = threading.Lock()
+_session = None
+
+
+def get_session():
+    """进程内共享的 requests.Session，连接池大小覆盖上传线程数"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                pool_size = max(settings.IPFS_UPLOAD_WORKERS, settings.IPFS_BULK_UPLOAD_WORKERS)
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _session = session
+    return _session
+
+
 class IPFSUploader:
-    def __init__(self):
-        self.pinata_jwt = settings.PINATA_JWT
-        self.pinata_endpoint = "https://api.pinata.cloud/pinning/pinJSONToIPFS"
-        
+    """
+    IPFS 上传器接口
+
+    子类实现 _add（上传一个文件并返回服务端给出的 CID），按需覆盖 gateway_url；
+    CID 校验、错误处理和本地 CID 表去重由基类完成
+    """
+    label = 'IPFS'
+
+    def __init__(self, session=None):
+        # 默认复用进程内共享的连接池
+        self.session = session or get_session()
+        self.timeout = getattr(settings, 'IPFS_UPLOAD_TIMEOUT', (5, 30))
+
+    def gateway_url(self, cid):
+        return f"{settings.IPFS_GATEWAY_URL.rstrip('/')}/ipfs/{cid}"
+
+    def _add(self, name, fileobj, size, content_type, chunk_size):
+        """
+        上传单个文件
+
+        Returns:
+            str: 服务端返回的 CID
+
+        Raises:
+            IPFSPinError: 服务端返回错误
+        """
+        raise NotImplementedError
+
+    def pin_content(self, content, cid=None, name='bot.json'):
+        """
+        将规范化后的字节作为文件固定到 IPFS，并用本地计算的 CID 校验返回值
+
+        Returns:
+            dict: 同 upload_bot_data
+        """
+        return self._pin(name, io.BytesIO(content), len(content), 'application/json', cid)
+
+    def pin_file(self, field_file, cid=None, chunk_size=None):
+        """
+        以流式 multipart 请求把已保存的文件固定到 IPFS，文件按块读取
+
+        Args:
+            field_file: 模型的 FileField 值
+            cid (str): 本地计算的 CID，提供时用于校验返回值
+        """
+        name = os.path.basename(field_file.name)
+        content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        try:
+            with field_file.storage.open(field_file.name, 'rb') as f:
+                return self._pin(name, f, field_file.size, content_type, cid, chunk_size)
+        except OSError as e:
+            error_msg = f"IPFS上传文件 {name} 失败: {str(e)}"
+            logger.error(error_msg)
+            return {
+                'success': False,
+                'error': error_msg
+            }
+
+    def _pin(self, name, fileobj, size, content_type, cid, chunk_size=None):
+        chunk_size = chunk_size or getattr(settings, 'IPFS_STREAM_CHUNK_SIZE', 65536)
+        try:
+            ipfs_hash = self._add(name, fileobj, size, content_type, chunk_size)
+        except Exception as e:
+            error_msg = f"IPFS上传 {name} 失败: {str(e)}"
+            logger.error(error_msg)
+            return {
+                'success': False,
+                'error': error_msg
+            }
+
+        if cid is not None and ipfs_hash != cid:
+            error_msg = f"CID校验失败: 本地计算 {cid}，{self.label} 返回 {ipfs_hash}"
+            logger.error(error_msg)
+            return {
+                'success': False,
+                'error': error_msg
+            }
+
+        return {
+            'success': True,
+            'cid': ipfs_hash,
+            'url': self.gateway_url(ipfs_hash)
+        }
+
     def upload_bot_data(self, bot_data):
         """
         上传机器人数据到IPFS
-        
+
+        先在本地计算 CID，已固定过的内容直接返回，不发起网络请求
+
         Args:
             bot_data (dict): 包含机器人信息的字典
-            
+
         Returns:
             dict: 包含上传结果的字典
                 {
                     'success': bool,
                     'cid': str,  # 如果成功
                     'url': str,  # 如果成功
+                    'cached': bool,  # 如果成功，是否命中本地 CID 记录
                     'error': str  # 如果失败
                 }
         """
-        try:
-            headers = {
+        content = canonical_json(bot_data)
+        cid = compute_cid(content)
+        if cid is not None and IPFSContent.objects.filter(cid=cid).exists():
+            return {'success': True, 'cid': cid, 'url': self.gateway_url(cid), 'cached': True}
+
+        result = self.pin_content(content, cid)
+        if result['success']:
+            result['cached'] = False
+            record_pinned([(result['cid'], len(content))])
+        return result
+
+
+class PinataUploader(IPFSUploader):
+    """通过 Pinata pinFileToIPFS 接口固定"""
+    label = 'Pinata'
+
+    def __init__(self, session=None):
+        super().__init__(session)
+        self.pinata_jwt = settings.PINATA_JWT
+        self.pinata_endpoint = "https://api.pinata.cloud/pinning/pinFileToIPFS"
+
+    def gateway_url(self, cid):
+        return f"https://gateway.pinata.cloud/ipfs/{cid}"
+
+    def _add(self, name, fileobj, size, content_type, chunk_size):
+        body = MultipartStream(
+            {
+                'pinataOptions': json.dumps({'cidVersion': 0}),
+                'pinataMetadata': json.dumps({'name': name}),
+            },
+            name, fileobj, size, content_type, chunk_size
+        )
+        response = self.session.post(
+            self.pinata_endpoint,
+            headers={
                 'Authorization': f'Bearer {self.pinata_jwt}',
-                'Content-Type': 'application/json'
-            }
-            
-            # 准备上传数据
-            payload = {
-                'pinataContent': bot_data
-            }
-            
-            # 发送请求到Pinata
-            response = requests.post(
-                self.pinata_endpoint,
-                headers=headers,
-                json=payload
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                ipfs_hash = result['IpfsHash']
-                ipfs_url = f"https://gateway.pinata.cloud/ipfs/{ipfs_hash}"
-                
-                return {
-                    'success': True,
-                    'cid': ipfs_hash,
-                    'url': ipfs_url
-                }
-            else:
-                error_msg = f"Pinata API错误: {response.status_code} - {response.text}"
-                logger.error(error_msg)
-                return {
-                    'success': False,
-                    'error': error_msg
-                }
-                
-        except Exception as e:
-            error_msg = f"IPFS上传失败: {str(e)}"
-            logger.error(error_msg)
-            return {
-                'success': False,
-                'error': error_msg
-            } 
\ No newline at end of file
+                'Content-Type': body.content_type,
+            },
+            data=body,
+            timeout=self.timeout
+        )
+        if response.status_code != 200:
+            raise IPFSPinError(f"Pinata API错误: {response.status_code} - {response.text}")
+        return response.json()['IpfsHash']
+
+
+class KuboUploader(IPFSUploader):
+    """通过本地 Kubo 节点的 HTTP API（/api/v0/add）固定"""
+    label = 'Kubo'
+
+    def __init__(self, session=None):
+        super().__init__(session)
+        self.add_endpoint = f"{settings.IPFS_NODE_URL.rstrip('/')}/api/v0/add"
+
+    def _add(self, name, fileobj, size, content_type, chunk_size):
+        body = MultipartStream({}, name, fileobj, size, content_type, chunk_size)
+        response = self.session.post(
+            self.add_endpoint,
+            # 与 compute_cid 一致：CIDv0，默认分块
+            params={'pin': 'true', 'cid-version': '0', 'quieter': 'true'},
+            headers={'Content-Type': body.content_type},
+            data=body,
+            timeout=self.timeout
+        )
+        if response.status_code != 200:
+            raise IPFSPinError(f"Kubo API错误: {response.status_code} - {response.text}")
+        return response.json()['Hash']
+
+
+class InMemoryUploader(IPFSUploader):
+    """
+    进程内的假 IPFS，用于测试和离线压测
+
+    内容保存在类属性中，所有实例共享；IPFS_MEMORY_LATENCY 可模拟每次上传的耗时（秒）。
+    超过一个分块的内容用整体的 sha2-256 生成 CID，与真实节点的结果不同
+    """
+    label = 'InMemory'
+    _store = {}
+    _store_lock = threading.Lock()
+
+    def __init__(self, session=None):
+        self.session = session
+        self.latency = getattr(settings, 'IPFS_MEMORY_LATENCY', 0)
+
+    def _add(self, name, fileobj, size, content_type, chunk_size):
+        content = b''.join(iter(lambda: fileobj.read(chunk_size), b''))
+        if self.latency:
+            time.sleep(self.latency)
+        cid = compute_cid(content) or base58.b58encode(b'\x12\x20' + hashlib.sha256(content).digest()).decode()
+        with self._store_lock:
+            self._store[cid] = content
+        return cid
+
+    @classmethod
+    def get(cls, cid):
+        with cls._store_lock:
+            return cls._store.get(cid)
+
+    @classmethod
+    def clear(cls):
+        with cls._store_lock:
+            cls._store.clear()
+
+
+UPLOADERS = {
+    'pinata': PinataUploader,
+    'kubo': KuboUploader,
+    'memory': InMemoryUploader,
+}
+
+
+def get_uploader(session=None):
+    """按 settings.IPFS_BACKEND 创建上传器，可以是 pinata/kubo/memory 或上传器类的导入路径"""
+    backend = getattr(settings, 'IPFS_BACKEND', 'pinata')
+    uploader_class = UPLOADERS.get(backend) or import_string(backend)
+    return uploader_class(session=session)
+
+
+def pinned_cids(cids):
+    """返回其中已经固定过的 CID"""
+    cids = [cid for cid in cids if cid]
+    if not cids:
+        return set()
+    return set(IPFSContent.objects.filter(cid__in=cids).values_list('cid', flat=True))
+
+
+def is_known_cid(cid):
+    """
+    CID 是否是本站固定过的内容：CID 表中的记录，或机器人的元数据、图片 CID
+
+    内容读取接口只代理这些 CID，不能被用来通过网关读取任意内容
+    """
+    if IPFSContent.objects.filter(cid=cid).exists():
+        return True
+    images = Q()
+    for field in IMAGE_FIELDS:
+        images |= Q(**{f'ipfs_image_cids__{field}': cid})
+    return BotManagement.objects.filter(Q(ipfs_hash=cid) | images).exists()
+
+
+def record_pinned(items):
+    """
+    记录已固定的内容
+
+    Args:
+        items (iterable): [(cid, 字节数), ...]
+    """
+    IPFSContent.objects.bulk_create(
+        [IPFSContent(cid=cid, size=size) for cid, size in items],
+        ignore_conflicts=True
+    )
@@ -0,0 +1,272 @@
+import logging
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+
+import requests
+from django.conf import settings
+
+from .ipfs import compute_cid
+
+logger = logging.getLogger(__name__)
+
+# CIDv0 (base58btc) 与 CIDv1 (base32)；同时保证 CID 可以安全地用作文件名
+CID_RE = re.compile(r'^(Qm[1-9A-HJ-NP-Za-km-z]{44}|b[a-z2-7]{58,})$')
+
+DEFAULT_IPFS_CACHE_SETTINGS = {
+    'DIRECTORY': os.path.join(tempfile.gettempdir(), 'botmanagement_ipfs'),
+    'MAX_DISK_BYTES': 512 * 1024 * 1024,
+    'MEMORY_ENTRIES': 1024,
+    'MAX_ITEM_BYTES': 5 * 1024 * 1024,
+    'GATEWAY_URL': 'https://gateway.pinata.cloud',
+    'TIMEOUT': (3, 15),
+}
+
+
+# 文件头 -> Content-Type
+CONTENT_SIGNATURES = [
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF8', 'image/gif'),
+]
+
+
+class IPFSFetchError(Exception):
+    pass
+
+
+def guess_content_type(content):
+    """根据内容推断 Content-Type"""
+    for signature, content_type in CONTENT_SIGNATURES:
+        if content.startswith(signature):
+            return content_type
+    if content[:4] == b'RIFF' and content[8:12] == b'WEBP':
+        return 'image/webp'
+    if content.lstrip()[:1] in (b'{', b'['):
+        return 'application/json'
+    return 'application/octet-stream'
+
+
+class IPFSContentCache:
+    """
+    按 CID 缓存 IPFS 内容的读穿透缓存
+
+    进程内 LRU 在前，容量受限的磁盘目录在后，都未命中时才访问网关。
+    CID 对应的内容不可变，因此缓存项永不过期，只会因容量不足被淘汰。
+    只缓存校验过的内容：网关返回的内容无法在本地计算 CID（多分块或 CIDv1）时不写入缓存
+    """
+
+    def __init__(self, config=None, session=None):
+        self.config = dict(DEFAULT_IPFS_CACHE_SETTINGS)
+        self.config.update(config if config is not None else getattr(settings, 'IPFS_CACHE', {}))
+        self.directory = str(self.config['DIRECTORY'])
+        self.session = session or requests.Session()
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._disk_bytes = None
+        self._evicting = False
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _path(self, cid):
+        return os.path.join(self.directory, cid[-2:], cid)
+
+    def _remember(self, cid, content):
+        with self._lock:
+            self._memory[cid] = content
+            self._memory.move_to_end(cid)
+            while len(self._memory) > self.config['MEMORY_ENTRIES']:
+                self._memory.popitem(last=False)
+
+    def _scan_disk(self):
+        total = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    pass
+        return total
+
+    def _evict_disk(self):
+        """
+        按最近访问时间淘汰磁盘缓存，直到低于容量上限的 90%
+
+        遍历目录时不持有锁，其他线程的读写不会等待淘汰完成
+        """
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        target = self.config['MAX_DISK_BYTES'] * 0.9
+        for _, size, path in entries:
+            with self._lock:
+                if self._disk_bytes <= target:
+                    break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            with self._lock:
+                self._disk_bytes -= size
+
+    def _read_disk(self, cid):
+        path = self._path(cid)
+        try:
+            with open(path, 'rb') as f:
+                content = f.read()
+            # 用修改时间记录最近访问，供淘汰时排序
+            os.utime(path)
+            return content
+        except OSError:
+            return None
+
+    def _write_disk(self, cid, content):
+        path = self._path(cid)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f'{path}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"写入IPFS磁盘缓存失败: {str(e)}")
+            return
+        with self._lock:
+            scan = self._disk_bytes is None
+            if not scan:
+                self._disk_bytes += len(content)
+        if scan:
+            total = self._scan_disk()
+            with self._lock:
+                if self._disk_bytes is None:
+                    self._disk_bytes = total
+        with self._lock:
+            # 同一时间只有一个线程淘汰
+            evict = self._disk_bytes > self.config['MAX_DISK_BYTES'] and not self._evicting
+            self._evicting = self._evicting or evict
+        if evict:
+            try:
+                self._evict_disk()
+            finally:
+                with self._lock:
+                    self._evicting = False
+
+    def put(self, cid, content):
+        """写入已知内容（例如刚固定到 IPFS 的数据），超过单项上限的不缓存"""
+        if not CID_RE.match(cid) or len(content) > self.config['MAX_ITEM_BYTES']:
+            return
+        self._remember(cid, content)
+        if not os.path.exists(self._path(cid)):
+            self._write_disk(cid, content)
+
+    def fetch(self, cid):
+        """
+        从网关读取内容
+
+        Returns:
+            tuple: (内容, 是否已校验)；可在本地计算 CID 的内容（单分块 CIDv0）与 CID 不符时抛出 IPFSFetchError
+        """
+        url = f"{self.config['GATEWAY_URL'].rstrip('/')}/ipfs/{cid}"
+        try:
+            response = self.session.get(url, timeout=self.config['TIMEOUT'], stream=True)
+            response.raise_for_status()
+            content = bytearray()
+            for chunk in response.iter_content(65536):
+                content += chunk
+                if len(content) > self.config['MAX_ITEM_BYTES']:
+                    raise IPFSFetchError(f"内容超过缓存上限: {cid}")
+            content = bytes(content)
+        except requests.RequestException as e:
+            raise IPFSFetchError(f"从网关读取 {cid} 失败: {str(e)}") from e
+
+        local_cid = compute_cid(content) if cid.startswith('Qm') else None
+        if local_cid is not None and local_cid != cid:
+            raise IPFSFetchError(f"网关返回的内容与 CID 不符: {cid}")
+        return content, local_cid is not None
+
+    def get(self, cid):
+        """读取 CID 对应的内容，见 lookup()"""
+        return self.lookup(cid)[0]
+
+    def lookup(self, cid):
+        """
+        读取 CID 对应的内容：内存 -> 磁盘 -> 网关
+
+        Returns:
+            tuple: (内容, 是否已校验)；缓存中的内容都已校验，网关返回的未校验内容不写入缓存
+
+        Raises:
+            ValueError: CID 格式错误
+            IPFSFetchError: 网关读取失败
+        """
+        if not CID_RE.match(cid):
+            raise ValueError(f"CID 格式错误: {cid}")
+        with self._lock:
+            content = self._memory.get(cid)
+            if content is not None:
+                self._memory.move_to_end(cid)
+                self.memory_hits += 1
+                return content, True
+
+        content = self._read_disk(cid)
+        if content is not None:
+            with self._lock:
+                self.disk_hits += 1
+            self._remember(cid, content)
+            return content, True
+
+        with self._lock:
+            self.misses += 1
+        content, verified = self.fetch(cid)
+        if verified:
+            self.put(cid, content)
+        else:
+            logger.info(f"网关返回的 {cid} 无法在本地校验，不写入缓存")
+        return content, verified
+
+    def stats(self):
+        with self._lock:
+            return {
+                'memory_entries': len(self._memory),
+                'disk_bytes': self._disk_bytes,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+            }
+
+    def clear_memory(self):
+        with self._lock:
+            self._memory.clear()
+            self.memory_hits = 0
+            self.disk_hits = 0
+            self.misses = 0
+
+
+_lock = threading.Lock()
+_cache = None
+
+
+def get_ipfs_cache():
+    """进程内共享的 IPFS 内容缓存"""
+    global _cache
+    if _cache is None:
+        with _lock:
+            if _cache is None:
+                _cache = IPFSContentCache()
+    return _cache
+
+
+def reset():
+    global _cache
+    with _lock:
+        _cache = None
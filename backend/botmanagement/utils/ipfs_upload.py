@@ -0,0 +1,285 @@
+import logging
+import math
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, Max, Q
+from django.utils import timezone
+
+from ..models import BotManagement
+from .images import IMAGE_FIELDS
+from .ipfs_cache import get_ipfs_cache
+from .ipfs import (
+    canonical_json, compute_cid, compute_file_cid, get_uploader, pinned_cids, record_pinned
+)
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_FIELDS = [
+    'ipfs_status', 'ipfs_hash', 'ipfs_url', 'ipfs_uploaded_at', 'ipfs_queued_at', 'ipfs_attempts',
+    'ipfs_next_attempt_at', 'ipfs_error', 'ipfs_image_cids', 'is_ipfs_locked', 'updated_at',
+]
+
+
+def build_bot_metadata(bot):
+    """上传到 IPFS 的机器人元数据，已固定的图片以 ipfs:// 链接嵌入"""
+    metadata = {
+        'name': bot.name,
+        'description': bot.description,
+        'price': str(int(float(bot.price) * 10**6)),  # 转换为USDT的最小单位（6位小数）
+        'trial_time': bot.trial_time,
+        'created_by': bot.user_id
+    }
+    images = [f'ipfs://{bot.ipfs_image_cids[field]}' for field in IMAGE_FIELDS if field in bot.ipfs_image_cids]
+    if images:
+        metadata['images'] = images
+    return metadata
+
+
+def enqueue_upload(bot):
+    """将机器人加入上传队列，状态改为 uploading"""
+    bot.ipfs_status = 'uploading'
+    bot.ipfs_queued_at = timezone.now()
+    bot.ipfs_attempts = 0
+    bot.ipfs_next_attempt_at = None
+    bot.ipfs_error = ''
+    bot.save(update_fields=['ipfs_status', 'ipfs_queued_at', 'ipfs_attempts', 'ipfs_next_attempt_at', 'ipfs_error', 'updated_at'])
+    return bot
+
+
+def apply_upload_result(bot, result, now=None):
+    """
+    根据上传结果更新机器人（不保存）
+
+    失败时按指数退避安排重试，超过最大次数后标记为 failed
+    """
+    now = now or timezone.now()
+    bot.ipfs_attempts += 1
+    if result['success']:
+        bot.ipfs_hash = result['cid']
+        bot.ipfs_url = result['url']
+        bot.ipfs_status = 'uploaded'
+        bot.ipfs_uploaded_at = now
+        bot.ipfs_next_attempt_at = None
+        bot.ipfs_error = ''
+        bot.is_ipfs_locked = True
+        return bot
+
+    bot.ipfs_error = result.get('error', '未知错误')
+    if bot.ipfs_attempts >= settings.IPFS_UPLOAD_MAX_ATTEMPTS:
+        bot.ipfs_status = 'failed'
+        bot.ipfs_next_attempt_at = None
+        logger.error(f"Bot {bot.id} IPFS上传失败，已重试 {bot.ipfs_attempts} 次: {bot.ipfs_error}")
+    else:
+        delay = settings.IPFS_UPLOAD_RETRY_BACKOFF * 2 ** (bot.ipfs_attempts - 1)
+        bot.ipfs_next_attempt_at = now + timedelta(seconds=delay)
+        logger.warning(f"Bot {bot.id} IPFS上传失败，{delay} 秒后重试: {bot.ipfs_error}")
+    return bot
+
+
+def lease_seconds(bot_count, max_workers):
+    """
+    上传一批机器人的租约时长（秒）
+
+    settings.IPFS_UPLOAD_LEASE 未设置时按最坏情况估算：每个机器人的元数据和所有图片都要上传，
+    且每个请求都等到连接和读取超时，按并发数分轮执行。租约短于实际耗时时，其他进程会重复取出并固定同一个机器人
+    """
+    if settings.IPFS_UPLOAD_LEASE:
+        return settings.IPFS_UPLOAD_LEASE
+    timeout = settings.IPFS_UPLOAD_TIMEOUT
+    per_request = sum(timeout) if isinstance(timeout, (tuple, list)) else timeout
+    rounds = math.ceil(bot_count * (1 + len(IMAGE_FIELDS)) / max_workers)
+    return rounds * per_request + settings.IPFS_UPLOAD_LEASE_MARGIN
+
+
+def claim_uploads(batch_size, max_workers=None):
+    """
+    取出一批到期的上传任务，并设置租约避免其他进程重复处理
+
+    上传本身在事务之外进行，不会在网络请求期间持有行锁
+    """
+    max_workers = max_workers or settings.IPFS_UPLOAD_WORKERS
+    now = timezone.now()
+    with transaction.atomic():
+        bots = list(
+            BotManagement.objects
+            .select_related('user')
+            .select_for_update(skip_locked=True, of=('self',))
+            .filter(ipfs_status='uploading')
+            .filter(Q(ipfs_next_attempt_at__isnull=True) | Q(ipfs_next_attempt_at__lte=now))
+            .order_by('ipfs_queued_at', 'id')[:batch_size]
+        )
+        if bots:
+            BotManagement.objects.filter(pk__in=[bot.pk for bot in bots]).update(
+                ipfs_next_attempt_at=now + timedelta(seconds=lease_seconds(len(bots), max_workers))
+            )
+    return bots
+
+
+def pin_images(bots, uploader, executor):
+    """
+    固定机器人尚未上传的图片，CID 写入 bot.ipfs_image_cids（不保存）
+
+    图片以流式请求上传，并发数受 executor 限制；可在本地计算 CID 的小图片先查 CID 表
+
+    Returns:
+        dict: {bot.pk: 错误信息}，只包含有图片上传失败的机器人
+    """
+    tasks = [
+        (bot, field, getattr(bot, field))
+        for bot in bots
+        for field in IMAGE_FIELDS
+        if getattr(bot, field) and field not in bot.ipfs_image_cids
+    ]
+    if not tasks:
+        return {}
+    cids = list(executor.map(lambda task: compute_file_cid(task[2]), tasks))
+    pinned = pinned_cids(cids)
+
+    futures = []
+    for (bot, field, field_file), cid in zip(tasks, cids):
+        if cid in pinned:
+            bot.ipfs_image_cids[field] = cid
+        else:
+            futures.append((bot, field, field_file, executor.submit(uploader.pin_file, field_file, cid)))
+
+    errors = {}
+    uploaded = []
+    for bot, field, field_file, future in futures:
+        result = future.result()
+        if result['success']:
+            bot.ipfs_image_cids[field] = result['cid']
+            uploaded.append((result['cid'], field_file.size))
+        else:
+            errors[bot.pk] = result['error']
+    record_pinned(uploaded)
+    return errors
+
+
+def upload_bots(bots, max_workers=None, uploader=None):
+    """
+    上传一组机器人的图片和元数据
+
+    先固定图片，再把图片 CID 嵌入元数据；元数据在本地计算 CID，已固定过的直接返回。
+    所有上传共享一个线程池和上传器，上传器由 settings.IPFS_BACKEND 决定
+
+    Returns:
+        list: 与 bots 顺序一致的上传结果
+    """
+    if not bots:
+        return []
+    max_workers = max_workers or settings.IPFS_UPLOAD_WORKERS
+    uploader = uploader or get_uploader()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        image_errors = pin_images(bots, uploader, executor)
+
+        results = [None] * len(bots)
+        contents = {}
+        for i, bot in enumerate(bots):
+            if bot.pk in image_errors:
+                results[i] = {'success': False, 'error': image_errors[bot.pk]}
+            else:
+                contents[i] = canonical_json(build_bot_metadata(bot))
+        cids = {i: compute_cid(content) for i, content in contents.items()}
+        pinned = pinned_cids(cids.values())
+        todo = []
+        for i, cid in cids.items():
+            if cid in pinned:
+                results[i] = {'success': True, 'cid': cid, 'url': uploader.gateway_url(cid), 'cached': True}
+            else:
+                todo.append(i)
+        uploaded = list(executor.map(lambda i: uploader.pin_content(contents[i], cids[i]), todo))
+
+    cache = get_ipfs_cache()
+    for i, result in zip(todo, uploaded):
+        results[i] = result
+        if result['success']:
+            # 刚固定的元数据直接写入读缓存，之后读取不需要访问网关
+            cache.put(result['cid'], contents[i])
+    record_pinned(
+        (result['cid'], len(contents[i])) for i, result in zip(todo, uploaded) if result['success']
+    )
+    return results
+
+
+def _save_results(bots, results):
+    """写回上传结果，所有机器人在一次 bulk_update 中更新"""
+    now = timezone.now()
+    for bot, result in zip(bots, results):
+        apply_upload_result(bot, result, now)
+        # bulk_update 不会自动更新 auto_now 字段
+        bot.updated_at = now
+    if bots:
+        BotManagement.objects.bulk_update(bots, UPLOAD_FIELDS)
+    return bots
+
+
+def process_pending_uploads(batch_size=None, max_workers=None):
+    """处理一批待上传的机器人，返回处理过的机器人"""
+    bots = claim_uploads(batch_size or settings.IPFS_UPLOAD_BATCH_SIZE, max_workers)
+    return _save_results(bots, upload_bots(bots, max_workers))
+
+
+def pin_bots(queryset, max_workers=None):
+    """
+    立即并发上传一组机器人（批量上传接口使用）
+
+    已锁定或正在上传的机器人会被跳过；失败的转入后台队列按退避重试
+
+    Returns:
+        tuple: (实际上传的机器人列表, 与之对应的上传结果)
+    """
+    max_workers = max_workers or settings.IPFS_BULK_UPLOAD_WORKERS
+    now = timezone.now()
+    with transaction.atomic():
+        bots = list(
+            queryset
+            .select_for_update(skip_locked=True, of=('self',))
+            .filter(is_ipfs_locked=False)
+            .exclude(ipfs_status='uploading')
+            .order_by('id')
+        )
+        BotManagement.objects.filter(pk__in=[bot.pk for bot in bots]).update(
+            ipfs_status='uploading', ipfs_queued_at=now, ipfs_attempts=0, ipfs_error='',
+            ipfs_next_attempt_at=now + timedelta(seconds=lease_seconds(len(bots), max_workers)), updated_at=now
+        )
+    for bot in bots:
+        bot.ipfs_status = 'uploading'
+        bot.ipfs_queued_at = now
+        bot.ipfs_attempts = 0
+        bot.ipfs_error = ''
+
+    results = upload_bots(bots, max_workers)
+    _save_results(bots, results)
+    return bots, results
+
+
+def upload_metrics(window=3600):
+    """
+    从数据库统计上传队列指标
+
+    Args:
+        window (int): 统计最近多少秒内完成或失败的上传
+    """
+    since = timezone.now() - timedelta(seconds=window)
+    queue = BotManagement.objects.filter(ipfs_status='uploading').aggregate(
+        depth=Count('id'),
+        retrying=Count('id', filter=Q(ipfs_attempts__gt=0)),
+    )
+    finished = BotManagement.objects.filter(ipfs_queued_at__isnull=False, updated_at__gte=since)
+    uploaded = finished.filter(ipfs_status='uploaded', ipfs_uploaded_at__gte=since).annotate(
+        latency=ExpressionWrapper(F('ipfs_uploaded_at') - F('ipfs_queued_at'), output_field=DurationField())
+    ).aggregate(count=Count('id'), avg_latency=Avg('latency'), max_latency=Max('latency'))
+    failed = finished.filter(ipfs_status='failed').count()
+    total = uploaded['count'] + failed
+    return {
+        'queue_depth': queue['depth'],
+        'retrying': queue['retrying'],
+        'uploaded': uploaded['count'],
+        'failed': failed,
+        'failure_rate': round(failed / total, 4) if total else 0.0,
+        'avg_latency_seconds': uploaded['avg_latency'].total_seconds() if uploaded['avg_latency'] else None,
+        'max_latency_seconds': uploaded['max_latency'].total_seconds() if uploaded['max_latency'] else None,
+    }
@@ -0,0 +1,118 @@
+import logging
+import threading
+
+from eth_abi import decode as abi_decode
+from eth_utils.abi import get_abi_output_types
+
+from .chain_head import get_block_number
+from .contracts import get_contract
+from .rpc import RPCBatch, get_web3
+
+logger = logging.getLogger(__name__)
+
+# 每个 aggregate3 调用包含的子调用数，多个分片会合并为一次 JSON-RPC 批量请求
+MULTICALL_CHUNK_SIZE = 500
+
+
+def aggregate(calls, block_identifier='latest', w3=None):
+    """
+    通过 Multicall3.aggregate3 在一次 eth_call 中执行多个合约只读调用
+
+    Args:
+        calls (list): [(contract, fn_name, args), ...]
+        block_identifier: 查询的区块
+
+    Returns:
+        list: 与 calls 顺序一致的解码结果，子调用失败时为 None
+    """
+    if not calls:
+        return []
+    multicall = get_contract('Multicall3')
+    output_types = [
+        get_abi_output_types(contract.get_function_by_name(fn_name).abi)
+        for contract, fn_name, _ in calls
+    ]
+
+    batch = RPCBatch(w3)
+    for start in range(0, len(calls), MULTICALL_CHUNK_SIZE):
+        chunk = [
+            (contract.address, True, contract.encode_abi(fn_name, args=list(args)))
+            for contract, fn_name, args in calls[start:start + MULTICALL_CHUNK_SIZE]
+        ]
+        batch.call(multicall, 'aggregate3', [chunk], block_identifier=block_identifier)
+
+    results = []
+    for chunk_result in batch.execute():
+        results.extend(chunk_result)
+
+    decoded = []
+    for (success, return_data), types in zip(results, output_types):
+        if not success or not return_data:
+            decoded.append(None)
+            continue
+        decoded.append(abi_decode(types, return_data))
+    return decoded
+
+
+class BotDetailsCache:
+    """
+    按区块缓存 getBotDetails 的批量查询结果
+
+    同一区块内的结果不会变化，区块前进后整体失效
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._block_number = None
+        self._details = {}
+
+    def get_many(self, bot_ids, block_number=None, w3=None):
+        """
+        Returns:
+            tuple: ({bot_id: getBotDetails 结果或 None}, 查询所在区块)
+        """
+        w3 = w3 or get_web3()
+        if block_number is None:
+            block_number = get_block_number(w3=w3)
+        bot_ids = {bot_id for bot_id in bot_ids if bot_id is not None}
+
+        with self._lock:
+            if block_number != self._block_number:
+                self._block_number = block_number
+                self._details = {}
+            cached = {bot_id: self._details[bot_id] for bot_id in bot_ids if bot_id in self._details}
+        missing = sorted(bot_ids - cached.keys())
+
+        if missing:
+            registry = get_contract('NewRegistry')
+            results = aggregate(
+                [(registry, 'getBotDetails', [bot_id]) for bot_id in missing],
+                block_identifier=block_number,
+                w3=w3
+            )
+            fetched = dict(zip(missing, results))
+            with self._lock:
+                if block_number == self._block_number:
+                    self._details.update(fetched)
+            cached.update(fetched)
+        return cached, block_number
+
+    def clear(self):
+        with self._lock:
+            self._block_number = None
+            self._details = {}
+
+
+bot_details_cache = BotDetailsCache()
+
+
+def onchain_status(bot_details, block_number):
+    """将 getBotDetails 结果转换为接口返回的链上状态"""
+    if bot_details is None:
+        return None
+    return {
+        'exists': bot_details[6],
+        'is_active': bot_details[5],
+        'developer': bot_details[4],
+        'block_number': block_number,
+    }
@@ -0,0 +1,202 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from ..models import PublishVerification
+from .contracts import get_contract
+from .events import get_event_decoder
+from .receipts import fetch_receipts
+from .rpc import RPCBatch, rpc_settings
+
+logger = logging.getLogger(__name__)
+
+# 校验一批交易时依次发出的批量请求：收据和最新区块、getBotDetails
+VERIFY_REQUESTS = [('eth_getTransactionReceipt', 'eth_getBlockByNumber'), ('eth_call',)]
+
+def request_verification(bot, transaction_hash):
+    """
+    记录一笔待确认的发布交易，失败过的交易会重新排队
+    """
+    verification, created = PublishVerification.objects.get_or_create(
+        bot=bot,
+        transaction_hash=transaction_hash,
+        defaults={'required_confirmations': settings.PUBLISH_REQUIRED_CONFIRMATIONS}
+    )
+    if not created and verification.status == 'failed':
+        verification.status = 'pending'
+        verification.error = ''
+        verification.attempts = 0
+        verification.last_checked_at = None
+        verification.queued_at = timezone.now()
+        verification.save()
+    return verification
+
+
+def find_registered_bot_id(receipt):
+    """从交易日志中获取机器人ID"""
+    event = get_event_decoder().find(receipt, 'BotRegistered', contract='NewRegistry')
+    return event.args['botId'] if event else None
+
+
+def check_bot_details(bot_details):
+    """检查 getBotDetails 的返回值，返回错误信息，通过时返回 None"""
+    if not any(bot_details):
+        return "未找到机器人详情"
+    # exists 字段
+    if not bot_details[6]:
+        return "机器人不存在"
+    # isActive 字段
+    if not bot_details[5]:
+        return "机器人未激活"
+    return None
+
+
+def _fail(verification, error):
+    logger.error(f"发布交易 {verification.transaction_hash} 校验失败: {error}")
+    verification.status = 'failed'
+    verification.error = error
+
+
+def _publish(verification):
+    bot = verification.bot
+    bot.contract_bot_id = verification.contract_bot_id
+    bot.status = 'published'
+    bot.transaction_hash = verification.transaction_hash
+    bot.published_at = timezone.now()
+
+    verification.status = 'confirmed'
+    verification.error = ''
+    logger.info(f"Bot {bot.id} published successfully with transaction hash: {verification.transaction_hash}")
+
+
+def verify_batch(verifications):
+    """
+    批量校验发布交易（不保存）
+
+    未缓存的收据和最新区块号合并为一次批量请求，达到确认数的交易再用一次批量请求查询 getBotDetails
+    """
+    if not verifications:
+        return verifications
+
+    now = timezone.now()
+    receipts, current_block = fetch_receipts([verification.transaction_hash for verification in verifications])
+
+    registered = []
+    for verification, receipt in zip(verifications, receipts):
+        verification.attempts += 1
+        verification.last_checked_at = now
+
+        if isinstance(receipt, Exception):
+            verification.error = str(receipt)
+            continue
+
+        if receipt is None:
+            if (now - verification.queued_at).total_seconds() > settings.PUBLISH_VERIFICATION_TIMEOUT:
+                _fail(verification, "未找到交易收据")
+            continue
+
+        if receipt.status != 1:
+            _fail(verification, f"交易状态不是成功: {receipt.status}")
+            continue
+
+        # 等待区块确认
+        verification.confirmations = max(current_block - receipt.blockNumber, 0)
+        if verification.confirmations < verification.required_confirmations:
+            continue
+
+        bot_id = find_registered_bot_id(receipt)
+        if bot_id is None:
+            _fail(verification, "未从交易日志中找到机器人ID")
+            continue
+        verification.contract_bot_id = bot_id
+        registered.append(verification)
+
+    if registered:
+        registry = get_contract('NewRegistry')
+        batch = RPCBatch()
+        for verification in registered:
+            batch.call(registry, 'getBotDetails', [verification.contract_bot_id])
+        for verification, bot_details in zip(registered, batch.execute(raise_on_error=False)):
+            if isinstance(bot_details, Exception):
+                verification.error = str(bot_details)
+                continue
+            error = check_bot_details(bot_details)
+            if error:
+                _fail(verification, error)
+            else:
+                _publish(verification)
+
+    return verifications
+
+
+def lease_seconds():
+    """
+    校验一批交易的租约时长（秒）
+
+    settings.PUBLISH_VERIFICATION_LEASE 未设置时按最坏情况估算：每个批量请求都在连接重试用完后才连上，
+    并等到读取超时。租约短于实际耗时时，其他进程会重复校验同一笔交易
+    """
+    if settings.PUBLISH_VERIFICATION_LEASE:
+        return settings.PUBLISH_VERIFICATION_LEASE
+    config = rpc_settings()
+    connect = config['CONNECT_TIMEOUT'] * (config['RETRIES'] + 1)
+    total = sum(
+        connect + max(config['METHOD_TIMEOUTS'].get(method, config['TIMEOUT']) for method in methods)
+        for methods in VERIFY_REQUESTS
+    )
+    return total + settings.PUBLISH_VERIFICATION_LEASE_MARGIN
+
+
+def claim_verifications(batch_size):
+    """
+    取出一批最久未检查的待确认交易，并设置租约避免其他进程重复处理
+
+    只在短事务中锁定和设置租约，RPC 请求在事务之外进行，节点缓慢时不会长时间持有行锁
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        verifications = list(
+            PublishVerification.objects
+            .select_related('bot')
+            .select_for_update(skip_locked=True, of=('self',))
+            .filter(status='pending')
+            .filter(Q(lease_expires_at__isnull=True) | Q(lease_expires_at__lte=now))
+            .order_by(F('last_checked_at').asc(nulls_first=True), 'id')[:batch_size]
+        )
+        if verifications:
+            PublishVerification.objects.filter(pk__in=[v.pk for v in verifications]).update(
+                lease_expires_at=now + timedelta(seconds=lease_seconds())
+            )
+    return verifications
+
+
+def _save_results(verifications):
+    """
+    在一个短事务中写回校验结果并释放租约
+
+    租约过期期间已被重新排队或由其他进程处理完的交易不再覆盖
+    """
+    with transaction.atomic():
+        pending = set(
+            PublishVerification.objects.select_for_update()
+            .filter(pk__in=[v.pk for v in verifications], status='pending')
+            .values_list('pk', flat=True)
+        )
+        for verification in verifications:
+            if verification.pk not in pending:
+                continue
+            if verification.status == 'confirmed':
+                verification.bot.save()
+            verification.lease_expires_at = None
+            verification.save()
+    return verifications
+
+
+def process_pending(batch_size=None):
+    """取出一批最久未检查的待确认交易并校验"""
+    verifications = claim_verifications(batch_size or settings.PUBLISH_VERIFICATION_BATCH_SIZE)
+    return _save_results(verify_batch(verifications))
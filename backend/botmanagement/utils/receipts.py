@@ -0,0 +1,133 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .chain_head import publish_head, read_head
+from .rpc import RPCBatch
+
+
+class ReceiptCache:
+    """
+    按交易哈希缓存交易收据（进程内 LRU）
+
+    超过最终性深度的收据不再过期，只会因容量不足被淘汰；
+    尚未最终确认的收据只缓存 PENDING_TTL 秒，以便感知链重组
+    """
+
+    def __init__(self, max_entries=None, finality_depth=None, pending_ttl=None):
+        config = getattr(settings, 'RECEIPT_CACHE', {})
+        self.max_entries = max_entries or config.get('MAX_ENTRIES', 10000)
+        self.finality_depth = config.get('FINALITY_DEPTH', 64) if finality_depth is None else finality_depth
+        self.pending_ttl = config.get('PENDING_TTL', 15) if pending_ttl is None else pending_ttl
+        self._lock = threading.Lock()
+        # tx_hash -> (receipt, 过期时间，最终确认后为 None)
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(transaction_hash):
+        return transaction_hash.lower()
+
+    def is_final(self, receipt, head):
+        return head is not None and head - receipt.blockNumber >= self.finality_depth
+
+    def get(self, transaction_hash, head=None):
+        key = self._key(transaction_hash)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            receipt, expires_at = entry
+            if expires_at is not None:
+                if expires_at <= time.monotonic():
+                    del self._entries[key]
+                    self.evictions += 1
+                    self.misses += 1
+                    return None
+                if self.is_final(receipt, head):
+                    self._entries[key] = (receipt, None)
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return receipt
+
+    def put(self, transaction_hash, receipt, head):
+        if receipt is None:
+            return
+        expires_at = None if self.is_final(receipt, head) else time.monotonic() + self.pending_ttl
+        key = self._key(transaction_hash)
+        with self._lock:
+            self._entries[key] = (receipt, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def promote(self, transaction_hash, head):
+        """区块高度前进后，把已达到最终性深度的收据改为永久缓存"""
+        key = self._key(transaction_hash)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is not None and self.is_final(entry[0], head):
+                self._entries[key] = (entry[0], None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'final': sum(1 for _, expires_at in self._entries.values() if expires_at is None),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+
+receipt_cache = ReceiptCache()
+
+
+def fetch_receipts(transaction_hashes, w3=None):
+    """
+    批量读取交易收据，优先使用缓存
+
+    最新区块号从共享缓存读取；缓存过旧时与未命中的收据合并为一次批量请求
+
+    Returns:
+        tuple: (与输入顺序一致的收据列表, 最新区块号)；未上链为 None，请求失败为 RPCBatchError
+    """
+    results = {transaction_hash: receipt_cache.get(transaction_hash) for transaction_hash in transaction_hashes}
+    misses = [transaction_hash for transaction_hash, receipt in results.items() if receipt is None]
+
+    head = read_head()
+    batch = RPCBatch(w3)
+    for transaction_hash in misses:
+        batch.get_transaction_receipt(transaction_hash)
+    if head is None:
+        batch.get_block('latest')
+    fetched = batch.execute(raise_on_error=False)
+    if head is None:
+        block = fetched.pop()
+        if isinstance(block, Exception):
+            raise block
+        head = publish_head(block['number'], block['timestamp'])
+    head = head.number
+
+    for transaction_hash, receipt in zip(misses, fetched):
+        results[transaction_hash] = receipt
+        if receipt is not None and not isinstance(receipt, Exception):
+            receipt_cache.put(transaction_hash, receipt, head)
+    missed = set(misses)
+    for transaction_hash in transaction_hashes:
+        if transaction_hash not in missed:
+            receipt_cache.promote(transaction_hash, head)
+    return [results[transaction_hash] for transaction_hash in transaction_hashes], head
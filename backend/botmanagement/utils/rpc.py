@@ -0,0 +1,305 @@
+import logging
+import threading
+import time
+
+import requests
+from django.conf import settings
+from eth_abi import decode as abi_decode
+from eth_utils.abi import get_abi_output_types
+from hexbytes import HexBytes
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from web3 import Web3
+from web3.datastructures import AttributeDict
+from web3.providers.rpc import HTTPProvider
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RPC_SETTINGS = {
+    'POOL_SIZE': 20,
+    'CONNECT_TIMEOUT': 3,
+    'TIMEOUT': 10,
+    'METHOD_TIMEOUTS': {},
+    'KEEP_ALIVE': True,
+    'RETRIES': 2,
+}
+
+
+def rpc_settings():
+    """合并默认值与 settings.WEB3_RPC"""
+    config = dict(DEFAULT_RPC_SETTINGS)
+    config.update(getattr(settings, 'WEB3_RPC', {}))
+    return config
+
+
+class RPCStats:
+    """按 JSON-RPC 方法统计调用次数、错误数和耗时"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._methods = {}
+
+    def record(self, method, elapsed, error=False):
+        with self._lock:
+            entry = self._methods.setdefault(method, {'count': 0, 'errors': 0, 'total': 0.0, 'max': 0.0})
+            entry['count'] += 1
+            entry['total'] += elapsed
+            entry['max'] = max(entry['max'], elapsed)
+            if error:
+                entry['errors'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                method: {
+                    'count': entry['count'],
+                    'errors': entry['errors'],
+                    'avg_ms': round(entry['total'] / entry['count'] * 1000, 3),
+                    'max_ms': round(entry['max'] * 1000, 3),
+                }
+                for method, entry in self._methods.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._methods.clear()
+
+
+rpc_stats = RPCStats()
+
+
+def build_session(config=None):
+    """创建带连接池的 requests.Session"""
+    config = config or rpc_settings()
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=config['POOL_SIZE'],
+        pool_block=False,
+        # 只对连接错误重试，避免重复发送已到达节点的请求
+        max_retries=Retry(total=config['RETRIES'], connect=config['RETRIES'], read=0, status=0, backoff_factor=0.1),
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers['Connection'] = 'keep-alive' if config['KEEP_ALIVE'] else 'close'
+    return session
+
+
+class PooledHTTPProvider(HTTPProvider):
+    """
+    所有线程共享同一个连接池的 HTTPProvider
+
+    支持按方法配置超时，并把每次请求的耗时记录到 rpc_stats
+    """
+
+    def __init__(self, endpoint_uri, config=None, session=None, stats=None, **kwargs):
+        super().__init__(endpoint_uri, **kwargs)
+        self.config = config or rpc_settings()
+        self.session = session or build_session(self.config)
+        self.stats = stats or rpc_stats
+
+    def get_timeout(self, method):
+        read_timeout = self.config['METHOD_TIMEOUTS'].get(method, self.config['TIMEOUT'])
+        return (self.config['CONNECT_TIMEOUT'], read_timeout)
+
+    def _post(self, label, request_data, timeout):
+        started = time.monotonic()
+        error = True
+        try:
+            response = self.session.post(
+                self.endpoint_uri,
+                data=request_data,
+                headers=self.get_request_headers(),
+                timeout=timeout,
+            )
+            response.raise_for_status()
+            error = False
+            return response.content
+        finally:
+            self.stats.record(label, time.monotonic() - started, error=error)
+
+    def _make_request(self, method, request_data):
+        return self._post(method, request_data, self.get_timeout(method))
+
+    def make_batch_request(self, batch_requests):
+        request_data = self.encode_batch_rpc_request(batch_requests)
+        # 批量请求使用其中最长的方法超时
+        timeout = max((self.get_timeout(method) for method, _ in batch_requests), default=self.get_timeout('batch'))
+        raw_response = self._post('batch', request_data, timeout)
+        response = self.decode_rpc_response(raw_response)
+        if not isinstance(response, list):
+            # RPC 错误时只返回一个错误对象
+            return response
+        # 解析失败、无效请求等错误的 id 为 null（或缺失），无法与其他 id 比较，按收到的顺序排在最后，
+        # 由 RPCBatch.execute 报错
+        return sorted(response, key=lambda item: (item.get('id') is None, item.get('id') or 0))
+
+
+_lock = threading.Lock()
+_web3 = None
+
+
+def get_web3():
+    """获取进程内共享的 Web3 实例，所有链上调用都应通过它"""
+    global _web3
+    if _web3 is None:
+        with _lock:
+            if _web3 is None:
+                _web3 = Web3(PooledHTTPProvider(settings.WEB3_PROVIDER_URL))
+    return _web3
+
+
+def reset():
+    """关闭连接池并清空共享实例"""
+    global _web3
+    with _lock:
+        if _web3 is not None:
+            _web3.provider.session.close()
+        _web3 = None
+
+
+def _to_int(value):
+    return int(value, 16) if isinstance(value, str) else value
+
+
+def _to_address(value):
+    return Web3.to_checksum_address(value) if value else value
+
+
+def format_log(raw):
+    return AttributeDict({
+        'address': _to_address(raw['address']),
+        'topics': [HexBytes(topic) for topic in raw['topics']],
+        'data': HexBytes(raw['data']),
+        'blockNumber': _to_int(raw.get('blockNumber')),
+        'blockHash': HexBytes(raw['blockHash']) if raw.get('blockHash') else None,
+        'transactionHash': HexBytes(raw['transactionHash']) if raw.get('transactionHash') else None,
+        'transactionIndex': _to_int(raw.get('transactionIndex')),
+        'logIndex': _to_int(raw.get('logIndex')),
+        'removed': raw.get('removed', False),
+    })
+
+
+def format_receipt(raw):
+    if raw is None:
+        return None
+    return AttributeDict({
+        'transactionHash': HexBytes(raw['transactionHash']),
+        'transactionIndex': _to_int(raw['transactionIndex']),
+        'blockHash': HexBytes(raw['blockHash']),
+        'blockNumber': _to_int(raw['blockNumber']),
+        'from': _to_address(raw.get('from')),
+        'to': _to_address(raw.get('to')),
+        'contractAddress': _to_address(raw.get('contractAddress')),
+        'status': _to_int(raw.get('status')),
+        'gasUsed': _to_int(raw.get('gasUsed')),
+        'cumulativeGasUsed': _to_int(raw.get('cumulativeGasUsed')),
+        'logs': [format_log(log) for log in raw.get('logs', [])],
+    })
+
+
+def format_block(raw):
+    if raw is None:
+        return None
+    return AttributeDict({
+        'number': _to_int(raw['number']),
+        'hash': HexBytes(raw['hash']),
+        'parentHash': HexBytes(raw['parentHash']),
+        'timestamp': _to_int(raw['timestamp']),
+    })
+
+
+class RPCBatchError(Exception):
+    """批量请求中单个请求返回的 JSON-RPC 错误"""
+
+    def __init__(self, method, error):
+        self.method = method
+        self.code = error.get('code')
+        super().__init__(f"{method} 失败: {error.get('message')}")
+
+
+class RPCBatch:
+    """
+    将多个相互独立的只读请求合并为一次 JSON-RPC 批量请求
+
+    用法:
+        batch = RPCBatch()
+        batch.get_transaction_receipt(tx_hash)
+        batch.block_number()
+        receipt, block_number = batch.execute()
+    """
+
+    def __init__(self, w3=None):
+        self.w3 = w3 or get_web3()
+        self._requests = []
+
+    def __len__(self):
+        return len(self._requests)
+
+    def add(self, method, params, formatter=None):
+        """添加一个请求，返回其在结果列表中的位置"""
+        self._requests.append((method, params, formatter))
+        return len(self._requests) - 1
+
+    def block_number(self):
+        return self.add('eth_blockNumber', [], _to_int)
+
+    def get_block(self, block_identifier='latest'):
+        if isinstance(block_identifier, int):
+            block_identifier = hex(block_identifier)
+        return self.add('eth_getBlockByNumber', [block_identifier, False], format_block)
+
+    def get_transaction_receipt(self, transaction_hash):
+        return self.add('eth_getTransactionReceipt', [transaction_hash], format_receipt)
+
+    def call(self, contract, fn_name, args=(), block_identifier='latest'):
+        """合约只读调用，结果按 ABI 解码为元组（单个返回值时直接返回该值）"""
+        output_types = get_abi_output_types(contract.get_function_by_name(fn_name).abi)
+
+        def formatter(result):
+            decoded = abi_decode(output_types, HexBytes(result))
+            return decoded[0] if len(decoded) == 1 else decoded
+
+        if isinstance(block_identifier, int):
+            block_identifier = hex(block_identifier)
+        params = [{'to': contract.address, 'data': contract.encode_abi(fn_name, args=list(args))}, block_identifier]
+        return self.add('eth_call', params, formatter)
+
+    def execute(self, raise_on_error=True):
+        """
+        发送批量请求
+
+        Returns:
+            list: 与添加顺序一致的结果；raise_on_error=False 时失败项为 RPCBatchError
+        """
+        if not self._requests:
+            return []
+        requests_info = self._requests
+        self._requests = []
+
+        response = self.w3.provider.make_batch_request([(method, params) for method, params, _ in requests_info])
+        if not isinstance(response, list):
+            raise RPCBatchError('batch', response.get('error') or {})
+        orphan = next((item for item in response if item.get('id') is None), None)
+        if orphan is not None or len(response) != len(requests_info):
+            # 节点返回了 id 为 null 的错误，或少返回了结果（例如部分请求被限流丢弃），
+            # 无法确定结果对应哪个请求，整批视为失败
+            if orphan is not None:
+                message = f"返回了 id 为 null 的错误: {(orphan.get('error') or {}).get('message')}"
+            else:
+                message = f"返回 {len(response)} 个结果，预期 {len(requests_info)} 个"
+            if raise_on_error:
+                raise RPCBatchError('batch', {'message': message})
+            return [RPCBatchError(method, {'message': message}) for method, _, _ in requests_info]
+
+        results = []
+        for (method, _, formatter), item in zip(requests_info, response):
+            if item.get('error'):
+                error = RPCBatchError(method, item['error'])
+                if raise_on_error:
+                    raise error
+                results.append(error)
+                continue
+            result = item.get('result')
+            results.append(formatter(result) if formatter and result is not None else result)
+        return results
@@ -0,0 +1,30 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import Cast
+
+from ..models import BotManagement
+
+# search_vector 使用的分词配置；中英文混合的名称不适合词干化，使用 simple。
+# 修改后需要重建触发器并回填（见 0017 迁移）
+SEARCH_CONFIG = 'simple'
+MAX_QUERY_LENGTH = 200
+
+
+def search_published(text):
+    """
+    全文检索已发布的机器人，返回带 rank 注解的查询集（未排序）
+
+    PostgreSQL 上使用 search_vector 的 GIN 索引，名称权重高于描述；
+    其他数据库（开发环境的 SQLite）没有全文检索，退化为子串匹配，rank 均为 0
+    """
+    bots = BotManagement.objects.filter(status='published')
+    if connection.vendor != 'postgresql':
+        return bots.filter(Q(name__icontains=text) | Q(description__icontains=text)).annotate(
+            rank=Value(0.0, output_field=FloatField())
+        )
+    query = SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+    # ts_rank 返回 real，转成 double precision 后游标中的 rank 才能精确比较
+    return bots.filter(search_vector=query).annotate(
+        rank=Cast(SearchRank(F('search_vector'), query), FloatField())
+    )
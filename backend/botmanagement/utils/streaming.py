@@ -0,0 +1,48 @@
+import orjson
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+# 与 DRF 的 JSONEncoder 一致，UTC 时间以 Z 结尾
+JSON_OPTIONS = orjson.OPT_UTC_Z
+
+
+def iterate(queryset):
+    """
+    分批读取查询集，不缓存结果
+
+    PostgreSQL 上 iterator() 使用服务端游标，每次只取 STREAMING_CHUNK_SIZE 行，内存占用与结果总数无关
+    """
+    return queryset.iterator(chunk_size=settings.STREAMING_CHUNK_SIZE)
+
+
+def json_array(rows):
+    """
+    逐行编码为 JSON 数组，按 STREAMING_BUFFER_SIZE 分块输出字节
+
+    rows 可以是任意可迭代对象（通常是 iterate() 的结果），不会一次性读入内存；
+    缓冲区满即输出，首字节时间与结果总数无关
+    """
+    buffer_size = settings.STREAMING_BUFFER_SIZE
+    parts = [b'[']
+    size = 1
+    separator = b''
+    for row in rows:
+        data = orjson.dumps(row, option=JSON_OPTIONS)
+        parts.append(separator)
+        parts.append(data)
+        separator = b','
+        size += len(data) + 1
+        if size >= buffer_size:
+            yield b''.join(parts)
+            parts = []
+            size = 0
+    parts.append(b']')
+    yield b''.join(parts)
+
+
+class StreamingJSONResponse(StreamingHttpResponse):
+    """以 JSON 数组流式返回 rows，不在内存中构建完整的列表和响应体"""
+
+    def __init__(self, rows, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(json_array(rows), **kwargs)
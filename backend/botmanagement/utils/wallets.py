@@ -0,0 +1,27 @@
+import json
+
+ZERO_ADDRESS = '0x0000000000000000000000000000000000000000'
+
+
+def developer_address(wallets):
+    """
+    从 UserProfile.wallets（JSON 文本）中取开发者钱包地址
+
+    优先返回主钱包地址，如果没有主钱包则返回第一个钱包地址，
+    如果没有任何钱包地址或数据无法解析，返回零地址
+    """
+    if not wallets:
+        return ZERO_ADDRESS
+    try:
+        wallets = json.loads(wallets)
+    except (json.JSONDecodeError, TypeError):
+        return ZERO_ADDRESS
+    if not isinstance(wallets, dict) or not wallets:
+        return ZERO_ADDRESS
+
+    # 绑定钱包时值可能只是 True，只有字典形式的信息才可能标记主钱包
+    address = next(
+        (address for address, info in wallets.items() if isinstance(info, dict) and info.get('is_primary', False)),
+        next(iter(wallets))
+    )
+    return address if address.startswith('0x') else f'0x{address}'
@@ -2,57 +2,83 @@ from rest_framework import viewsets, permissions
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.decorators import action
-from .models import BotManagement
-from .serializers import BotSerializer, BotManagementSerializer
+from rest_framework.exceptions import APIException
+from rest_framework.renderers import JSONRenderer
+from rest_framework.views import APIView
+from django.http import HttpResponse
+from django.utils.http import parse_etags, urlencode
+from .filters import RANGE_FILTERS, PublishedFilterBackend
+from .models import BotManagement, ContractEvent, PublishVerification
+from .pagination import PublishedKeysetPagination, RankedKeysetPagination
+from .serializers import BotSerializer, BotManagementSerializer, ContractEventSerializer, PublishVerificationSerializer
 from user.models import UserProfile
-from .utils.ipfs import IPFSUploader
+from .utils.images import generate_variants
+from .utils.ipfs import IPFSUploader, is_known_cid
+from .utils.ipfs_cache import IPFSFetchError, get_ipfs_cache, guess_content_type
+from .utils.ipfs_upload import enqueue_upload, pin_bots, upload_metrics
 import logging
 from django.utils import timezone
-from web3 import Web3
 from django.conf import settings
 from .permissions import IsAuthenticated
-import json
-import os
+from .utils import catalog_cache
+from .utils.catalog import CatalogRenderer
+from .utils.chain_head import read_head
+from .utils.multicall import bot_details_cache, onchain_status
+from .utils.publish import request_verification
+from .utils.receipts import receipt_cache
+from .utils.rpc import rpc_stats
+from .utils.search import MAX_QUERY_LENGTH, search_published
+from .utils.streaming import StreamingJSONResponse, iterate
 from eth_account import Account
+import re
 
 logger = logging.getLogger(__name__)
 
-# 获取项目根目录
-BASE_DIR = settings.BASE_DIR
+TRANSACTION_HASH_RE = re.compile(r'^0x[0-9a-fA-F]{64}$')
+EVENTS_PAGE_SIZE = 200
+# CID 对应的内容不可变，允许浏览器和 CDN 永久缓存
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# 无法在本地校验的 IPFS 内容（见 IPFSContentCache.lookup）只短时间缓存
+UNVERIFIED_CACHE_CONTROL = 'public, max-age=60'
+# 目录数据可能随时变化，客户端每次都用 ETag 重新验证
+CATALOG_CACHE_CONTROL = 'public, no-cache'
+# 目录接口认识的查询参数，缓存键只由这些参数组成；带其他参数的请求不使用缓存
+CATALOG_QUERY_PARAMS = {
+    PublishedKeysetPagination.cursor_query_param, PublishedKeysetPagination.page_size_query_param,
+    PublishedFilterBackend.developer_query_param, 'q', 'all', *RANGE_FILTERS,
+}
 
-# 合约 ABI 文件路径
-BOT_REGISTRY_ABI_PATH = os.path.join(BASE_DIR.parent, 'blockchain', 'artifacts', 'contracts', 'NewRegistry.sol', 'NewRegistry.json')
-BOT_SUBSCRIPTION_ABI_PATH = os.path.join(BASE_DIR.parent, 'blockchain', 'artifacts', 'contracts', 'NewSubscription.sol', 'NewSubscription.json')
-BOT_PAYMENT_ABI_PATH = os.path.join(BASE_DIR.parent, 'blockchain', 'artifacts', 'contracts', 'NewBotPayment.sol', 'NewBotPayment.json')
 
-# 初始化 Web3
-w3 = Web3(Web3.HTTPProvider(settings.WEB3_PROVIDER_URL))
+def _catalog_key(request):
+    """
+    目录响应的缓存键：地址（响应中的链接是绝对地址）加排序后的已知参数，空值忽略
 
-# 加载合约 ABI
-with open(BOT_REGISTRY_ABI_PATH) as f:
-    BOT_REGISTRY_ABI = json.load(f)['abi']
+    有未知参数或重复参数时返回 None，避免任意查询串在共享缓存中产生新条目
+    """
+    params = []
+    for name, values in request.query_params.lists():
+        if name not in CATALOG_QUERY_PARAMS or len(values) > 1:
+            return None
+        value = values[0]
+        if name == PublishedFilterBackend.developer_query_param:
+            value = value.lower()
+        if value:
+            params.append((name, value))
+    return f'{request.build_absolute_uri(request.path)}?{urlencode(sorted(params))}'
 
-with open(BOT_SUBSCRIPTION_ABI_PATH) as f:
-    BOT_SUBSCRIPTION_ABI = json.load(f)['abi']
 
-with open(BOT_PAYMENT_ABI_PATH) as f:
-    BOT_PAYMENT_ABI = json.load(f)['abi']
+def _generate_variants(bot, fields):
+    """
+    为刚保存的机器人图片生成缩略图，失败时只记录日志
 
-# 创建合约实例
-bot_registry_contract = w3.eth.contract(
-    address=settings.BOT_REGISTRY_CONTRACT_ADDRESS,
-    abi=BOT_REGISTRY_ABI
-)
+    机器人已经保存，缩略图只是附加内容，进程池损坏或存储出错都不应让请求返回 500。
+    请求会等待进程池渲染完成，以便响应中直接返回缩略图地址；耗时随图片大小增长
+    """
+    try:
+        generate_variants(bot, fields)
+    except Exception as e:
+        logger.error(f"Bot {bot.id} 生成缩略图失败: {str(e)}", exc_info=True)
 
-bot_subscription_contract = w3.eth.contract(
-    address=settings.BOT_SUBSCRIPTION_CONTRACT_ADDRESS,
-    abi=BOT_SUBSCRIPTION_ABI
-)
-
-bot_payment_contract = w3.eth.contract(
-    address=settings.BOT_PAYMENT_CONTRACT_ADDRESS,
-    abi=BOT_PAYMENT_ABI
-)
 
 class BotViewSet(viewsets.ModelViewSet):
     queryset = BotManagement.objects.all()
@@ -88,6 +114,8 @@ class BotViewSet(viewsets.ModelViewSet):
             
             # 创建机器人记录
             bot = BotManagement.objects.create(**db_data)
+            if image_file:
+                _generate_variants(bot, ['image1'])
             
             # 序列化并返回数据
             serializer = self.get_serializer(bot)
@@ -110,6 +138,12 @@ class BotViewSet(viewsets.ModelViewSet):
                     {'error': "机器人信息已上传到IPFS，无法修改"},
                     status=status.HTTP_400_BAD_REQUEST
                 )
+            # 上传任务按取出时的数据生成元数据，上传期间修改会让固定的内容与数据库不一致
+            if instance.ipfs_status == 'uploading':
+                return Response(
+                    {'error': "机器人信息正在上传到IPFS，请等待上传完成后再修改"},
+                    status=status.HTTP_409_CONFLICT
+                )
             
             # 获取上传的新图片
             image_file = request.FILES.get('image')
@@ -123,9 +157,13 @@ class BotViewSet(viewsets.ModelViewSet):
             # 如果有新图片，更新图片
             if image_file:
                 instance.image1 = image_file
+                # 旧图片的 CID 作废，下次上传时重新固定
+                instance.ipfs_image_cids.pop('image1', None)
             
             # 保存更新
             instance.save()
+            if image_file:
+                _generate_variants(instance, ['image1'])
             
             # 序列化并返回数据
             serializer = self.get_serializer(instance)
@@ -140,10 +178,12 @@ class BotViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['post'], url_path='upload_to_ipfs')
     def upload_to_ipfs(self, request, pk=None):
+        """
+        将机器人加入 IPFS 上传队列，由后台任务完成上传
+        """
         logger.info(f"Received upload_to_ipfs request for bot {pk}")
         try:
             instance = self.get_object()
-            logger.info(f"Found bot instance: {instance.name}")
             
             # 检查是否已锁定
             if instance.is_ipfs_locked:
@@ -153,45 +193,16 @@ class BotViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # 准备机器人数据
-            bot_data = {
-                'name': instance.name,
-                'description': instance.description,
-                'price': str(int(float(instance.price) * 10**6)),  # 转换为USDT的最小单位（6位小数）
-                'trial_time': instance.trial_time,
-                'created_by': instance.user.id
-            }
-            logger.info(f"Prepared bot data: {bot_data}")
-            
-            # 初始化IPFS上传器
-            ipfs_uploader = IPFSUploader()
-            
-            # 上传到IPFS
-            logger.info("Starting IPFS upload...")
-            ipfs_result = ipfs_uploader.upload_bot_data(bot_data)
-            logger.info(f"IPFS upload result: {ipfs_result}")
-            
-            if not ipfs_result['success']:
-                instance.ipfs_status = 'failed'
-                instance.save()
-                logger.error(f"IPFS upload failed: {ipfs_result.get('error', '未知错误')}")
-                return Response(
-                    {'error': f"IPFS上传失败: {ipfs_result.get('error', '未知错误')}"},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                )
-            
-            # 更新IPFS相关字段
-            instance.ipfs_hash = ipfs_result['cid']
-            instance.ipfs_url = ipfs_result['url']
-            instance.ipfs_status = 'uploaded'
-            instance.ipfs_uploaded_at = timezone.now()
-            instance.is_ipfs_locked = True
-            instance.save()
-            logger.info(f"Successfully updated bot {pk} with IPFS data")
+            # 已在队列中的直接返回当前状态
+            if instance.ipfs_status != 'uploading':
+                enqueue_upload(instance)
+                logger.info(f"Bot {pk} 已加入IPFS上传队列")
             
-            # 序列化并返回数据
-            serializer = self.get_serializer(instance)
-            return Response(serializer.data)
+            return Response({
+                'status': 'uploading',
+                'message': '正在上传到IPFS，请稍后查询机器人的 ipfs_status',
+                'data': self.get_serializer(instance).data
+            }, status=status.HTTP_202_ACCEPTED)
             
         except Exception as e:
             logger.error(f"上传到IPFS失败: {str(e)}")
@@ -200,6 +211,76 @@ class BotViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @action(detail=False, methods=['post'], url_path='bulk_upload_to_ipfs')
+    def bulk_upload_to_ipfs(self, request):
+        """
+        批量上传多个机器人到 IPFS
+
+        并发上传，所有请求复用一个连接池；成功的机器人在一次批量更新中锁定，失败的转入后台队列重试
+        """
+        bot_ids = request.data.get('bot_ids')
+        if not isinstance(bot_ids, list) or not bot_ids:
+            return Response(
+                {'error': "bot_ids 必须是非空数组"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        # 只接受整数或纯数字字符串，true、1.9、" 7 " 等不会被转换成其他 ID
+        if not all(
+            (isinstance(bot_id, int) and not isinstance(bot_id, bool))
+            or (isinstance(bot_id, str) and bot_id.isascii() and bot_id.isdigit())
+            for bot_id in bot_ids
+        ):
+            return Response(
+                {'error': "bot_ids 格式错误"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        bot_ids = list(dict.fromkeys(int(bot_id) for bot_id in bot_ids))
+        if len(bot_ids) > settings.IPFS_BULK_UPLOAD_MAX_BOTS:
+            return Response(
+                {'error': f"单次最多上传 {settings.IPFS_BULK_UPLOAD_MAX_BOTS} 个机器人"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            queryset = self.get_queryset().filter(id__in=bot_ids)
+            existing = dict(queryset.values_list('id', 'is_ipfs_locked'))
+            bots, upload_results = pin_bots(queryset)
+
+            results = {}
+            for bot, result in zip(bots, upload_results):
+                results[bot.id] = {
+                    'id': bot.id,
+                    'success': result['success'],
+                    'ipfs_status': bot.ipfs_status,
+                    'ipfs_hash': bot.ipfs_hash if result['success'] else None,
+                    'ipfs_url': bot.ipfs_url if result['success'] else None,
+                    'error': None if result['success'] else result.get('error', '未知错误'),
+                }
+            for bot_id in bot_ids:
+                if bot_id in results:
+                    continue
+                if bot_id not in existing:
+                    error = "机器人不存在"
+                elif existing[bot_id]:
+                    error = "机器人信息已上传到IPFS，无法重复上传"
+                else:
+                    error = "机器人正在上传中"
+                results[bot_id] = {'id': bot_id, 'success': False, 'error': error}
+
+            uploaded = sum(1 for result in upload_results if result['success'])
+            logger.info(f"批量上传到IPFS完成，请求 {len(bot_ids)} 个，成功 {uploaded} 个")
+            return Response({
+                'uploaded': uploaded,
+                'failed': len(bot_ids) - uploaded,
+                'results': [results[bot_id] for bot_id in bot_ids],
+            })
+        except Exception as e:
+            logger.error(f"批量上传到IPFS失败: {str(e)}")
+            return Response(
+                {'error': f"批量上传到IPFS失败: {str(e)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
     @action(detail=True, methods=['post'])
     def publish(self, request, pk=None):
         try:
@@ -239,12 +320,14 @@ class BotViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['post'])
     def confirm_publish(self, request, pk=None):
+        """
+        记录待确认的发布交易，由后台任务校验后更新为已发布
+        """
         try:
             instance = self.get_object()
             transaction_hash = request.data.get('transactionHash')
             
             logger.info(f"开始处理confirm_publish请求，Bot ID: {pk}, Transaction Hash: {transaction_hash}")
-            logger.info(f"区块浏览器链接: https://sepolia-optimism.etherscan.io/tx/{transaction_hash}")
             
             if not transaction_hash:
                 logger.error("请求中缺少transactionHash")
@@ -253,147 +336,24 @@ class BotViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # 第一步：验证交易是否成功上链
-            try:
-                logger.info(f"开始验证交易 {transaction_hash}")
-                logger.info("尝试获取交易收据...")
-                tx_receipt = w3.eth.get_transaction_receipt(transaction_hash)
-                logger.info(f"成功获取交易收据: {tx_receipt}")
-                
-                if not tx_receipt:
-                    logger.error("未找到交易收据")
-                    return Response(
-                        {'error': "未找到交易收据"},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-                
-                if tx_receipt.status != 1:
-                    logger.error(f"交易状态不是成功: {tx_receipt.status}")
-                    return Response(
-                        {'error': f"交易状态不是成功: {tx_receipt.status}"},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-                
-                # 等待区块确认
-                current_block = w3.eth.block_number
-                confirmations = current_block - tx_receipt.blockNumber
-                logger.info(f"当前区块: {current_block}, 交易区块: {tx_receipt.blockNumber}, 确认数: {confirmations}")
-                
-                # 在开发环境中允许0个确认数
-                if not settings.DEBUG and confirmations < 1:
-                    logger.info(f"等待区块确认，当前确认数: {confirmations}")
-                    return Response(
-                        {'error': "交易正在确认中，请稍后再试"},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-                
-            except Exception as e:
-                logger.error(f"验证交易状态失败: {str(e)}")
-                logger.error("详细错误信息:", exc_info=True)
+            if not TRANSACTION_HASH_RE.match(transaction_hash):
                 return Response(
-                    {'error': f"验证交易状态失败: {str(e)}"},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                )
-            
-            # 第二步：验证机器人是否在合约中注册
-            try:
-                logger.info(f"开始验证机器人 {pk} 的注册状态")
-                logger.info(f"合约地址: {settings.BOT_REGISTRY_CONTRACT_ADDRESS}")
-                
-                # BotRegistered 事件的签名 (移除0x前缀)
-                BOT_REGISTERED_EVENT_SIGNATURE = '07f53422aaa7cc2086d6ad8d6d84bb20a120b5e3c78373124c7d04477836d696'
-                
-                # 从交易日志中获取机器人ID
-                bot_id = None
-                logger.info(f"交易日志数量: {len(tx_receipt.logs)}")
-                for idx, log in enumerate(tx_receipt.logs):
-                    logger.info(f"处理第 {idx+1} 个日志")
-                    logger.info(f"日志地址: {log.address}")
-                    logger.info(f"日志主题: {log.topics}")
-                    
-                    # 添加详细的调试日志
-                    logger.info(f"合约地址比较: {log.address.lower()} == {settings.BOT_REGISTRY_CONTRACT_ADDRESS.lower()}")
-                    logger.info(f"事件签名比较: {log.topics[0].hex().replace('0x', '')} == {BOT_REGISTERED_EVENT_SIGNATURE}")
-                    
-                    if log.address.lower() == settings.BOT_REGISTRY_CONTRACT_ADDRESS.lower():
-                        if log.topics[0].hex().replace('0x', '') == BOT_REGISTERED_EVENT_SIGNATURE:
-                            # 解析日志数据
-                            bot_id = int(log.topics[1].hex(), 16)
-                            logger.info(f"从日志中获取到机器人ID: {bot_id}")
-                            break
-                        else:
-                            logger.warning("合约地址匹配，但事件签名不匹配")
-                    else:
-                        logger.warning("合约地址不匹配")
-                
-                if bot_id is None:
-                    logger.error("未从交易日志中找到机器人ID")
-                    return Response(
-                        {'error': "未从交易日志中找到机器人ID"},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-                
-                # 使用从日志中获取的ID查询合约
-                logger.info(f"开始查询合约，机器人ID: {bot_id}")
-                bot_details = bot_registry_contract.functions.getBotDetails(bot_id).call()
-                logger.info(f"获取到机器人详情: {bot_details}")
-                
-                # 检查返回值是否为空
-                if not any(bot_details):
-                    logger.error("未找到机器人详情")
-                    return Response(
-                        {'error': "未找到机器人详情"},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-                
-                # 检查机器人是否存在且激活
-                exists = bot_details[6]  # exists 字段
-                is_active = bot_details[5]  # isActive 字段
-                
-                if not exists:
-                    logger.error("机器人不存在")
-                    return Response(
-                        {'error': "机器人不存在"},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-                
-                if not is_active:
-                    logger.error("机器人未激活")
-                    return Response(
-                        {'error': "机器人未激活"},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-                
-                # 更新数据库中的机器人ID
-                instance.contract_bot_id = bot_id
-                instance.save()
-                logger.info(f"成功更新数据库中的机器人ID: {bot_id}")
-                
-            except Exception as e:
-                logger.error(f"验证机器人注册状态失败: {str(e)}")
-                logger.error("详细错误信息:", exc_info=True)
-                return Response(
-                    {'error': f"验证机器人注册状态失败: {str(e)}"},
+                    {'error': "交易哈希格式错误"},
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # 所有验证都通过后，更新状态
-            instance.status = 'published'
-            instance.transaction_hash = transaction_hash
-            instance.published_at = timezone.now()
-            instance.save()
+            # 已经确认过的交易直接返回成功
+            if instance.status == 'published' and instance.transaction_hash == transaction_hash:
+                return Response(self._publish_success_data(instance))
             
-            logger.info(f"Bot {pk} published successfully with transaction hash: {transaction_hash}")
+            verification = request_verification(instance, transaction_hash)
+            logger.info(f"发布交易已进入确认队列: {transaction_hash}")
             
             return Response({
-                'status': 'success',
-                'message': '机器人发布成功',
-                'data': {
-                    'transaction_hash': transaction_hash,
-                    'ipfs_hash': instance.ipfs_hash,
-                    'ipfs_url': instance.ipfs_url
-                }
-            })
+                'status': 'pending',
+                'message': '交易正在确认中，请通过 publish_status 查询结果',
+                'data': PublishVerificationSerializer(verification).data
+            }, status=status.HTTP_202_ACCEPTED)
                 
         except Exception as e:
             logger.error(f"确认发布失败: {str(e)}")
@@ -403,16 +363,145 @@ class BotViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    @action(detail=True, methods=['get'])
+    def publish_status(self, request, pk=None):
+        """
+        查询发布交易的确认状态（只读数据库，不访问链上节点）
+        """
+        instance = self.get_object()
+        verification = instance.publish_verifications.first()
+        if instance.status == 'published' and (verification is None or verification.status == 'confirmed'):
+            return Response(self._publish_success_data(instance))
+        
+        if verification is None:
+            return Response(
+                {'error': "未找到发布记录"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        data = {
+            'status': verification.status,
+            'data': PublishVerificationSerializer(verification).data
+        }
+        if verification.status == 'failed':
+            data['error'] = verification.error
+        return Response(data)
+    
+    @action(detail=True, methods=['get'])
+    def events(self, request, pk=None):
+        """
+        获取已同步到本地的链上事件（注册、订阅、支付），不访问链上节点
+        """
+        instance = self.get_object()
+        if instance.contract_bot_id is None:
+            return Response([])
+        
+        events = ContractEvent.objects.filter(contract_bot_id=instance.contract_bot_id)
+        event_name = request.query_params.get('event')
+        if event_name:
+            events = events.filter(event=event_name)
+        events = events.order_by('-block_number', '-log_index')[:EVENTS_PAGE_SIZE]
+        return Response(ContractEventSerializer(events, many=True).data)
+    
+    def _publish_success_data(self, instance):
+        return {
+            'status': 'success',
+            'message': '机器人发布成功',
+            'data': {
+                'transaction_hash': instance.transaction_hash,
+                'ipfs_hash': instance.ipfs_hash,
+                'ipfs_url': instance.ipfs_url
+            }
+        }
+    
+    def _catalog_response(self, request, build=None, stream=None):
+        """
+        按目录版本缓存渲染后的 JSON
+
+        build() 返回渲染好的 JSON 字节或 Response，只缓存 200 响应；客户端 If-None-Match 与当前 ETag 相同时直接返回 304，
+        不读取数据库。机器人发布或更新时目录版本改变，旧的缓存和 ETag 随之失效。
+        传入 stream 时改为流式返回 stream() 产生的行，同样带 ETag，但内容不进入缓存。
+        带未知查询参数的请求（见 _catalog_key）直接构建，不读写缓存，也不返回 ETag
+        """
+        key = _catalog_key(request)
+        if key is None:
+            response = StreamingJSONResponse(stream()) if stream is not None else self._build_catalog(build)
+            if response.status_code == status.HTTP_200_OK:
+                response['Cache-Control'] = CATALOG_CACHE_CONTROL
+            return response
+
+        version = catalog_cache.get_version()
+        etag = catalog_cache.make_etag(version, key)
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        elif stream is not None:
+            response = StreamingJSONResponse(stream())
+        else:
+            content = catalog_cache.get_content(version, key)
+            if content is None:
+                response = self._build_catalog(build)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                catalog_cache.set_content(version, key, response.content)
+            else:
+                response = HttpResponse(content, content_type='application/json')
+        response['ETag'] = etag
+        response['Cache-Control'] = CATALOG_CACHE_CONTROL
+        return response
+
+    def _build_catalog(self, build):
+        """调用 build()，200 响应渲染为 JSON 的 HttpResponse，其他响应原样返回"""
+        built = build()
+        if isinstance(built, bytes):
+            return HttpResponse(built, content_type='application/json')
+        if built.status_code != status.HTTP_200_OK:
+            return built
+        return HttpResponse(JSONRenderer().render(built.data), content_type='application/json')
+
+    def _published_bots(self, request):
+        """按请求中的筛选条件过滤的已发布机器人（未排序）"""
+        # 查询所有状态为published的机器人
+        bots = BotManagement.objects.filter(status='published')
+        return PublishedFilterBackend().filter_queryset(request, bots, self)
+
+    def _published_page(self, request):
+        """当前页的机器人，用 values() 投影构建，不创建模型实例"""
+        renderer = CatalogRenderer(request)
+        bots = renderer.queryset(self._published_bots(request))
+        paginator = PublishedKeysetPagination()
+        page = paginator.paginate_queryset(bots, request, view=self)
+        return paginator, renderer.rows(page)
+
     @action(detail=False, methods=['get'], permission_classes=[permissions.AllowAny])
     def published(self, request):
         """
-        获取所有已发布的机器人
+        分页获取已发布的机器人，按发布时间倒序
+
+        ?cursor= 传入上一页返回的 next 中的游标，?page_size= 指定每页数量；
+        ?all=1 不分页，以流式 JSON 数组返回全部已发布的机器人（顺序相同）。
+        筛选参数（价格、试用时长、开发者、发布时间）见 PublishedFilterBackend
         """
+        def build():
+            paginator, data = self._published_page(request)
+            return CatalogRenderer.render(paginator.get_paginated_response(data).data)
+
+        def stream():
+            # 服务端游标分批读取，逐行投影，内存占用与目录大小无关
+            renderer = CatalogRenderer(request)
+            bots = PublishedKeysetPagination().order(self._published_bots(request))
+            return map(renderer.row, iterate(renderer.queryset(bots)))
+
         try:
-            # 查询所有状态为published的机器人
-            bots = BotManagement.objects.filter(status='published')
-            serializer = self.get_serializer(bots, many=True)
-            return Response(serializer.data)
+            # ?onchain=1 时通过 Multicall3 批量附加合约中的状态，链上状态随区块变化，不进入目录缓存
+            if request.query_params.get('onchain') in ('1', 'true'):
+                paginator, data = self._published_page(request)
+                self._attach_onchain_status(data)
+                return paginator.get_paginated_response(data)
+            if request.query_params.get('all') in ('1', 'true'):
+                return self._catalog_response(request, stream=stream)
+            return self._catalog_response(request, build)
+        except APIException:
+            raise
         except Exception as e:
             logger.error(f"获取已发布机器人失败: {str(e)}")
             return Response(
@@ -420,14 +509,57 @@ class BotViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @action(detail=False, methods=['get'], permission_classes=[permissions.AllowAny])
+    def search(self, request):
+        """
+        全文检索已发布的机器人，按相关度排序并分页
+
+        ?q= 搜索关键词（支持 websearch 语法：引号短语、or、-排除），?cursor= / ?page_size= 同 published
+        """
+        text = request.query_params.get('q', '').strip()
+        if not text:
+            return Response({'error': "缺少搜索关键词"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(text) > MAX_QUERY_LENGTH:
+            return Response(
+                {'error': f"搜索关键词不能超过 {MAX_QUERY_LENGTH} 个字符"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        def build():
+            renderer = CatalogRenderer(request)
+            paginator = RankedKeysetPagination()
+            page = paginator.paginate_queryset(renderer.queryset(search_published(text), 'rank'), request, view=self)
+            return CatalogRenderer.render(paginator.get_paginated_response(renderer.rows(page)).data)
+
+        try:
+            return self._catalog_response(request, build)
+        except APIException:
+            raise
+        except Exception as e:
+            logger.error(f"搜索机器人失败: {str(e)}")
+            return Response(
+                {'error': f"搜索机器人失败: {str(e)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    def _attach_onchain_status(self, items):
+        try:
+            details, block_number = bot_details_cache.get_many(item['contract_bot_id'] for item in items)
+        except Exception as e:
+            # 链上查询失败时仍返回数据库中的数据
+            logger.error(f"批量查询链上状态失败: {str(e)}")
+            details, block_number = {}, None
+        for item in items:
+            item['onchain'] = onchain_status(details.get(item['contract_bot_id']), block_number)
+
     @action(detail=True, methods=['get'], permission_classes=[permissions.AllowAny])
     def get_published_bot(self, request, pk=None):
         """
         获取已发布的特定机器人
         """
-        try:
+        def build():
             # 查询状态为published的特定机器人
-            bot = BotManagement.objects.filter(status='published', id=pk).first()
+            bot = BotManagement.objects.filter(status='published', id=pk).defer('search_vector').first()
             if not bot:
                 return Response(
                     {'error': "机器人不存在或未发布"},
@@ -436,9 +568,69 @@ class BotViewSet(viewsets.ModelViewSet):
             
             serializer = self.get_serializer(bot)
             return Response(serializer.data)
+
+        try:
+            return self._catalog_response(request, build)
         except Exception as e:
             logger.error(f"获取已发布机器人失败: {str(e)}")
             return Response(
                 {'error': f"获取已发布机器人失败: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+
+class MetricsView(APIView):
+    """
+    运行时指标（仅管理员可见）
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    @staticmethod
+    def _chain_head():
+        head = read_head(max_staleness=float('inf'))
+        if head is None:
+            return None
+        return {'number': head.number, 'timestamp': head.timestamp, 'age': round(head.age, 3)}
+
+    def get(self, request):
+        return Response({
+            'rpc': rpc_stats.snapshot(),
+            'receipt_cache': receipt_cache.stats(),
+            'ipfs_cache': get_ipfs_cache().stats(),
+            'chain_head': self._chain_head(),
+            'publish_queue': {
+                'pending': PublishVerification.objects.filter(status='pending').count(),
+            },
+            'ipfs_uploads': upload_metrics(),
+        })
+
+
+class IPFSContentView(APIView):
+    """
+    按 CID 返回本站固定过的 IPFS 内容，依次读取内存缓存、磁盘缓存和网关
+
+    未知的 CID 返回 404，不访问网关；网关返回但无法在本地校验的内容只短时间缓存，不返回 ETag
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, cid):
+        etag = f'"{cid}"'
+        if request.headers.get('If-None-Match') == etag:
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        elif not is_known_cid(cid):
+            return Response({'error': '内容不存在'}, status=status.HTTP_404_NOT_FOUND)
+        else:
+            try:
+                content, verified = get_ipfs_cache().lookup(cid)
+            except ValueError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            except IPFSFetchError as e:
+                logger.error(f"读取IPFS内容失败: {str(e)}")
+                return Response({'error': str(e)}, status=status.HTTP_502_BAD_GATEWAY)
+            response = HttpResponse(content, content_type=guess_content_type(content))
+            if not verified:
+                response['Cache-Control'] = UNVERIFIED_CACHE_CONTROL
+                return response
+        response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        response['ETag'] = etag
+        return response
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from subscription.stats import rebuild
+
+
+class Command(BaseCommand):
+    help = '按订阅表重新计算机器人订阅统计（BotSubscriptionStats），用于修复统计或批量导入订阅之后'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bot', type=int, nargs='+', help='只重算指定机器人 ID，默认重算全部')
+        parser.add_argument('--batch-size', type=int, default=1000, help='每批写入的行数')
+
+    def handle(self, *args, **options):
+        count = rebuild(options['bot'], batch_size=options['batch_size'])
+        self.stdout.write(f"已重建 {count} 个机器人的订阅统计")
@@ -0,0 +1,43 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from subscription.stats import rebuild, rollover
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        '定期重算有订阅到期或试用结束的机器人的订阅统计（BotSubscriptionStats），必须常驻运行，'
+        '否则 active_subscriptions / active_trials 会一直计入已过期的订阅'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='重算全部机器人后退出（用于定时任务）')
+        parser.add_argument('--batch-size', type=int, default=1000, help='每批写入的行数')
+        parser.add_argument('--interval', type=float, default=settings.SUBSCRIPTION_STATS_INTERVAL)
+
+    def handle(self, *args, **options):
+        since = None
+        while True:
+            now = timezone.now()
+            try:
+                if since is None:
+                    # 启动时不知道上次处理到哪里，先全部重算一次
+                    count = rebuild(batch_size=options['batch_size'])
+                    logger.info(f"已重算 {count} 个机器人的订阅统计")
+                else:
+                    count = rollover(since, now, batch_size=options['batch_size'])
+                    if count:
+                        logger.info(f"{count} 个机器人有订阅到期或试用结束，已重算统计")
+                since = now
+            except Exception as e:
+                logger.error(f"重算订阅统计失败: {str(e)}", exc_info=True)
+
+            if options['once']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.6 on 2026-10-18 09:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_stats(apps, schema_editor):
+    """按已有订阅计算初始统计，一次 GROUP BY"""
+    Subscription = apps.get_model('subscription', 'Subscription')
+    BotSubscriptionStats = apps.get_model('subscription', 'BotSubscriptionStats')
+    rows = Subscription.objects.values('bot_id').annotate(
+        subscriptions=Count('id'),
+        active_subscriptions=Count('id', filter=Q(active=True)),
+        active_trials=Count('id', filter=Q(active=True, status='trial')),
+        revenue=Sum('payment_amount'),
+    ).order_by()
+    BotSubscriptionStats.objects.bulk_create([BotSubscriptionStats(**values) for values in rows], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('botmanagement', '0017_botmanagement_search_vector'),
+        ('subscription', '0002_rename_trial_period_days_subscription_trial_period_hours'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BotSubscriptionStats',
+            fields=[
+                ('bot', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='subscription_stats', serialize=False, to='botmanagement.botmanagement')),
+                ('subscriptions', models.IntegerField(default=0)),
+                ('active_subscriptions', models.IntegerField(default=0)),
+                ('active_trials', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
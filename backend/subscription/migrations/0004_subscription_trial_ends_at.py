@@ -0,0 +1,51 @@
+# Generated by Django 5.1.6 on 2026-10-18 09:58
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.utils import timezone
+
+
+def backfill_trial_ends_at(apps, schema_editor):
+    """按 payment_time + trial_period_hours 填充试用结束时间，并按时间重算有效订阅和试用数"""
+    Subscription = apps.get_model('subscription', 'Subscription')
+    BotSubscriptionStats = apps.get_model('subscription', 'BotSubscriptionStats')
+    subscriptions = []
+    for subscription in Subscription.objects.filter(trial_period_hours__gt=0).only('payment_time', 'trial_period_hours'):
+        subscription.trial_ends_at = subscription.payment_time + timedelta(hours=subscription.trial_period_hours)
+        subscriptions.append(subscription)
+    Subscription.objects.bulk_update(subscriptions, ['trial_ends_at'], batch_size=1000)
+
+    now = timezone.now()
+    active = Q(active=True, expiration_date__gt=now)
+    rows = Subscription.objects.values('bot_id').annotate(
+        active_subscriptions=Count('id', filter=active),
+        active_trials=Count('id', filter=active & Q(trial_ends_at__gt=now)),
+    ).order_by()
+    BotSubscriptionStats.objects.bulk_update(
+        [BotSubscriptionStats(bot_id=values['bot_id'], active_subscriptions=values['active_subscriptions'],
+                              active_trials=values['active_trials']) for values in rows],
+        ['active_subscriptions', 'active_trials'], batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscription', '0003_bot_subscription_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subscription',
+            name='trial_ends_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='subscription',
+            name='expiration_date',
+            field=models.DateTimeField(db_index=True),
+        ),
+        migrations.RunPython(backfill_trial_ends_at, migrations.RunPython.noop),
+    ]
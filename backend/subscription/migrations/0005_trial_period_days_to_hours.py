@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.db import migrations
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+
+def convert_trial_days_to_hours(apps, schema_editor):
+    """
+    已有订阅的 trial_period_hours 都是由 SubscriptionCreateView 直接复制的 bot.trial_time（天数），
+    换算为小时，并重新计算 trial_ends_at 和试用统计
+    """
+    Subscription = apps.get_model('subscription', 'Subscription')
+    BotSubscriptionStats = apps.get_model('subscription', 'BotSubscriptionStats')
+    trials = Subscription.objects.filter(trial_period_hours__gt=0)
+    trials.update(trial_period_hours=F('trial_period_hours') * 24)
+    subscriptions = []
+    for subscription in trials.only('payment_time', 'trial_period_hours'):
+        subscription.trial_ends_at = subscription.payment_time + timedelta(hours=subscription.trial_period_hours)
+        subscriptions.append(subscription)
+    Subscription.objects.bulk_update(subscriptions, ['trial_ends_at'], batch_size=1000)
+
+    now = timezone.now()
+    rows = Subscription.objects.values('bot_id').annotate(
+        active_trials=Count('id', filter=Q(active=True, expiration_date__gt=now, trial_ends_at__gt=now)),
+    ).order_by()
+    BotSubscriptionStats.objects.bulk_update(
+        [BotSubscriptionStats(bot_id=values['bot_id'], active_trials=values['active_trials']) for values in rows],
+        ['active_trials'], batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscription', '0004_subscription_trial_ends_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(convert_trial_days_to_hours, migrations.RunPython.noop),
+    ]
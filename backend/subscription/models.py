@@ -1,5 +1,8 @@
+from datetime import timedelta
+
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 from botmanagement.models import BotManagement
 
 class Subscription(models.Model):
@@ -15,10 +18,40 @@ class Subscription(models.Model):
     payment_amount = models.DecimalField(max_digits=10, decimal_places=2)
     currency = models.CharField(max_length=10, default='ETH-USDT')  # Supports multiple chains
     transaction_hash = models.CharField(max_length=255, unique=True)  # Blockchain transaction hash
-    expiration_date = models.DateTimeField()
+    expiration_date = models.DateTimeField(db_index=True)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
     active = models.BooleanField(default=False)  # Whether the bot is currently active
     trial_period_hours = models.IntegerField(default=0)
+    trial_ends_at = models.DateTimeField(null=True, blank=True, db_index=True)  # 试用结束时间，保存时按 trial_period_hours 计算，没有试用为空
+
+    def __str__(self):
+        return f"Subscription {self.id} - {self.user.email} - {self.bot.name}"
+
+    def save(self, *args, **kwargs):
+        # 新建时 payment_time 要到写入时才由 auto_now_add 填充，这里先按当前时间计算
+        if self.trial_period_hours > 0:
+            self.trial_ends_at = (self.payment_time or timezone.now()) + timedelta(hours=self.trial_period_hours)
+        else:
+            self.trial_ends_at = None
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'payment_time', 'trial_period_hours'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'trial_ends_at'}
+        super().save(*args, **kwargs)
+
+class BotSubscriptionStats(models.Model):
+    """
+    每个机器人的订阅统计，由 Subscription 的信号增量维护（见 signals.py），
+    rebuild_subscription_stats 命令可按订阅表整体重算
+
+    active_subscriptions 和 active_trials 与时间有关：订阅到期、试用结束时没有任何写入，
+    必须常驻运行 rollover_subscription_stats 命令，重算越过到期或试用结束时间的机器人
+    """
+    bot = models.OneToOneField(BotManagement, on_delete=models.CASCADE, primary_key=True, related_name='subscription_stats')
+    subscriptions = models.IntegerField(default=0)  # 订阅记录总数
+    active_subscriptions = models.IntegerField(default=0)  # active=True 且未到期的订阅
+    active_trials = models.IntegerField(default=0)  # 其中试用尚未结束（trial_ends_at 之前）的订阅
+    revenue = models.DecimalField(max_digits=20, decimal_places=2, default=0)  # 所有订阅的 payment_amount 合计
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
-        return f"Subscription {self.id} - {self.user.email} - {self.bot.name}"
\ No newline at end of file
+        return f"Stats {self.bot_id}: {self.active_subscriptions}/{self.subscriptions}"
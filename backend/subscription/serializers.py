@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Subscription
+from .models import BotSubscriptionStats, Subscription
 
 class SubscriptionSerializer(serializers.ModelSerializer):
     trial_period_hours = serializers.IntegerField(read_only=True)
@@ -20,4 +20,23 @@ class SubscriptionSerializer(serializers.ModelSerializer):
             'status',
             'active',
             'trial_period_hours'
-        ] 
\ No newline at end of file
+        ]
+
+
+class BotSubscriptionStatsSerializer(serializers.ModelSerializer):
+    bot = serializers.IntegerField(source='bot_id', read_only=True)
+    name = serializers.CharField(source='bot.name', read_only=True)
+    contract_bot_id = serializers.IntegerField(source='bot.contract_bot_id', read_only=True)
+
+    class Meta:
+        model = BotSubscriptionStats
+        fields = [
+            'bot',
+            'name',
+            'contract_bot_id',
+            'subscriptions',
+            'active_subscriptions',
+            'active_trials',
+            'revenue',
+            'updated_at'
+        ]
@@ -0,0 +1,38 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import stats
+from .models import Subscription
+
+
+def _source_values(instance):
+    return {name: getattr(instance, name) for name in stats.SOURCE_FIELDS}
+
+
+@receiver(pre_save, sender=Subscription)
+def remember_stats_source(sender, instance, raw=False, **kwargs):
+    """保存前读取数据库中原来的值，保存后按差值更新统计"""
+    instance._stats_before = None
+    if raw or instance._state.adding:
+        return
+    instance._stats_before = Subscription.objects.filter(pk=instance.pk).values(*stats.SOURCE_FIELDS).first()
+
+
+@receiver(post_save, sender=Subscription)
+def update_stats(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    before = getattr(instance, '_stats_before', None)
+    after = _source_values(instance)
+    if before is not None and update_fields is not None:
+        # 只保存了部分字段时，其余字段在数据库中仍是原来的值
+        after = {
+            name: value if name in update_fields or name.removesuffix('_id') in update_fields else before[name]
+            for name, value in after.items()
+        }
+    stats.record_change(before, after)
+
+
+@receiver(post_delete, sender=Subscription)
+def remove_from_stats(sender, instance, **kwargs):
+    stats.record_change(_source_values(instance), None)
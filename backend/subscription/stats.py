@@ -0,0 +1,131 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef, Q, Sum
+from django.utils import timezone
+
+from .models import BotSubscriptionStats, Subscription
+
+# 影响统计的订阅字段
+SOURCE_FIELDS = ['bot_id', 'active', 'expiration_date', 'trial_ends_at', 'payment_amount']
+# BotSubscriptionStats 中的计数列
+COUNTERS = ['subscriptions', 'active_subscriptions', 'active_trials', 'revenue']
+
+
+def contribution(values, now):
+    """
+    一条订阅（SOURCE_FIELDS 的值）在 now 时对所属机器人统计的贡献
+
+    与订阅状态接口一致，按时间而不是客户端提交的 status 判断：未到期才算有效，
+    试用在 trial_ends_at 之前有效
+    """
+    active = bool(values['active']) and values['expiration_date'] > now
+    trial_ends_at = values['trial_ends_at']
+    return {
+        'subscriptions': 1,
+        'active_subscriptions': int(active),
+        'active_trials': int(active and trial_ends_at is not None and now < trial_ends_at),
+        'revenue': Decimal(str(values['payment_amount'] or 0)),
+    }
+
+
+def apply(bot_id, delta):
+    """在已有的统计行上原子地加上 delta"""
+    delta = {name: value for name, value in delta.items() if value}
+    if delta:
+        BotSubscriptionStats.objects.filter(bot_id=bot_id).update(
+            **{name: F(name) + value for name, value in delta.items()}
+        )
+
+
+def record_change(before, after):
+    """
+    按一条订阅保存或删除前后的字段值更新统计，before 为 None 表示新建，after 为 None 表示删除
+
+    机器人还没有统计行时先插入全为 0 的行（ON CONFLICT DO NOTHING），再用 F() 加上差值：
+    同一机器人的第一批订阅并发创建时，后插入的一方等待并跳过，两边的差值都会累加，不会互相覆盖。
+    删除时不创建，避免机器人级联删除过程中重新插入统计行。
+
+    before 和 after 按同一时刻计算贡献；此前越过到期或试用结束时间造成的差异由 rollover() 重算
+    """
+    now = timezone.now()
+    deltas = {}
+    for values, sign in ((before, -1), (after, 1)):
+        if values is None:
+            continue
+        delta = deltas.setdefault(values['bot_id'], dict.fromkeys(COUNTERS, 0))
+        for name, value in contribution(values, now).items():
+            delta[name] += sign * value
+    if after is not None:
+        BotSubscriptionStats.objects.bulk_create(
+            [BotSubscriptionStats(bot_id=bot_id) for bot_id in deltas], ignore_conflicts=True
+        )
+    for bot_id, delta in deltas.items():
+        apply(bot_id, delta)
+
+
+def deactivate(subscriptions):
+    """
+    批量将已到期的订阅标记为未激活，返回更新的条数
+
+    已到期的订阅对统计的贡献已经是 0，update() 不触发信号也不需要调整统计
+    """
+    return subscriptions.filter(active=True, expiration_date__lte=timezone.now()).update(active=False)
+
+
+def aggregate(subscriptions, now):
+    """按机器人分组计算 now 时的统计，一次 GROUP BY 查询"""
+    active = Q(active=True, expiration_date__gt=now)
+    return subscriptions.values('bot_id').annotate(
+        subscriptions=Count('id'),
+        active_subscriptions=Count('id', filter=active),
+        active_trials=Count('id', filter=active & Q(trial_ends_at__gt=now)),
+        revenue=Sum('payment_amount'),
+    ).order_by()
+
+
+def rebuild(bot_ids=None, batch_size=1000, now=None):
+    """
+    按订阅表重新计算 now（默认当前时间）时的统计，bot_ids 为 None 时重算全部机器人，返回写入的行数
+
+    已有的行原地覆盖（upsert），没有订阅的机器人的统计行删除。
+    计算前先锁定统计行：并发的 record_change() 要么在锁定前提交、其订阅被计入，
+    要么等重算提交后再加上差值，不会被覆盖
+    """
+    subscriptions = Subscription.objects.all()
+    existing = BotSubscriptionStats.objects.all()
+    if bot_ids is not None:
+        subscriptions = subscriptions.filter(bot_id__in=bot_ids)
+        existing = existing.filter(bot_id__in=bot_ids)
+    stale = existing.filter(~Exists(Subscription.objects.filter(bot=OuterRef('bot'))))
+
+    with transaction.atomic():
+        list(existing.select_for_update().order_by('bot_id').values_list('bot_id', flat=True))
+        rows = [BotSubscriptionStats(**values) for values in aggregate(subscriptions, now or timezone.now())]
+        BotSubscriptionStats.objects.bulk_create(
+            rows, batch_size=batch_size, update_conflicts=True, unique_fields=['bot'],
+            update_fields=COUNTERS + ['updated_at'],
+        )
+        stale.delete()
+    return len(rows)
+
+
+def rollover(since, now, batch_size=1000):
+    """
+    重算在 (since, now] 内有订阅到期或试用结束的机器人，返回重算的机器人数
+
+    这些时间点上数据库没有写入、信号不会触发，由 rollover_subscription_stats 命令定期调用
+    """
+    crossed = Q(expiration_date__gt=since, expiration_date__lte=now) | Q(trial_ends_at__gt=since, trial_ends_at__lte=now)
+    bot_ids = list(Subscription.objects.filter(crossed).values_list('bot_id', flat=True).distinct().order_by())
+    if bot_ids:
+        rebuild(bot_ids, batch_size=batch_size, now=now)
+    return len(bot_ids)
+
+
+def stats_for(bot):
+    """机器人的统计行，还没有订阅时返回全为 0 的未保存实例"""
+    try:
+        return bot.subscription_stats
+    except BotSubscriptionStats.DoesNotExist:
+        return BotSubscriptionStats(bot=bot)
@@ -1,3 +1,158 @@
-from django.test import TestCase
+import io
+import json
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from botmanagement.models import BotManagement
+from .models import BotSubscriptionStats, Subscription
+from .stats import rollover
+
+
+class UserSubscriptionStatusTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='subscriber', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.bot = BotManagement.objects.create(
+            user=self.user, name='bot', description='描述', price='1.00', status='published', contract_bot_id=3
+        )
+        self.url = reverse('subscription-status')
+
+    def _subscribe(self, tx, expires_in, active=True, trial_hours=0):
+        return Subscription.objects.create(
+            user=self.user, bot=self.bot, payment_amount='1.00', transaction_hash=tx,
+            expiration_date=timezone.now() + expires_in, active=active, trial_period_hours=trial_hours
+        )
+
+    def test_create_converts_bot_trial_days_to_hours(self):
+        self.bot.trial_time = 1
+        self.bot.save()
+        response = self.client.post(reverse('subscription-create'), {
+            'bot': self.bot.id, 'payment_amount': '1.00', 'transaction_hash': '0x1', 'status': 'trial',
+            'active': True, 'expiration_date': (timezone.now() + timedelta(days=30)).isoformat(),
+        }, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        subscription = Subscription.objects.get(transaction_hash='0x1')
+        self.assertEqual(subscription.trial_period_hours, 24)
+        self.assertAlmostEqual(
+            subscription.trial_ends_at, timezone.now() + timedelta(hours=24), delta=timedelta(minutes=1)
+        )
+        self.assertEqual(BotSubscriptionStats.objects.get(bot=self.bot).active_trials, 1)
+
+    def test_no_subscription(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.json()['status'], 'no_subscription')
+
+    @override_settings(STREAMING_CHUNK_SIZE=1)
+    def test_streams_status_and_deactivates_expired(self):
+        expired = self._subscribe('0x1', timedelta(days=-1))
+        self._subscribe('0x2', timedelta(days=30), trial_hours=24)
+        self._subscribe('0x3', timedelta(days=30), active=False)
+
+        response = self.client.get(self.url)
+
+        self.assertTrue(response.streaming)
+        items = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(
+            [item['status_description'] for item in items], ['cancelled_not_expired', 'trial', 'expired']
+        )
+        self.assertEqual(items[0]['contract_bot_id'], 3)
+        self.assertTrue(items[2]['expiration_date'].endswith('Z'))
+        expired.refresh_from_db()
+        self.assertFalse(expired.active)
+        # 已到期的订阅不计入有效订阅和试用
+        stats = BotSubscriptionStats.objects.get(bot=self.bot)
+        self.assertEqual((stats.subscriptions, stats.active_subscriptions, stats.active_trials), (3, 1, 1))
+
+
+class BotSubscriptionStatsTest(APITestCase):
+    def setUp(self):
+        self.developer = User.objects.create_user(username='dev', password='testpass123')
+        self.subscriber = User.objects.create_user(username='subscriber', password='testpass123')
+        self.bot = BotManagement.objects.create(user=self.developer, name='bot', description='描述', price='1.00')
+        self.other = BotManagement.objects.create(user=self.developer, name='other', description='描述', price='1.00')
+
+    def _subscribe(self, tx, amount, trial_hours=0, active=True, bot=None, expires_in=timedelta(days=30)):
+        return Subscription.objects.create(
+            user=self.subscriber, bot=bot or self.bot, payment_amount=amount, transaction_hash=tx, status='trial',
+            expiration_date=timezone.now() + expires_in, active=active, trial_period_hours=trial_hours
+        )
+
+    def _stats(self, bot=None):
+        stats = BotSubscriptionStats.objects.get(bot=bot or self.bot)
+        return stats.subscriptions, stats.active_subscriptions, stats.active_trials, stats.revenue
+
+    def test_stats_follow_subscription_changes(self):
+        trial = self._subscribe('0x1', '1.50', trial_hours=24)
+        # 客户端提交的 status 不影响统计，试用只看 trial_ends_at
+        paid = self._subscribe('0x2', '2.00')
+        self.assertEqual(self._stats(), (2, 2, 1, Decimal('3.50')))
+
+        trial.active = False
+        trial.save(update_fields=['active'])
+        paid.bot = self.other
+        paid.save()
+        self.assertEqual(self._stats(), (1, 0, 0, Decimal('1.50')))
+        self.assertEqual(self._stats(self.other), (1, 1, 0, Decimal('2.00')))
+
+        trial.delete()
+        self.assertEqual(self._stats(), (0, 0, 0, Decimal('0.00')))
+
+    def test_rebuild_recomputes_from_subscriptions(self):
+        self._subscribe('0x1', '1.50', trial_hours=24)
+        self._subscribe('0x2', '2.00', active=False, bot=self.other)
+        expected = {stats.bot_id: stats.revenue for stats in BotSubscriptionStats.objects.all()}
+        BotSubscriptionStats.objects.update(subscriptions=99, revenue=0)
+        Subscription.objects.filter(bot=self.other).delete()
+
+        call_command('rebuild_subscription_stats', stdout=io.StringIO())
+
+        self.assertEqual(self._stats(), (1, 1, 1, expected[self.bot.id]))
+        self.assertFalse(BotSubscriptionStats.objects.filter(bot=self.other).exists())
+
+    def test_rollover_expires_trials_and_subscriptions(self):
+        trial = self._subscribe('0x1', '1.50', trial_hours=1)
+        paid = self._subscribe('0x2', '2.00', expires_in=timedelta(hours=2))
+        self._subscribe('0x3', '3.00', bot=self.other)
+        self.assertEqual(self._stats(), (2, 2, 1, Decimal('3.50')))
+
+        start = timezone.now()
+        self.assertEqual(rollover(start, start + timedelta(minutes=30)), 0)
+        self.assertEqual(rollover(start, trial.trial_ends_at), 1)
+        self.assertEqual(self._stats(), (2, 2, 0, Decimal('3.50')))
+        # 还没到期的订阅保存时仍计入有效订阅
+        paid.payment_amount = '2.50'
+        paid.save()
+        self.assertEqual(self._stats(), (2, 2, 0, Decimal('4.00')))
+
+        with mock.patch('django.utils.timezone.now', return_value=paid.expiration_date + timedelta(seconds=1)):
+            call_command('rollover_subscription_stats', once=True)
+        self.assertEqual(self._stats(), (2, 1, 0, Decimal('4.00')))
+        self.assertEqual(self._stats(self.other), (1, 1, 0, Decimal('3.00')))
+
+    def test_stats_endpoints(self):
+        self._subscribe('0x1', '1.50', trial_hours=24)
+        self._subscribe('0x2', '2.00')
+        self.client.force_authenticate(user=self.developer)
+
+        data = self.client.get(reverse('subscription-stats')).json()
+        self.assertEqual(
+            data['totals'], {'subscriptions': 2, 'active_subscriptions': 2, 'active_trials': 1, 'revenue': '3.50'}
+        )
+        # 没有订阅的机器人也会列出，计数为 0
+        self.assertEqual([(item['name'], item['subscriptions']) for item in data['bots']], [('bot', 2), ('other', 0)])
+
+        response = self.client.get(reverse('subscription-bot-stats', args=[self.bot.id]))
+        self.assertEqual((response.json()['active_trials'], response.json()['revenue']), (1, '3.50'))
+
+        self.client.force_authenticate(user=self.subscriber)
+        response = self.client.get(reverse('subscription-bot-stats', args=[self.bot.id]))
+        self.assertEqual(response.status_code, 404)
@@ -1,8 +1,12 @@
 from django.urls import path
-from .views import SubscriptionCreateView, UserSubscriptionStatusView, SetInactiveSubscriptionView
+from .views import (
+    BotStatsView, DeveloperStatsView, SubscriptionCreateView, UserSubscriptionStatusView, SetInactiveSubscriptionView
+)
 
 urlpatterns = [
     path('create/', SubscriptionCreateView.as_view(), name='subscription-create'),
     path('status/', UserSubscriptionStatusView.as_view(), name='subscription-status'),
     path('set_inactive/', SetInactiveSubscriptionView.as_view()),
+    path('stats/', DeveloperStatsView.as_view(), name='subscription-stats'),
+    path('stats/<int:bot_id>/', BotStatsView.as_view(), name='subscription-bot-stats'),
 ]
\ No newline at end of file
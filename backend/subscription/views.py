@@ -4,10 +4,12 @@ from rest_framework.response import Response
 from rest_framework import status, permissions
 from .models import Subscription
 from botmanagement.models import BotManagement
+from botmanagement.utils.streaming import StreamingJSONResponse, iterate
 from django.contrib.auth.models import User
-from .serializers import SubscriptionSerializer
+from .serializers import BotSubscriptionStatsSerializer, SubscriptionSerializer
+from .stats import COUNTERS, deactivate, stats_for
 from django.utils import timezone
-from datetime import timedelta
+from decimal import Decimal
 from django.utils.dateformat import DateFormat
 from django.utils.timezone import localtime
 
@@ -28,8 +30,8 @@ class SubscriptionCreateView(APIView):
         serializer = SubscriptionSerializer(data=data)
         if serializer.is_valid():
             sub = serializer.save()
-            # 从关联的 bot 中获取 trial_time 并赋值给 subscription 的 trial_period_hours
-            sub.trial_period_hours = bot.trial_time
+            # bot.trial_time 以天为单位，换算为小时写入 trial_period_hours（保存时据此计算 trial_ends_at）
+            sub.trial_period_hours = bot.trial_time * 24
             sub.save()
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -40,39 +42,39 @@ class UserSubscriptionStatusView(APIView):
 
     def get(self, request):
         user = request.user
-        subscriptions = Subscription.objects.filter(user=user).order_by('-payment_time')
+        subscriptions = Subscription.objects.filter(user=user)
         if not subscriptions.exists():
             return Response({'status': 'no_subscription', 'message': 'No subscription record.'}, status=status.HTTP_200_OK)
 
         now = timezone.now()
-        result = []
-        for subscription in subscriptions:
-            serializer = SubscriptionSerializer(subscription)
-            data = serializer.data
-
-            if subscription.expiration_date < now:
-                data['status_description'] = 'expired'
-                data['message'] = 'Your subscription has expired.'
-                subscription.active = False
-                subscription.save()
-            elif subscription.active:
-                trial_end_time = subscription.payment_time + timedelta(hours=subscription.trial_period_hours)
-                if subscription.trial_period_hours > 0 and now < trial_end_time:
-                    data['status_description'] = 'trial'
-                    data['message'] = f'Before {trial_end_time.isoformat()}, you can'
-                    data['cancel_subscription_url'] = '/api/subscription/cancel'
-                else:
-                    data['status_description'] = 'subscribed'
-                    data['message'] = 'You are currently subscribed.'
-            else:
-                data['status_description'] = 'cancelled_not_expired'
-                data['message'] = 'Your subscription has been cancelled.'
-            # 直接返回原始 UTC 时间
-            data['payment_time'] = subscription.payment_time
-            data['expiration_date'] = subscription.expiration_date
-            result.append(data)
+        # 已过期的订阅一次性标记为未激活，不在输出时逐条保存
+        deactivate(subscriptions)
+        # 订阅记录逐批读取、逐条输出，不在内存中构建完整列表
+        rows = iterate(subscriptions.select_related('bot').order_by('-payment_time'))
+        return StreamingJSONResponse(self._status(subscription, now) for subscription in rows)
+
+    def _status(self, subscription, now):
+        data = SubscriptionSerializer(subscription).data
 
-        return Response(result, status=status.HTTP_200_OK)
+        if subscription.expiration_date < now:
+            data['status_description'] = 'expired'
+            data['message'] = 'Your subscription has expired.'
+        elif subscription.active:
+            trial_end_time = subscription.trial_ends_at
+            if trial_end_time is not None and now < trial_end_time:
+                data['status_description'] = 'trial'
+                data['message'] = f'Before {trial_end_time.isoformat()}, you can'
+                data['cancel_subscription_url'] = '/api/subscription/cancel'
+            else:
+                data['status_description'] = 'subscribed'
+                data['message'] = 'You are currently subscribed.'
+        else:
+            data['status_description'] = 'cancelled_not_expired'
+            data['message'] = 'Your subscription has been cancelled.'
+        # 直接返回原始 UTC 时间
+        data['payment_time'] = subscription.payment_time
+        data['expiration_date'] = subscription.expiration_date
+        return data
 
 class SetInactiveSubscriptionView(APIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -109,3 +111,29 @@ class SetInactiveSubscriptionView(APIView):
                 {'error': f'Failed to update subscription status: {str(e)}'}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+
+class DeveloperStatsView(APIView):
+    """当前开发者所有机器人的订阅统计及合计，读取 BotSubscriptionStats，不扫描订阅表"""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        bots = BotManagement.objects.filter(user=request.user).select_related('subscription_stats').order_by('id')
+        items = [stats_for(bot) for bot in bots]
+        totals = {name: sum(getattr(item, name) for item in items) for name in COUNTERS}
+        totals['revenue'] = str(Decimal(totals['revenue']).quantize(Decimal('0.01')))
+        return Response({
+            'totals': totals,
+            'bots': BotSubscriptionStatsSerializer(items, many=True).data,
+        }, status=status.HTTP_200_OK)
+
+
+class BotStatsView(APIView):
+    """单个机器人的订阅统计，只有机器人的开发者可以查看"""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, bot_id):
+        bot = BotManagement.objects.filter(id=bot_id, user=request.user).select_related('subscription_stats').first()
+        if bot is None:
+            return Response({'error': 'Bot not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(BotSubscriptionStatsSerializer(stats_for(bot)).data, status=status.HTTP_200_OK)
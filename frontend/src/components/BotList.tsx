@@ -46,7 +46,7 @@ const BotList: React.FC<BotListProps> = ({ bots, onEdit, onDelete, onPublish })
                   <strong>IPFS: </strong>
                   <Tooltip title={`View details on IPFS`}>
                     <a
-                      href={`https://ipfs.io/ipfs/${bot.ipfs_hash}`}
+                      href={`/api/ipfs/${bot.ipfs_hash}/`}
                       target="_blank"
                       rel="noopener noreferrer"
                     >
@@ -43,7 +43,7 @@ const PublishedBotList: React.FC<PublishedBotListProps> = ({ bots, loading }) =>
                 {bot.ipfs_hash && (
                   <Tooltip title={`View details on IPFS`}>
                     <a
-                      href={`https://ipfs.io/ipfs/${bot.ipfs_hash}`}
+                      href={`/api/ipfs/${bot.ipfs_hash}/`}
                       target="_blank"
                       rel="noopener noreferrer"
                     >
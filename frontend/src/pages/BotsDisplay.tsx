@@ -11,7 +11,9 @@ import { Bot } from '../types/bot';
 const BotsDisplay: React.FC = () => {
   const { openModal } = useUserManagementModal();
   const [bots, setBots] = useState<Bot[]>([]);
+  const [next, setNext] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState<string | null>(null);
   const navigate = useNavigate();
 
@@ -22,8 +24,9 @@ const BotsDisplay: React.FC = () => {
   const loadPublishedBots = async () => {
     try {
       setLoading(true);
-      const data = await getPublishedBots();
-      setBots(data);
+      const page = await getPublishedBots();
+      setBots(page.bots);
+      setNext(page.next);
     } catch (error) {
       setError('Failed to load bot list');
       message.error('Failed to load bot list');
@@ -32,6 +35,19 @@ const BotsDisplay: React.FC = () => {
     }
   };
 
+  const loadMore = async () => {
+    try {
+      setLoadingMore(true);
+      const page = await getPublishedBots(next);
+      setBots((prev) => [...prev, ...page.bots]);
+      setNext(page.next);
+    } catch (error) {
+      message.error('Failed to load more bots');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   if (error) {
     return (
       <div className={styles.errorContainer}>
@@ -53,6 +69,11 @@ const BotsDisplay: React.FC = () => {
         </Button>
       </div>
       <PublishedBotList bots={bots} loading={loading} />
+      {next && !loading && (
+        <Button onClick={loadMore} loading={loadingMore}>
+          Load more
+        </Button>
+      )}
       <UserManagementModel />
     </div>
   );
@@ -89,11 +89,37 @@ export const deleteBot = async (id: number) => {
   return response.data;
 };
 
-// 上传到IPFS
-export const uploadToIPFS = async (botId: number) => {
+// 上传到IPFS：加入上传队列后轮询机器人状态，直到上传完成或失败
+export const uploadToIPFS = async (botId: number, pollInterval = 2000, maxAttempts = 150) => {
   const response = await axios.post(`${API_BASE_URL}/bots/${botId}/upload_to_ipfs/`, {}, {
     headers: getAuthHeader()
   });
+  if (response.data.status !== 'uploading') {
+    return response.data;
+  }
+
+  for (let attempt = 0; attempt < maxAttempts; attempt++) {
+    await new Promise(resolve => setTimeout(resolve, pollInterval));
+    const bot = await axios.get(`${API_BASE_URL}/bots/${botId}/`, {
+      headers: getAuthHeader()
+    });
+    if (bot.data.ipfs_status === 'uploaded') {
+      return bot.data;
+    }
+    if (bot.data.ipfs_status === 'failed') {
+      throw new Error(bot.data.ipfs_error || 'IPFS upload failed');
+    }
+  }
+  throw new Error('IPFS upload timed out');
+};
+
+// 批量上传到IPFS，返回每个机器人的上传结果
+export const bulkUploadToIPFS = async (botIds: number[]) => {
+  const response = await axios.post(`${API_BASE_URL}/bots/bulk_upload_to_ipfs/`, {
+    bot_ids: botIds,
+  }, {
+    headers: getAuthHeader()
+  });
   return response.data;
 };
 
@@ -105,23 +131,52 @@ export const publishBot = async (botId: number) => {
   return response.data;
 };
 
-export const confirmPublish = async (botId: number, transactionHash: string) => {
+// 查询发布交易的确认状态
+export const getPublishStatus = async (botId: number) => {
+  const response = await axios.get(`${API_BASE_URL}/bots/${botId}/publish_status/`, {
+    headers: getAuthHeader()
+  });
+  return response.data;
+};
+
+// 提交发布交易后轮询确认状态，直到成功或失败
+export const confirmPublish = async (botId: number, transactionHash: string, pollInterval = 3000, maxAttempts = 100) => {
   const response = await axios.post(`${API_BASE_URL}/bots/${botId}/confirm_publish/`, {
     transactionHash,
   }, {
     headers: getAuthHeader()
   });
-  return response.data;
+  if (response.data.status !== 'pending') {
+    return response.data;
+  }
+
+  for (let attempt = 0; attempt < maxAttempts; attempt++) {
+    await new Promise(resolve => setTimeout(resolve, pollInterval));
+    const result = await getPublishStatus(botId);
+    if (result.status === 'success') {
+      return result;
+    }
+    if (result.status === 'failed') {
+      throw new Error(result.error || 'Transaction verification failed');
+    }
+  }
+  throw new Error('Transaction confirmation timed out');
 };
 
-// 获取已上链的机器人列表
-export const getPublishedBots = async (): Promise<Bot[]> => {
+export interface PublishedBotsPage {
+  bots: Bot[];
+  next: string | null;
+}
+
+// 分页获取已上链的机器人列表，传入上一页返回的 next 获取下一页
+export const getPublishedBots = async (next?: string | null): Promise<PublishedBotsPage> => {
   try {
     const headers = getAuthHeader();
-    console.log('Request URL:', `${API_BASE_URL}/bots/published/`);
+    const url = next || `${API_BASE_URL}/bots/published/`;
+    console.log('Request URL:', url);
     console.log('Request Headers:', headers);
     
-    const response = await axios.get(`${API_BASE_URL}/bots/published/`, {
+    const response = await axios.get(url, {
       headers: {
         ...headers,
         'Accept': 'application/json',
@@ -132,7 +187,7 @@ export const getPublishedBots = async (): Promise<Bot[]> => {
     
     if (!response.data) {
       console.error('No data in response');
-      return [];
+      return { bots: [], next: null };
     }
 
     // 确保返回的是数组
@@ -140,7 +195,7 @@ export const getPublishedBots = async (): Promise<Bot[]> => {
                  Array.isArray(response.data.results) ? response.data.results : [];
     
     console.log('Processed bots:', bots);
-    return bots;
+    return { bots, next: response.data.next || null };
   } catch (error) {
     if (axios.isAxiosError(error)) {
       console.error('Axios Error Details:', {
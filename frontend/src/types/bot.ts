@@ -8,6 +8,7 @@ export interface Bot {
   image1: string;
   image2?: string;
   image3?: string;
+  image_variants?: Record<string, { thumb?: string; medium?: string }>;
   external_link?: string;
   created_at: string;
   ipfs_hash?: string;